@@ -3,6 +3,15 @@ import streamlit as st
 
 from guis.long_form_qa_gui import long_form_qa_gui
 from guis.passage_search_gui import passage_search_gui
+from sub_apps.passage_search.passage_search import passage_search
+from utilities import locker
+from utilities.background_job import background_job_runner
+from utilities.embedding_cache import embedding_cache
+from utilities.inference_backend import inference_backend
+from utilities.micro_batcher import micro_batcher
+from utilities.model_registry import model_registry
+from utilities.result_cache import result_cache
+from utilities.segment_cache import segment_cache
 
 
 class App:
@@ -29,6 +38,26 @@ class App:
         else:
             raise ValueError(f"Sub app {sub_app} is not supported.")
 
+        with st.sidebar.expander(label="Statistics"):
+            st.write("Model registry:")
+            st.json(model_registry.get_statistics())
+            st.write("Embedding cache:")
+            st.json(embedding_cache.get_statistics())
+            st.write("Segment cache:")
+            st.json(segment_cache.get_statistics())
+            st.write("Dense index cache:")
+            st.json(passage_search.dense_index_cache.get_statistics())
+            st.write("Locks:")
+            st.json(locker.get_statistics())
+            st.write("Micro batches:")
+            st.json(micro_batcher.get_statistics())
+            st.write("Result cache:")
+            st.json(result_cache.get_statistics())
+            st.write("Background jobs:")
+            st.json(background_job_runner.get_statistics())
+            st.write("Inference backend:")
+            st.json(inference_backend.get_statistics())
+
 
 app = App()
 app.display()
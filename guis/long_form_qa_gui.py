@@ -1,8 +1,6 @@
-import hashlib
-import os
 import pathlib
+import time
 from pathlib import Path
-from typing import Optional
 
 import pandas as pd
 import streamlit as st
@@ -12,8 +10,12 @@ from models.embedding_model import EmbeddingModel
 from models.lfqa_response import LFQAResponse
 from models.lfqa_search_request import LFQARequest
 from models.passage_search_request import PassageSearchRequest
+from sub_apps.long_form_qa.generation_stream import GenerationStream
 from sub_apps.long_form_qa.lfqa import long_form_qa
+from sub_apps.passage_search.passage_search import passage_search
+from utilities.background_job import BackgroundJob
 from utilities.document_conversion import document_conversion
+from utilities.fingerprint import fingerprint
 
 
 class LongFormQAGUI:
@@ -24,6 +26,32 @@ class LongFormQAGUI:
         self.passage_search_request.embedding_model = EmbeddingModel()
         self.lfqa_request: LFQARequest = LFQARequest()
 
+    def display_index_build(self) -> bool:
+        index_build_job: BackgroundJob = passage_search.start_index_build(
+            passage_search_request=self.passage_search_request
+        )
+        if index_build_job.status == "failed":
+            st.error(f"Index build failed: {index_build_job.error}")
+            if st.button(label="Retry the index build."):
+                passage_search.start_index_build(
+                    passage_search_request=self.passage_search_request,
+                    retry_failed=True
+                )
+                st.experimental_rerun()
+            return False
+
+        if index_build_job.is_running():
+            # The build keeps running in the background, this run only polls and reruns itself.
+            index_build_progress: dict = index_build_job.get_progress()
+            st.subheader("Index Build Progress")
+            if index_build_progress["total_count"]:
+                st.progress(min(index_build_progress["done_count"] / index_build_progress["total_count"], 1.0))
+            st.json(index_build_progress)
+            time.sleep(1)
+            st.experimental_rerun()
+
+        return True
+
     def display(self) -> None:
         st.title("Long Form QA")
 
@@ -102,6 +130,23 @@ class LongFormQAGUI:
             index=1
         )
 
+        self.passage_search_request.faiss_index_type = st.radio(
+            label="Pick a dense index type (auto picks by the number of windows).",
+            options=['auto', 'flat', 'hnsw', 'ivf_flat', 'ivf_pq'],
+            index=0
+        )
+
+        self.passage_search_request.embedding_storage = st.radio(
+            label="Pick a dense index embedding storage.",
+            options=['float32', 'float16', 'int8'],
+            index=0
+        )
+
+        self.passage_search_request.embedding_rescore = st.checkbox(
+            label="Re-score the top dense candidates with full precision embeddings.",
+            value=False
+        )
+
         self.passage_search_request.sparse_retriever = st.radio(
             label="Pick a sparse retriever.",
             options=['tfidf', 'bm25'],
@@ -122,6 +167,13 @@ class LongFormQAGUI:
         else:
             st.error("Please select a right ranker.")
 
+        self.passage_search_request.inference_backend = self.lfqa_request.inference_backend = st.radio(
+            label="Pick an inference backend for the encoders, the ranker and the generator "
+                  "(int8 falls back to fp32 if it drifts).",
+            options=['default', 'cpu', 'cpu_int8'],
+            index=0
+        )
+
         self.lfqa_request.generator_model_format = st.radio(
             label="Pick a generator model format.",
             options=['seq2seq', 'llm_prompt'],
@@ -189,7 +241,7 @@ class LongFormQAGUI:
             index=0
         )
 
-        uploaded_file_path: Optional[Path] = None
+        self.passage_search_request.corpus_id = None
         if self.passage_search_request.corpus_source_type in ['file']:
             uploaded_file = st.file_uploader(
                 label="Upload a file.",
@@ -198,43 +250,46 @@ class LongFormQAGUI:
             )
 
             if None not in [uploaded_file]:
-                uploaded_file_hash = hashlib.md5(
-                    uploaded_file.getbuffer()).hexdigest()
+                uploaded_file_hash = fingerprint.get_bytes_hash(uploaded_file.getbuffer())
                 uploaded_file_name = f"{uploaded_file_hash}.pdf"
                 uploaded_file_path = self.STREAMLIT_STATIC_PATH / uploaded_file_name
                 self.passage_search_request.corpus = str(document_conversion.file_bytes_to_pdf(
                     uploaded_file.getbuffer(), uploaded_file_path))
+                self.passage_search_request.corpus_id = uploaded_file.name
                 st.success("File uploaded!")
         elif self.passage_search_request.corpus_source_type in ['text', 'web']:
             self.passage_search_request.corpus = st.text_area(
                 label="Enter a corpus.",
                 value=""
             )
+            if self.passage_search_request.corpus_source_type == 'text':
+                self.passage_search_request.corpus_id = st.text_input(
+                    label="Enter a document id, edits of a text under the same id update its indexes (optional).",
+                    value=""
+                ) or None
         else:
             st.error("Please select a right source type.")
 
         if self.passage_search_request.corpus not in ["", None] and self.passage_search_request.corpus_source_type in [
             'file']:
-            uploaded_file_name = os.path.splitext(os.path.basename(self.passage_search_request.corpus))[0]
             uploaded_file_page_length = document_conversion.get_pdf_page_length(self.passage_search_request.corpus)
 
-            start_page = st.number_input(
+            self.passage_search_request.start_page = st.number_input(
                 label=f"Enter the start page of the pdf you want to be retrieved (1-{uploaded_file_page_length}).",
                 min_value=1,
                 max_value=uploaded_file_page_length,
                 value=1
             )
-            end_page = st.number_input(
+            self.passage_search_request.end_page = st.number_input(
                 f"Enter the end page of the pdf you want to be retrieved (1-{uploaded_file_page_length}).",
                 min_value=1,
                 max_value=uploaded_file_page_length,
                 value=uploaded_file_page_length
             )
 
-            split_uploaded_file_name = f'{uploaded_file_name}_split_{start_page}_to_{end_page}.pdf'
-            split_uploaded_file_path = self.STREAMLIT_STATIC_PATH / f"{split_uploaded_file_name}"
-            self.passage_search_request.corpus = str(document_conversion.split_pdf_page(
-                start_page, end_page, uploaded_file_path, split_uploaded_file_path))
+        else:
+            self.passage_search_request.start_page = None
+            self.passage_search_request.end_page = None
 
         self.passage_search_request.query = st.text_area(
             label="Enter a query.",
@@ -252,6 +307,19 @@ class LongFormQAGUI:
             value='1 2 3 4 5'
         )
 
+        self.passage_search_request.window_strides = st.text_input(
+            label='Enter a list of window strides that seperated by a space, the last one applies to the rest sizes.',
+            value='1'
+        )
+
+        token_budget_window_stride: int = st.number_input(
+            label="Enter a stride for windows filled up to the passage model max length (0 to disable).",
+            min_value=0,
+            value=0
+        )
+        self.passage_search_request.token_budget_window_stride = token_budget_window_stride \
+            if token_budget_window_stride > 0 else None
+
         self.passage_search_request.retriever_top_k = st.number_input(
             label="Enter a top-k for each retriever.",
             value=100
@@ -263,7 +331,8 @@ class LongFormQAGUI:
         )
 
         passage_search_request_dict: dict = self.passage_search_request.dict(
-            exclude={"api_key", "num_iterations"}
+            exclude={"api_key", "corpus_id", "num_iterations", "start_page", "end_page",
+                     "token_budget_window_stride"}
         )
         lfqa_request_dict: dict = self.lfqa_request.dict(
             exclude={"api_key", "answer_min_length", "answer_max_length", "answer_max_tokens",
@@ -273,15 +342,22 @@ class LongFormQAGUI:
         if all(value not in [None, ""] for value in
                list(passage_search_request_dict.values())
                + list(lfqa_request_dict.values())
-               ):
-            lfqa_search_response: LFQAResponse = long_form_qa.qa(
+               ) and self.display_index_build():
+            generation_stream: GenerationStream = long_form_qa.qa_stream(
                 passage_search_request=self.passage_search_request,
                 lfqa_request=self.lfqa_request
             )
 
-            documents_response: list = lfqa_search_response.generative_qa_result["_debug"]["Ranker"]["output"][
-                "documents"]
+            st.subheader("Output Answer")
+            answer_placeholder = st.empty()
+            for _ in generation_stream:
+                answer_placeholder.markdown(generation_stream.text)
+
+            lfqa_search_response: LFQAResponse = generation_stream.result
+            documents_response: list = lfqa_search_response.retrieval_result["documents"]
             answers_response: list = lfqa_search_response.generative_qa_result["answers"]
+            # The final decode cleans up tokenization spaces the streamed prefix may still have.
+            answer_placeholder.markdown(answers_response[0].answer)
 
             st.subheader("Output Score Overview")
             st.caption(
@@ -295,10 +371,18 @@ class LongFormQAGUI:
 
             st.subheader("Output Process Duration")
             st.write(f"{lfqa_search_response.process_duration} seconds")
+            st.caption("Retrieval is reused while only the generator settings change.")
+            st.write(f"Retrieval: {lfqa_search_response.retrieval_duration} seconds")
+            if lfqa_search_response.node_durations is not None:
+                for node_id, node_duration in lfqa_search_response.node_durations.items():
+                    st.write(f"{node_id}: {node_duration: .4f} seconds")
+            st.write(f"Generation: {lfqa_search_response.generation_duration} seconds")
+            if lfqa_search_response.time_to_first_token is not None:
+                st.write(f"Time to first token: {lfqa_search_response.time_to_first_token} seconds")
+            if lfqa_search_response.tokens_per_second is not None:
+                st.write(f"Tokens per second: {lfqa_search_response.tokens_per_second}")
 
             st.subheader("Output Content")
-            st.write(f"Answer:")
-            st.write(f"{answers_response[0].answer}")
             st.write(f"Retrieved documents:")
             retrieved_documents_df: DataFrame = pd.DataFrame(
                 columns=["Content", "Score"],
@@ -1,6 +1,6 @@
-import hashlib
 import os
 import pathlib
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -13,9 +13,10 @@ from models.passage_search_request import PassageSearchRequest
 from models.passage_search_response import PassageSearchResponse
 from sub_apps.passage_search.annotater import annotater
 from sub_apps.passage_search.passage_search import passage_search
-from sub_apps.passage_search.search_statistics import search_statistics
+from sub_apps.passage_search.search_statistics import OverlappedScores, search_statistics
+from utilities.background_job import BackgroundJob
 from utilities.document_conversion import document_conversion
-from utilities.document_processor import document_processor
+from utilities.fingerprint import fingerprint
 
 
 class PassageSearchGUI:
@@ -26,6 +27,32 @@ class PassageSearchGUI:
         self.passage_search_request: PassageSearchRequest = PassageSearchRequest()
         self.passage_search_request.embedding_model = EmbeddingModel()
 
+    def display_index_build(self) -> bool:
+        index_build_job: BackgroundJob = passage_search.start_index_build(
+            passage_search_request=self.passage_search_request
+        )
+        if index_build_job.status == "failed":
+            st.error(f"Index build failed: {index_build_job.error}")
+            if st.button(label="Retry the index build."):
+                passage_search.start_index_build(
+                    passage_search_request=self.passage_search_request,
+                    retry_failed=True
+                )
+                st.experimental_rerun()
+            return False
+
+        if index_build_job.is_running():
+            # The build keeps running in the background, this run only polls and reruns itself.
+            index_build_progress: dict = index_build_job.get_progress()
+            st.subheader("Index Build Progress")
+            if index_build_progress["total_count"]:
+                st.progress(min(index_build_progress["done_count"] / index_build_progress["total_count"], 1.0))
+            st.json(index_build_progress)
+            time.sleep(1)
+            st.experimental_rerun()
+
+        return True
+
     def display(self) -> None:
         st.title("Passage Search")
 
@@ -103,6 +130,23 @@ class PassageSearchGUI:
             index=1
         )
 
+        self.passage_search_request.faiss_index_type = st.radio(
+            label="Pick a dense index type (auto picks by the number of windows).",
+            options=['auto', 'flat', 'hnsw', 'ivf_flat', 'ivf_pq'],
+            index=0
+        )
+
+        self.passage_search_request.embedding_storage = st.radio(
+            label="Pick a dense index embedding storage.",
+            options=['float32', 'float16', 'int8'],
+            index=0
+        )
+
+        self.passage_search_request.embedding_rescore = st.checkbox(
+            label="Re-score the top dense candidates with full precision embeddings.",
+            value=False
+        )
+
         self.passage_search_request.sparse_retriever = st.radio(
             label="Pick a sparse retriever.",
             options=['tfidf', 'bm25'],
@@ -123,13 +167,19 @@ class PassageSearchGUI:
         else:
             st.error("Please select a right ranker.")
 
+        self.passage_search_request.inference_backend = st.radio(
+            label="Pick an inference backend for the encoders and the ranker (int8 falls back to fp32 if it drifts).",
+            options=['default', 'cpu', 'cpu_int8'],
+            index=0
+        )
+
         self.passage_search_request.corpus_source_type = st.radio(
             label="Pick a corpus source type.",
             options=['file', 'text', 'web'],
             index=0
         )
 
-        uploaded_file_path: Optional[Path] = None
+        self.passage_search_request.corpus_id = None
         if self.passage_search_request.corpus_source_type in ['file']:
             uploaded_file = st.file_uploader(
                 label="Upload a file.",
@@ -138,43 +188,46 @@ class PassageSearchGUI:
             )
 
             if None not in [uploaded_file]:
-                uploaded_file_hash = hashlib.md5(
-                    uploaded_file.getbuffer()).hexdigest()
+                uploaded_file_hash = fingerprint.get_bytes_hash(uploaded_file.getbuffer())
                 uploaded_file_name = f"{uploaded_file_hash}.pdf"
                 uploaded_file_path = self.STREAMLIT_STATIC_PATH / uploaded_file_name
                 self.passage_search_request.corpus = str(
                     document_conversion.file_bytes_to_pdf(uploaded_file.getbuffer(), uploaded_file_path))
+                self.passage_search_request.corpus_id = uploaded_file.name
                 st.success("File uploaded!")
         elif self.passage_search_request.corpus_source_type in ['text', 'web']:
             self.passage_search_request.corpus = st.text_area(
                 label="Enter a corpus.",
                 value=""
             )
+            if self.passage_search_request.corpus_source_type == 'text':
+                self.passage_search_request.corpus_id = st.text_input(
+                    label="Enter a document id, edits of a text under the same id update its indexes (optional).",
+                    value=""
+                ) or None
         else:
             st.error("Please select a right source type.")
 
         if self.passage_search_request.corpus not in ["", None] and self.passage_search_request.corpus_source_type in [
             'file']:
-            uploaded_file_name = os.path.splitext(os.path.basename(self.passage_search_request.corpus))[0]
             uploaded_file_page_length = document_conversion.get_pdf_page_length(self.passage_search_request.corpus)
 
-            start_page: int = st.number_input(
+            self.passage_search_request.start_page = st.number_input(
                 label=f"Enter the start page of the pdf you want to be retrieved (1-{uploaded_file_page_length}).",
                 min_value=1,
                 max_value=uploaded_file_page_length,
                 value=1
             )
-            end_page: int = st.number_input(
+            self.passage_search_request.end_page = st.number_input(
                 f"Enter the end page of the pdf you want to be retrieved (1-{uploaded_file_page_length}).",
                 min_value=1,
                 max_value=uploaded_file_page_length,
                 value=uploaded_file_page_length
             )
 
-            split_uploaded_file_name: str = f'{uploaded_file_name}_split_{start_page}_to_{end_page}.pdf'
-            split_uploaded_file_path: Path = self.STREAMLIT_STATIC_PATH / f"{split_uploaded_file_name}"
-            self.passage_search_request.corpus = str(document_conversion.split_pdf_page(
-                start_page, end_page, uploaded_file_path, split_uploaded_file_path))
+        else:
+            self.passage_search_request.start_page = None
+            self.passage_search_request.end_page = None
 
         self.passage_search_request.query = st.text_area(
             label="Enter a query.",
@@ -192,6 +245,24 @@ class PassageSearchGUI:
             value='1 2 3 4 5'
         )
 
+        self.passage_search_request.window_strides = st.text_input(
+            label='Enter a list of window strides that seperated by a space, the last one applies to the rest sizes.',
+            value='1'
+        )
+
+        token_budget_window_stride: int = st.number_input(
+            label="Enter a stride for windows filled up to the passage model max length (0 to disable).",
+            min_value=0,
+            value=0
+        )
+        self.passage_search_request.token_budget_window_stride = token_budget_window_stride \
+            if token_budget_window_stride > 0 else None
+
+        measure_stride_recall: bool = st.checkbox(
+            label="Measure the recall of the strided windows against stride 1 windows (builds a second index).",
+            value=False
+        )
+
         self.passage_search_request.retriever_top_k = st.number_input(
             label="Enter a top-k for each retriever.",
             value=100
@@ -203,57 +274,60 @@ class PassageSearchGUI:
         )
 
         passage_search_request_dict: dict = self.passage_search_request.dict(
-            exclude={"api_key", "num_iterations"}
+            exclude={"api_key", "corpus_id", "num_iterations", "start_page", "end_page",
+                     "token_budget_window_stride"}
         )
-        if all(value not in [None, ""] for value in passage_search_request_dict.values()):
+        if all(value not in [None, ""] for value in passage_search_request_dict.values()) \
+                and self.display_index_build():
             passage_search_response: PassageSearchResponse = passage_search.search(
                 passage_search_request=self.passage_search_request
             )
 
             result_windowed_documents: list = passage_search_response.retrieval_result["documents"]
-            result_documents = document_processor.granularize(
-                corpus=self.passage_search_request.corpus,
-                corpus_source_type=self.passage_search_request.corpus_source_type,
-                granularity=self.passage_search_request.granularity
+            result_documents: list[str] = passage_search.get_segments(
+                passage_search_request=self.passage_search_request,
+                passage_search_response=passage_search_response
             )
 
-            result_document_indexes_with_overlapped_scores: dict[int, dict] = \
+            result_overlapped_scores: OverlappedScores = \
                 search_statistics.get_document_indexes_with_overlapped_scores(result_windowed_documents)
+            top_result_overlapped_scores: OverlappedScores = search_statistics.get_top_overlapped_scores(
+                overlapped_scores=result_overlapped_scores,
+                top_k=self.passage_search_request.retriever_top_k
+            )
 
             selected_result_labels: list = search_statistics.get_selected_labels(
-                document_indexes_with_overlapped_scores=result_document_indexes_with_overlapped_scores,
-                top_k=self.passage_search_request.retriever_top_k
+                top_overlapped_scores=top_result_overlapped_scores
             )
             selected_result_documents: list[str] = search_statistics.get_selected_documents(
-                document_indexes_with_overlapped_scores=result_document_indexes_with_overlapped_scores,
-                top_k=self.passage_search_request.retriever_top_k,
+                top_overlapped_scores=top_result_overlapped_scores,
                 source_documents=result_documents
             )
 
-            passage_search_request_hash: str = hashlib.md5(str(self.passage_search_request).encode("utf-8")).hexdigest()
+            corpus_hash: str = fingerprint.get_corpus_hash(
+                corpus=self.passage_search_request.corpus,
+                corpus_source_type=self.passage_search_request.corpus_source_type
+            )
+            passage_search_request_hash: str = passage_search.get_request_hash(self.passage_search_request)
             pdf_output_file_path: Path = document_conversion.corpus_to_pdf(
                 self.passage_search_request,
-                output_file_path=self.STREAMLIT_STATIC_PATH / f"output_{passage_search_request_hash}.pdf"
+                output_file_path=self.STREAMLIT_STATIC_PATH / f"output_{corpus_hash}.pdf",
+                overwrite=False
             )
             highlighted_pdf_output_file_path: Path = annotater.annotate(
                 labels=selected_result_labels,
                 documents=selected_result_documents,
                 input_file_path=pdf_output_file_path,
                 output_file_path=self.STREAMLIT_STATIC_PATH / f"highlighted_output_{passage_search_request_hash}.pdf",
+                overwrite=False
             )
             highlighted_pdf_output_file_name: str = os.path.basename(highlighted_pdf_output_file_path)
 
             st.subheader("Output Score Overview")
             st.caption(
                 "Metric to determine how sure the meaning of the query is in the corpus (score_mean to document in descending order).")
-            sorted_result_document_indexes_with_overlapped_scores_items: list = sorted(
-                result_document_indexes_with_overlapped_scores.items(),
-                key=lambda item: item[1]["score_mean"],
-                reverse=True
-            )
             chart_df: DataFrame = pd.DataFrame(
-                data=[value['score_mean']
-                      for key, value in sorted_result_document_indexes_with_overlapped_scores_items],
+                data=top_result_overlapped_scores.score_means,
                 columns=['score']
             )
             st.line_chart(chart_df)
@@ -261,6 +335,26 @@ class PassageSearchGUI:
             st.subheader("Output Process Duration")
             st.write("{} seconds".format(
                 passage_search_response.process_duration))
+            if passage_search_response.node_durations is not None:
+                st.caption("Retrieval branches run concurrently, so their durations overlap.")
+                for node_id, node_duration in passage_search_response.node_durations.items():
+                    st.write(f"{node_id}: {node_duration: .4f} seconds")
+
+            if measure_stride_recall:
+                st.subheader("Output Window Stride Recall")
+                st.caption("Share of source units covered by stride 1 results that the strided results also cover.")
+                stride_recall: Optional[float] = passage_search.get_stride_recall(
+                    passage_search_request=self.passage_search_request,
+                    passage_search_response=passage_search_response
+                )
+                if stride_recall is not None:
+                    st.write(f"{stride_recall: .4f}")
+                else:
+                    st.write("Not available, the windows have no stride or the stride 1 index is still building.")
+
+            st.subheader("Output Dense Index")
+            st.caption("Recall of the dense index against an exact search over the same windows.")
+            st.json(passage_search_response.dense_index_report)
 
             st.subheader("Output Content")
 
@@ -273,12 +367,9 @@ class PassageSearchGUI:
             retrieved_documents_df: DataFrame = pd.DataFrame(
                 columns=["Content", "Score Mean", "Score Count"],
                 data=zip(
-                    [result_documents[key] for key, value in
-                     sorted_result_document_indexes_with_overlapped_scores_items],
-                    [value["score_mean"] for key, value in
-                     sorted_result_document_indexes_with_overlapped_scores_items],
-                    [value["count"] for key, value in
-                     sorted_result_document_indexes_with_overlapped_scores_items]
+                    selected_result_documents,
+                    top_result_overlapped_scores.score_means.tolist(),
+                    top_result_overlapped_scores.counts.tolist()
                 )
             )
             st.table(retrieved_documents_df)
@@ -1,6 +1,14 @@
+from typing import Dict, Optional
+
 from pydantic import BaseModel
 
 
 class LFQAResponse(BaseModel):
     generative_qa_result: dict
+    retrieval_result: Optional[dict]
+    retrieval_duration: Optional[float]
+    node_durations: Optional[Dict[str, float]]
+    generation_duration: Optional[float]
+    time_to_first_token: Optional[float]
+    tokens_per_second: Optional[float]
     process_duration: float
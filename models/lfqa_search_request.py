@@ -11,4 +11,5 @@ class LFQARequest(BaseModel):
     answer_min_length: Optional[int]
     answer_max_length: Optional[int]
     answer_max_tokens: Optional[int]
+    inference_backend: Optional[str]
     api_key: Optional[str]
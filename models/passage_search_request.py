@@ -8,9 +8,14 @@ from models.embedding_model import EmbeddingModel
 class PassageSearchRequest(BaseModel):
     corpus_source_type: Optional[str]
     corpus: Optional[str]
+    corpus_id: Optional[str]
+    start_page: Optional[int]
+    end_page: Optional[int]
     query: Optional[str]
     granularity: Optional[str]
     window_sizes: Optional[str]
+    window_strides: Optional[str]
+    token_budget_window_stride: Optional[int]
     retriever_source_type: Optional[str]
     dense_retriever: Optional[str]
     sparse_retriever: Optional[str]
@@ -19,6 +24,10 @@ class PassageSearchRequest(BaseModel):
     embedding_dimension: Optional[int]
     num_iterations: Optional[int]
     similarity_function: Optional[str]
+    faiss_index_type: Optional[str]
+    embedding_storage: Optional[str]
+    embedding_rescore: Optional[bool]
+    inference_backend: Optional[str]
     retriever_top_k: Optional[float]
     ranker_top_k: Optional[float]
     api_key: Optional[str]
@@ -1,6 +1,11 @@
+from typing import Dict, Optional
+
 from pydantic import BaseModel
 
 
 class PassageSearchResponse(BaseModel):
     retrieval_result: dict
+    segment_cache_key: str
+    dense_index_report: Optional[dict]
+    node_durations: Optional[Dict[str, float]]
     process_duration: float
@@ -0,0 +1,44 @@
+import argparse
+from datetime import datetime
+from typing import List
+
+from utilities.storage_manager import storage_manager
+
+
+class StorageAdmin:
+    def list(self) -> None:
+        for artifact in storage_manager.get_artifacts():
+            print(
+                f"{artifact['kind']:<14} {artifact['key']:<72} {artifact['size_bytes'] / 1024 ** 2:>10.1f} MiB "
+                f"last accessed {datetime.fromtimestamp(artifact['last_accessed_at']):%Y-%m-%d %H:%M}"
+            )
+        for legacy_artifact_path in storage_manager.get_legacy_artifact_paths():
+            print(f"{'legacy':<14} {legacy_artifact_path}")
+        print(f"Total {storage_manager.get_total_bytes() / 1024 ** 2:.1f} MiB "
+              f"of {storage_manager.max_bytes / 1024 ** 2:.1f} MiB budget.")
+
+    def prune(self, max_bytes: int, legacy: bool, dry_run: bool) -> None:
+        evicted_artifacts: List[dict] = storage_manager.evict(max_bytes=max_bytes, dry_run=dry_run)
+        for artifact in evicted_artifacts:
+            print(f"{'Would remove' if dry_run else 'Removed'} {artifact['kind']} {artifact['key']}")
+        if legacy:
+            for legacy_artifact_path in storage_manager.prune_legacy(dry_run=dry_run):
+                print(f"{'Would remove' if dry_run else 'Removed'} legacy {legacy_artifact_path}")
+
+
+storage_admin = StorageAdmin()
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="List and prune stored passage search indexes.")
+    subparsers = argument_parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List indexes from least to most recently used.")
+    prune_parser = subparsers.add_parser("prune", help="Remove least recently used indexes down to a budget.")
+    prune_parser.add_argument("--max-bytes", type=int, default=storage_manager.max_bytes)
+    prune_parser.add_argument("--legacy", action="store_true", help="Also remove indexes from the shared database.")
+    prune_parser.add_argument("--dry-run", action="store_true")
+    arguments = argument_parser.parse_args()
+
+    if arguments.command == "list":
+        storage_admin.list()
+    elif arguments.command == "prune":
+        storage_admin.prune(max_bytes=arguments.max_bytes, legacy=arguments.legacy, dry_run=arguments.dry_run)
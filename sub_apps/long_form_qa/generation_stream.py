@@ -0,0 +1,121 @@
+import queue
+import threading
+from time import perf_counter
+from typing import Any, Callable, Iterator, List, Optional
+
+import torch
+from haystack.nodes import BaseGenerator, Seq2SeqGenerator
+from haystack.schema import Answer, Document
+from transformers import BatchEncoding, StoppingCriteria, StoppingCriteriaList
+
+
+class TokenQueueStoppingCriteria(StoppingCriteria):
+    # Called after every decoding step, it never stops generation and only hands the newest token out.
+    def __init__(self, token_queue: queue.Queue) -> None:
+        self.token_queue: queue.Queue = token_queue
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> bool:
+        self.token_queue.put(int(input_ids[0, -1]))
+        return False
+
+
+class GenerationStream:
+    END_OF_STREAM: object = object()
+    NO_REPEAT_NGRAM_SIZE: int = 3
+
+    def __init__(self, generator: Optional[BaseGenerator], query: str, documents: List[Document],
+                 cached_generation_result: Optional[dict] = None,
+                 on_finish: Optional[Callable[["GenerationStream"], Any]] = None) -> None:
+        self.generator: Optional[BaseGenerator] = generator
+        self.query: str = query
+        self.documents: List[Document] = documents
+        self.on_finish: Optional[Callable[["GenerationStream"], Any]] = on_finish
+        self.generation_result: Optional[dict] = cached_generation_result
+        self.text: str = ""
+        self.token_count: Optional[int] = None
+        self.time_to_first_token: Optional[float] = None
+        self.generation_duration: Optional[float] = None
+        self.tokens_per_second: Optional[float] = None
+        self.result: Any = None
+
+    def stream_seq2seq(self) -> Iterator[str]:
+        generator: Seq2SeqGenerator = self.generator
+        converter: Callable = Seq2SeqGenerator._get_converter(generator.model_name_or_path)
+        encoded_input: BatchEncoding = converter(
+            tokenizer=generator.tokenizer, query=self.query, documents=self.documents, top_k=1
+        ).to(generator.devices[0])
+
+        # Only greedy decoding has a single running hypothesis whose tokens are final as they come out,
+        # so beam settings like early stopping do not apply while n-gram blocking still does.
+        token_queue: queue.Queue = queue.Queue()
+        generation_errors: List[Exception] = []
+
+        def generate() -> None:
+            try:
+                with torch.no_grad():
+                    generator.model.generate(
+                        input_ids=encoded_input["input_ids"],
+                        attention_mask=encoded_input["attention_mask"],
+                        min_length=generator.min_length,
+                        max_length=generator.max_length,
+                        num_beams=1,
+                        no_repeat_ngram_size=getattr(generator, "no_repeat_ngram_size", self.NO_REPEAT_NGRAM_SIZE),
+                        stopping_criteria=StoppingCriteriaList([TokenQueueStoppingCriteria(token_queue)]),
+                    )
+            except Exception as generation_error:
+                generation_errors.append(generation_error)
+            finally:
+                token_queue.put(self.END_OF_STREAM)
+
+        generation_thread: threading.Thread = threading.Thread(target=generate, daemon=True)
+        generation_thread.start()
+
+        token_ids: List[int] = []
+        while True:
+            token_id: Any = token_queue.get()
+            if token_id is self.END_OF_STREAM:
+                break
+            token_ids.append(token_id)
+            # Sentencepiece merges spaces and multi-byte characters across tokens, only a stable prefix is emitted.
+            text: str = generator.tokenizer.decode(token_ids, skip_special_tokens=True)
+            if text.startswith(self.text) and len(text) > len(self.text):
+                yield text[len(self.text):]
+        generation_thread.join()
+        if len(generation_errors) > 0:
+            raise generation_errors[0]
+
+        self.token_count = len(token_ids)
+        text: str = generator.tokenizer.decode(
+            token_ids, skip_special_tokens=True, clean_up_tokenization_spaces=True
+        )
+        if text.startswith(self.text) and len(text) > len(self.text):
+            yield text[len(self.text):]
+        self.generation_result = {
+            "query": self.query,
+            "answers": [Answer(answer=text, type="generative")],
+        }
+
+    def stream_whole(self) -> Iterator[str]:
+        # Prompt generators and cached results have no token stream, their answer arrives as one chunk.
+        if self.generation_result is None:
+            self.generation_result, _ = self.generator.run(query=self.query, documents=self.documents)
+        answers: list = self.generation_result.get("answers", [])
+        if len(answers) > 0:
+            yield answers[0].answer
+
+    def __iter__(self) -> Iterator[str]:
+        time_start: float = perf_counter()
+        chunks: Iterator[str] = self.stream_seq2seq() \
+            if isinstance(self.generator, Seq2SeqGenerator) and self.generation_result is None else self.stream_whole()
+
+        for chunk in chunks:
+            if self.time_to_first_token is None:
+                self.time_to_first_token = perf_counter() - time_start
+            self.text += chunk
+            yield chunk
+
+        self.generation_duration = perf_counter() - time_start
+        if self.token_count is not None and self.generation_duration > 0:
+            self.tokens_per_second = self.token_count / self.generation_duration
+        if self.on_finish is not None:
+            self.result = self.on_finish(self)
@@ -1,4 +1,8 @@
-from haystack.nodes import Seq2SeqGenerator, BaseGenerator, PromptNode, PromptTemplate, AnswerParser
+import hashlib
+
+import numpy as np
+import torch
+from haystack.nodes import Seq2SeqGenerator, BaseGenerator, PromptNode, PromptTemplate, AnswerParser, PromptModel
 from haystack.nodes.answer_generator.transformers import _BartEli5Converter
 
 from models.lfqa_search_request import LFQARequest
@@ -9,6 +13,8 @@ from sub_apps.long_form_qa.generator_model_converter.parrot_paraphraser_generato
     ParrotParaphraserGeneratorModelConverter
 from sub_apps.long_form_qa.generator_model_converter.t5_lfqa_generator_model_converter import \
     T5LFQAGeneratorModelConverter
+from utilities.inference_backend import inference_backend
+from utilities.model_registry import model_registry
 
 
 class GeneratorModel:
@@ -27,16 +33,68 @@ class GeneratorModel:
 
         return generator_model_input_converter
 
+    def get_probe_outputs(self, generator: Seq2SeqGenerator) -> np.ndarray:
+        # The first decoding step's logits decide the first answer token, the rest follows from them.
+        encoded_input = generator.tokenizer(
+            inference_backend.PROBE_TEXTS, padding=True, return_tensors="pt"
+        ).to(generator.devices[0])
+        decoder_input_ids: torch.Tensor = torch.full(
+            (len(inference_backend.PROBE_TEXTS), 1),
+            generator.model.config.decoder_start_token_id,
+            device=generator.devices[0]
+        )
+        with torch.inference_mode():
+            logits: torch.Tensor = generator.model(
+                input_ids=encoded_input["input_ids"],
+                attention_mask=encoded_input["attention_mask"],
+                decoder_input_ids=decoder_input_ids
+            ).logits[:, -1]
+        return logits.float().cpu().numpy()
+
     def get_seq2seq_generator(self, lfqa_request: LFQARequest) -> Seq2SeqGenerator:
-        generator: Seq2SeqGenerator = Seq2SeqGenerator(
-            model_name_or_path=lfqa_request.generator_model,
-            min_length=lfqa_request.answer_min_length,
-            max_length=lfqa_request.answer_max_length,
-            use_gpu=True,
-            input_converter=self.get_seq2seq_generator_input_converter(lfqa_request=lfqa_request),
+        load_options: dict = {
+            "model_name_or_path": lfqa_request.generator_model,
+            "inference_backend": lfqa_request.inference_backend,
+        }
+        generator: Seq2SeqGenerator = model_registry.get_model(
+            model_type="seq2seq_generator",
+            load_options=load_options,
+            loader=lambda: inference_backend.load(
+                model_key=model_registry.get_key(model_type="seq2seq_generator", load_options=load_options),
+                backend=lfqa_request.inference_backend,
+                loader=lambda use_gpu: Seq2SeqGenerator(
+                    model_name_or_path=lfqa_request.generator_model,
+                    min_length=lfqa_request.answer_min_length,
+                    max_length=lfqa_request.answer_max_length,
+                    use_gpu=use_gpu,
+                    input_converter=self.get_seq2seq_generator_input_converter(lfqa_request=lfqa_request),
+                ),
+                get_probe_outputs=self.get_probe_outputs
+            )
         )
+        generator.min_length = lfqa_request.answer_min_length
+        generator.max_length = lfqa_request.answer_max_length
         return generator
 
+    def get_prompt_model(self, lfqa_request: LFQARequest) -> PromptModel:
+        prompt_model: PromptModel = model_registry.get_model(
+            model_type="prompt_model",
+            load_options={
+                "model_name_or_path": lfqa_request.generator_model,
+                "max_length": lfqa_request.answer_max_length,
+                "api_key_hash": hashlib.md5(str(lfqa_request.api_key).encode("utf-8")).hexdigest(),
+                "inference_backend": lfqa_request.inference_backend,
+            },
+            # Prompt models only follow the device choice, their invocation layers are not quantized.
+            loader=lambda: PromptModel(
+                model_name_or_path=lfqa_request.generator_model,
+                max_length=lfqa_request.answer_max_length,
+                api_key=lfqa_request.api_key,
+                use_gpu=inference_backend.is_gpu_allowed(lfqa_request.inference_backend),
+            )
+        )
+        return prompt_model
+
     def get_llm_prompt_generator(self, lfqa_request: LFQARequest) -> PromptNode:
         lfqa_prompt = PromptTemplate(
             name="lfqa",
@@ -45,11 +103,8 @@ class GeneratorModel:
         )
 
         generator: PromptNode = PromptNode(
-            model_name_or_path=lfqa_request.generator_model,
+            model_name_or_path=self.get_prompt_model(lfqa_request=lfqa_request),
             default_prompt_template=lfqa_prompt,
-            max_length=lfqa_request.answer_max_length,
-            api_key=lfqa_request.api_key,
-            use_gpu=True,
         )
         return generator
 
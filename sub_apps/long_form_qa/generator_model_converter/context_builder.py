@@ -0,0 +1,120 @@
+from typing import Callable, List, Optional, Tuple
+
+from haystack import Document
+from transformers import PreTrainedTokenizer
+
+
+class ContextSpan:
+    def __init__(self, index_window: Optional[int], window_end: Optional[int], content: str, score: float,
+                 segment_offsets: Optional[List[int]] = None) -> None:
+        self.index_window: Optional[int] = index_window
+        self.window_end: Optional[int] = window_end
+        self.content: str = content
+        self.score: float = score
+        self.segment_offsets: Optional[List[int]] = segment_offsets
+
+
+class ContextBuilder:
+    DEFAULT_MAX_INPUT_TOKEN_COUNT: int = 512
+    MAX_TOKENIZER_INPUT_TOKEN_COUNT: int = 100000
+    MIN_TRUNCATED_SPAN_TOKEN_COUNT: int = 16
+    OVERLAP_HEAD_LENGTH: int = 32
+    CONTEXT_PLACEHOLDER: str = "{context}"
+
+    def get_max_input_token_count(self, tokenizer: PreTrainedTokenizer) -> int:
+        # Tokenizers without a configured limit report a huge sentinel instead.
+        if tokenizer.model_max_length is None or tokenizer.model_max_length > self.MAX_TOKENIZER_INPUT_TOKEN_COUNT:
+            return self.DEFAULT_MAX_INPUT_TOKEN_COUNT
+        return int(tokenizer.model_max_length)
+
+    def get_token_ids(self, tokenizer: PreTrainedTokenizer, text: str) -> List[int]:
+        return tokenizer(text, add_special_tokens=False)["input_ids"]
+
+    def merge_content(self, left_content: str, right_content: str) -> str:
+        # Fallback for windows without segment offsets, an overlapping window starts with a suffix of the span.
+        head: str = right_content[:self.OVERLAP_HEAD_LENGTH]
+        position: int = left_content.find(head, max(0, len(left_content) - len(right_content)))
+        while position != -1:
+            if right_content.startswith(left_content[position:]):
+                return left_content + right_content[len(left_content) - position:]
+            position = left_content.find(head, position + 1)
+
+        for position in range(max(0, len(left_content) - len(head) + 1), len(left_content)):
+            if right_content.startswith(left_content[position:]):
+                return left_content + right_content[len(left_content) - position:]
+
+        return f"{left_content} {right_content}"
+
+    def extend_span(self, span: ContextSpan, index_window: int, window_end: int, document: Document) -> None:
+        segment_offsets: Optional[List[int]] = document.meta.get("segment_offsets")
+        if span.segment_offsets is None or segment_offsets is None:
+            span.content = self.merge_content(span.content, document.content)
+            span.segment_offsets = None
+        else:
+            # The window repeats the span from its own first segment on, only the segments past the span are appended.
+            shift: int = span.segment_offsets[index_window - span.index_window]
+            span.content = span.content + document.content[len(span.content) - shift:]
+            span.segment_offsets.extend(
+                shift + segment_offset for segment_offset in segment_offsets[span.window_end - index_window:]
+            )
+        span.window_end = window_end
+
+    def get_spans(self, documents: List[Document]) -> List[ContextSpan]:
+        spans: List[ContextSpan] = []
+        windowed_documents: List[Tuple[int, int, Document]] = []
+        for document in documents:
+            score: float = document.score if document.score is not None else 0.0
+            if "index_window" in document.meta and "window_size" in document.meta:
+                index_window: int = int(document.meta["index_window"])
+                windowed_documents.append((index_window, index_window + int(document.meta["window_size"]), document))
+            else:
+                spans.append(ContextSpan(None, None, document.content, score))
+
+        windowed_documents.sort(key=lambda windowed_document: (windowed_document[0], -windowed_document[1]))
+        span: Optional[ContextSpan] = None
+        for index_window, window_end, document in windowed_documents:
+            score: float = document.score if document.score is not None else 0.0
+            if span is None or index_window >= span.window_end:
+                segment_offsets: Optional[List[int]] = document.meta.get("segment_offsets")
+                span = ContextSpan(
+                    index_window, window_end, document.content, score,
+                    list(segment_offsets) if segment_offsets is not None else None
+                )
+                spans.append(span)
+                continue
+
+            span.score = max(span.score, score)
+            if window_end > span.window_end:
+                self.extend_span(span, index_window, window_end, document)
+
+        spans.sort(key=lambda context_span: context_span.score, reverse=True)
+        return spans
+
+    def build(self, tokenizer: PreTrainedTokenizer, documents: List[Document], template: str, separator: str = " ",
+              transform: Optional[Callable[[str], str]] = None) -> str:
+        # Spans are tokenized one by one in score order until the budget is spent, the rest is never tokenized.
+        token_budget: int = self.get_max_input_token_count(tokenizer) \
+            - tokenizer.num_special_tokens_to_add() \
+            - len(self.get_token_ids(tokenizer, template.replace(self.CONTEXT_PLACEHOLDER, "")))
+        separator_token_count: int = len(self.get_token_ids(tokenizer, separator.strip()))
+
+        contents: List[str] = []
+        for span in self.get_spans(documents):
+            content: str = transform(span.content) if transform is not None else span.content
+            remaining_token_count: int = token_budget - (separator_token_count if len(contents) > 0 else 0)
+            if remaining_token_count <= 0:
+                break
+            token_ids: List[int] = self.get_token_ids(tokenizer, content)
+            if len(token_ids) <= remaining_token_count:
+                contents.append(content)
+                token_budget = remaining_token_count - len(token_ids)
+                continue
+
+            if remaining_token_count >= self.MIN_TRUNCATED_SPAN_TOKEN_COUNT or len(contents) == 0:
+                contents.append(tokenizer.decode(token_ids[:remaining_token_count], skip_special_tokens=True))
+            break
+
+        return template.replace(self.CONTEXT_PLACEHOLDER, separator.join(contents))
+
+
+context_builder = ContextBuilder()
@@ -5,13 +5,17 @@ from haystack import Document
 from transformers import PreTrainedTokenizer, BatchEncoding
 
 from sub_apps.long_form_qa.generator_model_converter.base_generator_model_converter import BaseGeneratorModelConverter
+from sub_apps.long_form_qa.generator_model_converter.context_builder import context_builder
 
 
 class ParrotParaphraserGeneratorModelConverter(BaseGeneratorModelConverter):
     def __call__(
             self, tokenizer: PreTrainedTokenizer, query: str, documents: List[Document], top_k: Optional[int] = None
     ) -> BatchEncoding:
-        conditioned_doc = " ".join([d.content for d in documents])
-        input_phrase = re.sub("[^a-zA-Z0-9 \?\'\-\/\:\.]", "", conditioned_doc)
-        input_phrase = f"paraphrase: {input_phrase}"
+        input_phrase = context_builder.build(
+            tokenizer=tokenizer,
+            documents=documents,
+            template=f"paraphrase: {context_builder.CONTEXT_PLACEHOLDER}",
+            transform=lambda content: re.sub("[^a-zA-Z0-9 \?\'\-\/\:\.]", "", content)
+        )
         return tokenizer(input_phrase, truncation=True, padding=True, return_tensors="pt")
@@ -4,12 +4,17 @@ from haystack import Document
 from transformers import PreTrainedTokenizer, BatchEncoding
 
 from sub_apps.long_form_qa.generator_model_converter.base_generator_model_converter import BaseGeneratorModelConverter
+from sub_apps.long_form_qa.generator_model_converter.context_builder import context_builder
 
 
 class T5LFQAGeneratorModelConverter(BaseGeneratorModelConverter):
     def __call__(
             self, tokenizer: PreTrainedTokenizer, query: str, documents: List[Document], top_k: Optional[int] = None
     ) -> BatchEncoding:
-        conditioned_doc = "<P> " + " <P> ".join([d.content for d in documents])
-        query_and_docs = "question: {} context: {}".format(query, conditioned_doc)
+        query_and_docs = context_builder.build(
+            tokenizer=tokenizer,
+            documents=documents,
+            template=f"question: {query} context: <P> {context_builder.CONTEXT_PLACEHOLDER}",
+            separator=" <P> "
+        )
         return tokenizer(query_and_docs, truncation=True, padding=True, return_tensors="pt")
@@ -1,59 +1,69 @@
+import hashlib
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 
-from haystack import Pipeline
 from haystack.nodes import BaseGenerator
 from haystack.schema import Document
 
 from models.lfqa_response import LFQAResponse
 from models.lfqa_search_request import LFQARequest
 from models.passage_search_request import PassageSearchRequest
+from models.passage_search_response import PassageSearchResponse
+from sub_apps.long_form_qa.generation_stream import GenerationStream
 from sub_apps.long_form_qa.generator_model import generator_model
 from sub_apps.passage_search.passage_search import passage_search
+from utilities.result_cache import result_cache
 
 
 class LFQA:
 
-    def get_pipeline(self, passage_search_request: PassageSearchRequest, lfqa_request: LFQARequest,
-                     documents: List[Document]) -> Pipeline:
-        generator: BaseGenerator = generator_model.get_generator(
-            lfqa_request=lfqa_request
+    def get_request_hash(self, passage_search_request: PassageSearchRequest, lfqa_request: LFQARequest) -> str:
+        passage_search_request_hash: str = passage_search.get_request_hash(
+            passage_search_request=passage_search_request
         )
+        lfqa_request_json: str = lfqa_request.json(exclude={"api_key"})
 
-        pipeline: Pipeline = passage_search.get_pipeline(
-            passage_search_request=passage_search_request,
-            documents=documents
+        return hashlib.md5(f"{passage_search_request_hash}_{lfqa_request_json}".encode("utf-8")).hexdigest()
+
+    def retrieve(self, passage_search_request: PassageSearchRequest) -> PassageSearchResponse:
+        # Ranked documents only depend on the passage search request, so passage search caches them for every generator.
+        return passage_search.search(
+            passage_search_request=passage_search_request
         )
 
-        pipeline.add_node(
-            component=generator,
-            name="Generator",
-            inputs=["Ranker"]
+    def generate(self, query: str, documents: List[Document], lfqa_request: LFQARequest) -> dict:
+        generator: BaseGenerator = generator_model.get_generator(
+            lfqa_request=lfqa_request
+        )
+        generation_result, _ = generator.run(
+            query=query,
+            documents=documents
         )
 
-        return pipeline
+        return generation_result
 
     def qa(self, passage_search_request: PassageSearchRequest, lfqa_request: LFQARequest):
         time_start: datetime = datetime.now()
 
-        window_sized_documents: List[Document] = passage_search.get_window_sized_documents(
-            passage_search_request=passage_search_request
+        lfqa_request_hash: str = self.get_request_hash(
+            passage_search_request=passage_search_request,
+            lfqa_request=lfqa_request
         )
+        cached_response: Optional[LFQAResponse] = result_cache.get("long_form_qa", lfqa_request_hash)
+        if cached_response is not None:
+            return cached_response.copy(update={
+                "process_duration": (datetime.now() - time_start).total_seconds()
+            })
 
-        pipeline: Pipeline = self.get_pipeline(
-            passage_search_request=passage_search_request,
-            lfqa_request=lfqa_request,
-            documents=window_sized_documents
+        passage_search_response: PassageSearchResponse = self.retrieve(
+            passage_search_request=passage_search_request
         )
+        time_retrieval_finish: datetime = datetime.now()
 
-        generative_qa_result: dict = pipeline.run(
+        generative_qa_result: dict = self.generate(
             query=passage_search_request.query,
-            params={
-                "DenseRetriever": {"top_k": passage_search_request.retriever_top_k},
-                "SparseRetriever": {"top_k": passage_search_request.retriever_top_k},
-                "Ranker": {"top_k": passage_search_request.ranker_top_k},
-            },
-            debug=True
+            documents=passage_search_response.retrieval_result["documents"],
+            lfqa_request=lfqa_request
         )
 
         time_finish: datetime = datetime.now()
@@ -61,10 +71,64 @@ class LFQA:
 
         response: LFQAResponse = LFQAResponse(
             generative_qa_result=generative_qa_result,
+            retrieval_result=passage_search_response.retrieval_result,
+            retrieval_duration=(time_retrieval_finish - time_start).total_seconds(),
+            node_durations=passage_search_response.node_durations,
+            generation_duration=(time_finish - time_retrieval_finish).total_seconds(),
             process_duration=time_delta.total_seconds()
         )
+        result_cache.put("long_form_qa", lfqa_request_hash, response)
 
         return response
 
+    def qa_stream(self, passage_search_request: PassageSearchRequest, lfqa_request: LFQARequest) -> GenerationStream:
+        # Iterating the stream yields answer text as it is decoded, the full response is its result afterwards.
+        # Streaming decodes greedily, so its answers are cached apart from the beam searched ones of qa.
+        time_start: datetime = datetime.now()
+
+        lfqa_request_hash: str = self.get_request_hash(
+            passage_search_request=passage_search_request,
+            lfqa_request=lfqa_request
+        )
+        cached_response: Optional[LFQAResponse] = result_cache.get("long_form_qa_stream", lfqa_request_hash)
+        if cached_response is not None:
+            return GenerationStream(
+                generator=None,
+                query=passage_search_request.query,
+                documents=cached_response.retrieval_result["documents"],
+                cached_generation_result=cached_response.generative_qa_result,
+                on_finish=lambda generation_stream: cached_response.copy(update={
+                    "process_duration": (datetime.now() - time_start).total_seconds()
+                })
+            )
+
+        passage_search_response: PassageSearchResponse = self.retrieve(
+            passage_search_request=passage_search_request
+        )
+        time_retrieval_finish: datetime = datetime.now()
+
+        def get_response(generation_stream: GenerationStream) -> LFQAResponse:
+            response: LFQAResponse = LFQAResponse(
+                generative_qa_result=generation_stream.generation_result,
+                retrieval_result=passage_search_response.retrieval_result,
+                retrieval_duration=(time_retrieval_finish - time_start).total_seconds(),
+                node_durations=passage_search_response.node_durations,
+                generation_duration=generation_stream.generation_duration,
+                time_to_first_token=generation_stream.time_to_first_token,
+                tokens_per_second=generation_stream.tokens_per_second,
+                process_duration=(datetime.now() - time_start).total_seconds()
+            )
+            result_cache.put("long_form_qa_stream", lfqa_request_hash, response)
+            return response
+
+        return GenerationStream(
+            generator=generator_model.get_generator(
+                lfqa_request=lfqa_request
+            ),
+            query=passage_search_request.query,
+            documents=passage_search_response.retrieval_result["documents"],
+            on_finish=get_response
+        )
+
 
 long_form_qa = LFQA()
@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+from typing import Tuple
+
+import faiss
+import numpy as np
+
+
+class DenseIndexDelta:
+    def __init__(self, base_key: str, base_window_indexes: np.ndarray, delta_index: faiss.Index,
+                 delta_window_indexes: np.ndarray, window_count: int) -> None:
+        # Base vectors of removed windows point to -1, added windows live in the small exact delta index.
+        self.base_key: str = base_key
+        self.base_window_indexes: np.ndarray = base_window_indexes
+        self.delta_index: faiss.Index = delta_index
+        self.delta_window_indexes: np.ndarray = delta_window_indexes
+        self.window_count: int = window_count
+
+        self.window_base_ids: np.ndarray = np.full(window_count, -1, dtype=np.int64)
+        kept_base_ids: np.ndarray = np.flatnonzero(base_window_indexes != -1)
+        self.window_base_ids[base_window_indexes[kept_base_ids]] = kept_base_ids
+        self.window_delta_ids: np.ndarray = np.full(window_count, -1, dtype=np.int64)
+        self.window_delta_ids[delta_window_indexes] = np.arange(len(delta_window_indexes))
+
+    def get_removed_count(self) -> int:
+        return int(np.sum(self.base_window_indexes == -1))
+
+    def get_vector_count(self, base_index: faiss.Index) -> int:
+        return max(base_index.ntotal, self.delta_index.ntotal)
+
+    def search(self, base_index: faiss.Index, query_embeddings: np.ndarray,
+               fetch_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        base_scores, base_ids = base_index.search(query_embeddings, min(fetch_k, base_index.ntotal))
+        base_scores, base_ids = base_scores[0], base_ids[0]
+        base_scores = base_scores[base_ids != -1]
+        base_window_indexes: np.ndarray = self.base_window_indexes[base_ids[base_ids != -1]]
+
+        scores: np.ndarray = base_scores[base_window_indexes != -1]
+        window_indexes: np.ndarray = base_window_indexes[base_window_indexes != -1]
+        if self.delta_index.ntotal > 0:
+            delta_scores, delta_ids = self.delta_index.search(query_embeddings, min(fetch_k, self.delta_index.ntotal))
+            scores = np.concatenate([scores, delta_scores[0]])
+            window_indexes = np.concatenate([window_indexes, self.delta_window_indexes[delta_ids[0]]])
+
+        order: np.ndarray = np.argsort(scores if base_index.metric_type == faiss.METRIC_L2 else -scores, kind="stable")
+        return scores[order], window_indexes[order]
+
+    def reconstruct(self, base_index: faiss.Index, window_index: int) -> np.ndarray:
+        if self.window_delta_ids[window_index] != -1:
+            return self.delta_index.reconstruct(int(self.window_delta_ids[window_index]))
+        return base_index.reconstruct(int(self.window_base_ids[window_index]))
+
+    def save(self, delta_path: Path) -> None:
+        delta_path.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(self.delta_index, str(delta_path / "delta_index"))
+        with open(delta_path / "dense_index_delta.npz", "wb") as delta_file:
+            np.savez(
+                delta_file,
+                base_window_indexes=self.base_window_indexes,
+                delta_window_indexes=self.delta_window_indexes
+            )
+        # Written last, a delta directory without it is an interrupted save and is never loaded.
+        with open(delta_path / "dense_index_delta.json", "w") as delta_config_file:
+            json.dump({"base_key": self.base_key, "window_count": self.window_count}, delta_config_file)
+
+    @staticmethod
+    def exists(delta_path: Path) -> bool:
+        return (delta_path / "dense_index_delta.json").exists()
+
+    @staticmethod
+    def load(delta_path: Path) -> "DenseIndexDelta":
+        with open(delta_path / "dense_index_delta.json", "r") as delta_config_file:
+            delta_config: dict = json.load(delta_config_file)
+        with np.load(delta_path / "dense_index_delta.npz") as delta_file:
+            base_window_indexes: np.ndarray = delta_file["base_window_indexes"]
+            delta_window_indexes: np.ndarray = delta_file["delta_window_indexes"]
+
+        return DenseIndexDelta(
+            base_key=delta_config["base_key"],
+            base_window_indexes=base_window_indexes,
+            delta_index=faiss.read_index(str(delta_path / "delta_index")),
+            delta_window_indexes=delta_window_indexes,
+            window_count=delta_config["window_count"]
+        )
@@ -0,0 +1,159 @@
+from typing import Callable, Iterator, Tuple
+
+import faiss
+import numpy as np
+
+
+class FAISSIndexTuner:
+    FLAT_MAX_VECTOR_COUNT: int = 100_000
+    IVF_FLAT_MAX_VECTOR_COUNT: int = 1_000_000
+    # FAISS warns below 39 training points per centroid, PQ needs 256 per 8-bit codebook.
+    MIN_TRAIN_POINTS_PER_CENTROID: int = 39
+    MIN_PQ_TRAIN_POINT_COUNT: int = 256
+    MAX_TRAIN_POINT_COUNT: int = 100_000
+    VECTOR_ENCODINGS: dict = {"float32": "Flat", "float16": "SQfp16", "int8": "SQ8"}
+    # Matches what FAISSDocumentStore gives its own plain HNSW index.
+    HNSW_EF_SEARCH: int = 128
+    HNSW_EF_CONSTRUCTION: int = 80
+
+    def get_ivf_list_count(self, vector_count: int) -> int:
+        return int(min(4 * np.sqrt(vector_count), vector_count // self.MIN_TRAIN_POINTS_PER_CENTROID))
+
+    def get_pq_subquantizer_count(self, embedding_dimension: int) -> int:
+        for subquantizer_count in [64, 48, 32, 16, 8, 4]:
+            # Fewer than 4 dimensions per sub-quantizer barely compresses and slows training down.
+            if embedding_dimension % subquantizer_count == 0 and embedding_dimension // subquantizer_count >= 4:
+                return subquantizer_count
+        return 1
+
+    def get_index_factory_str(self, faiss_index_type: str, vector_count: int, embedding_dimension: int,
+                              embedding_storage: str = "float32") -> str:
+        if embedding_storage not in self.VECTOR_ENCODINGS:
+            raise ValueError(f"Embedding storage {embedding_storage} is not supported.")
+        vector_encoding: str = self.VECTOR_ENCODINGS[embedding_storage]
+
+        if faiss_index_type == "auto":
+            if vector_count <= self.FLAT_MAX_VECTOR_COUNT:
+                faiss_index_type = "flat"
+            elif vector_count <= self.IVF_FLAT_MAX_VECTOR_COUNT:
+                faiss_index_type = "ivf_flat"
+            else:
+                faiss_index_type = "ivf_pq"
+
+        ivf_list_count: int = self.get_ivf_list_count(vector_count)
+        if faiss_index_type == "flat":
+            index_factory_str = vector_encoding
+        elif faiss_index_type == "hnsw":
+            # The plain "HNSW" string is built by FAISSDocumentStore itself, encoded variants go through the factory.
+            index_factory_str = "HNSW" if vector_encoding == "Flat" else f"HNSW32,{vector_encoding}"
+        elif faiss_index_type == "ivf_flat":
+            # Too few vectors to train centroids on, an exact index is as fast anyway.
+            index_factory_str = f"IVF{ivf_list_count},{vector_encoding}" if ivf_list_count >= 1 else vector_encoding
+        elif faiss_index_type == "ivf_pq":
+            # Product quantization already compresses beyond the chosen storage.
+            if ivf_list_count >= 1 and vector_count >= self.MIN_PQ_TRAIN_POINT_COUNT:
+                index_factory_str = f"IVF{ivf_list_count},PQ{self.get_pq_subquantizer_count(embedding_dimension)}"
+            else:
+                index_factory_str = vector_encoding
+        else:
+            raise ValueError(f"FAISS index type {faiss_index_type} is not supported.")
+
+        return index_factory_str
+
+    def is_ivf(self, index_factory_str: str) -> bool:
+        return index_factory_str.startswith("IVF")
+
+    def get_train_window_indexes(self, vector_count: int, index_factory_str: str) -> np.ndarray:
+        ivf_list_count: int = int(index_factory_str.split(",")[0][len("IVF"):]) if self.is_ivf(index_factory_str) else 0
+        train_point_count: int = min(
+            vector_count,
+            max(ivf_list_count * 64, self.MIN_PQ_TRAIN_POINT_COUNT * self.MIN_TRAIN_POINTS_PER_CENTROID),
+            self.MAX_TRAIN_POINT_COUNT
+        )
+        random_state: np.random.RandomState = np.random.RandomState(0)
+        return np.sort(random_state.choice(vector_count, size=train_point_count, replace=False))
+
+    def is_hnsw(self, index_factory_str: str) -> bool:
+        return index_factory_str.startswith("HNSW")
+
+    def tune(self, faiss_index: faiss.Index, index_factory_str: str) -> None:
+        # Search parameters are saved with the index, so loaded indexes keep the same recall.
+        if self.is_ivf(index_factory_str):
+            ivf_index: faiss.IndexIVF = faiss.extract_index_ivf(faiss_index)
+            ivf_index.nprobe = int(np.clip(ivf_index.nlist // 8, 8, ivf_index.nlist))
+        elif self.is_hnsw(index_factory_str):
+            # Factory built HNSW indexes otherwise keep the FAISS defaults of efSearch 16 and efConstruction 40.
+            hnsw_index: faiss.IndexHNSW = faiss.downcast_index(faiss_index)
+            hnsw_index.hnsw.efSearch = self.HNSW_EF_SEARCH
+            if hnsw_index.ntotal == 0:
+                hnsw_index.hnsw.efConstruction = self.HNSW_EF_CONSTRUCTION
+
+    def get_similarities(self, query_embeddings: np.ndarray, embeddings: np.ndarray, metric_type: int) -> np.ndarray:
+        # Higher is better for both metrics, l2 indexes compare by negative squared distance.
+        if metric_type == faiss.METRIC_L2:
+            return 2 * query_embeddings @ embeddings.T \
+                - np.sum(query_embeddings ** 2, axis=1, keepdims=True) - np.sum(embeddings ** 2, axis=1)
+        return query_embeddings @ embeddings.T
+
+    def get_index_similarities(self, faiss_index: faiss.Index, scores: np.ndarray) -> np.ndarray:
+        return -scores if faiss_index.metric_type == faiss.METRIC_L2 else scores
+
+    def get_exact_top_indexes(self, query_embeddings: np.ndarray, top_k: int,
+                              embedding_batches: Callable[[], Iterator[Tuple[int, np.ndarray]]],
+                              metric_type: int = faiss.METRIC_INNER_PRODUCT) -> np.ndarray:
+        top_scores: np.ndarray = np.full((len(query_embeddings), 0), -np.inf, dtype=np.float32)
+        top_indexes: np.ndarray = np.zeros((len(query_embeddings), 0), dtype=np.int64)
+        for batch_start, batch_embeddings in embedding_batches():
+            scores: np.ndarray = np.concatenate([
+                top_scores,
+                self.get_similarities(query_embeddings, batch_embeddings, metric_type)
+            ], axis=1)
+            batch_indexes: np.ndarray = np.arange(batch_start, batch_start + len(batch_embeddings))
+            indexes: np.ndarray = np.concatenate([
+                top_indexes,
+                np.broadcast_to(batch_indexes, (len(query_embeddings), len(batch_embeddings)))
+            ], axis=1)
+            kept: np.ndarray = np.argpartition(-scores, min(top_k, scores.shape[1]) - 1, axis=1)[:, :top_k]
+            top_scores = np.take_along_axis(scores, kept, axis=1)
+            top_indexes = np.take_along_axis(indexes, kept, axis=1)
+
+        return top_indexes
+
+    def get_recall(self, faiss_index: faiss.Index, query_embeddings: np.ndarray, top_k: int,
+                   embedding_batches: Callable[[], Iterator[Tuple[int, np.ndarray]]]) -> float:
+        # Vector ids follow window order, so exact and approximate results compare as window indexes.
+        top_k = min(top_k, faiss_index.ntotal)
+        _, approximate_top_indexes = faiss_index.search(query_embeddings, top_k)
+        exact_top_indexes: np.ndarray = self.get_exact_top_indexes(
+            query_embeddings, top_k, embedding_batches, faiss_index.metric_type
+        )
+
+        hit_counts: list = [
+            len(np.intersect1d(approximate_indexes, exact_indexes))
+            for approximate_indexes, exact_indexes in zip(approximate_top_indexes, exact_top_indexes)
+        ]
+        return float(np.mean(hit_counts) / top_k)
+
+    def get_score_drift(self, faiss_index: faiss.Index, query_embeddings: np.ndarray, top_k: int,
+                        embedding_lookup: Callable[[np.ndarray], np.ndarray]) -> float:
+        # Mean absolute gap between the index scores and full-precision scores of the same hits.
+        approximate_scores, approximate_top_indexes = faiss_index.search(
+            query_embeddings, min(top_k, faiss_index.ntotal)
+        )
+        hit_indexes: np.ndarray = np.unique(approximate_top_indexes[approximate_top_indexes != -1])
+        hit_embeddings: np.ndarray = embedding_lookup(hit_indexes)
+
+        score_drifts: list = []
+        for query_embedding, scores, indexes in zip(query_embeddings, approximate_scores, approximate_top_indexes):
+            kept: np.ndarray = indexes != -1
+            exact_scores: np.ndarray = self.get_similarities(
+                query_embedding.reshape(1, -1),
+                hit_embeddings[np.searchsorted(hit_indexes, indexes[kept])],
+                faiss_index.metric_type
+            )[0]
+            score_drifts.append(np.abs(self.get_index_similarities(faiss_index, scores[kept]) - exact_scores))
+
+        return float(np.mean(np.concatenate(score_drifts)))
+
+
+faiss_index_tuner = FAISSIndexTuner()
@@ -0,0 +1,62 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+from haystack.nodes import SentenceTransformersRanker
+from haystack.schema import Document
+
+from utilities.length_bucketer import length_bucketer
+from utilities.micro_batcher import micro_batcher
+
+
+class MicroBatchedSentenceTransformersRanker(SentenceTransformersRanker):
+
+    def get_similarity_scores(self, items: List[Tuple[str, List[str]]]) -> List[torch.Tensor]:
+        queries: List[str] = [query for query, texts in items for _ in texts]
+        texts: List[str] = [text for _, texts in items for text in texts]
+
+        batches: List[np.ndarray] = length_bucketer.get_batches(
+            length_bucketer.get_token_lengths(queries) + length_bucketer.get_token_lengths(texts)
+        )
+        batch_similarity_scores: List[torch.Tensor] = []
+        for batch in batches:
+            features = self.transformer_tokenizer(
+                [queries[index] for index in batch.tolist()],
+                [texts[index] for index in batch.tolist()],
+                padding=True,
+                truncation=True,
+                return_tensors="pt"
+            ).to(self.devices[0])
+            with torch.inference_mode():
+                batch_similarity_scores.append(self.transformer_model(**features).logits)
+
+        similarity_scores: torch.Tensor = torch.empty_like(torch.cat(batch_similarity_scores))
+        similarity_scores[torch.from_numpy(np.concatenate(batches))] = torch.cat(batch_similarity_scores)
+
+        return list(torch.split(similarity_scores, [len(texts) for _, texts in items]))
+
+    def predict(self, query: str, documents: List[Document], top_k: Optional[int] = None) -> List[Document]:
+        if top_k is None:
+            top_k = self.top_k
+        if len(documents) == 0:
+            return []
+
+        texts: List[str] = [
+            document.content
+            for document in self._add_meta_fields_to_docs(documents=documents, embed_meta_fields=self.embed_meta_fields)
+        ]
+        # Pairs from concurrent sessions on the same weights are scored together in length buckets.
+        similarity_scores: torch.Tensor = micro_batcher.submit(
+            key=f"ranker_{id(self.transformer_model)}",
+            item=(query, texts),
+            batch_function=self.get_similarity_scores
+        )
+
+        logits_dim: int = similarity_scores.shape[1]
+        sorted_scores_and_documents: list = sorted(
+            zip(similarity_scores, documents),
+            key=lambda similarity_document: similarity_document[0][-1] if logits_dim >= 2 else similarity_document[0],
+            reverse=True,
+        )
+
+        return self._add_scores_to_documents(sorted_scores_and_documents[:top_k], logits_dim)
@@ -0,0 +1,207 @@
+import copy
+import json
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import faiss
+import numpy as np
+from haystack.document_stores import FAISSDocumentStore
+from haystack.document_stores.filter_utils import LogicalFilterClause
+from haystack.schema import Document
+
+from sub_apps.passage_search.dense_index_delta import DenseIndexDelta
+from utilities.windowed_corpus import WindowedCorpus
+
+
+class PassageFAISSDocumentStore(FAISSDocumentStore):
+    windowed_corpus: Optional[WindowedCorpus] = None
+    dense_index_report: Optional[dict] = None
+    dense_index_delta: Optional[DenseIndexDelta] = None
+    # Full precision window embeddings by window index, only set on a request copy when hits are re-scored.
+    rescore_embedding_lookup: Optional[Callable[[np.ndarray], np.ndarray]] = None
+    RESCORE_CANDIDATE_FACTOR: int = 4
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Cached stores are shared between sessions, while their SQLAlchemy session is not safe to use concurrently.
+        self.query_lock: threading.Lock = threading.Lock()
+
+    def get_request_copy(self, rescore_embedding_lookup: Optional[Callable[[np.ndarray], np.ndarray]]
+                         ) -> "PassageFAISSDocumentStore":
+        # The copy shares indexes, SQL session and query lock, request state never lands on the shared store.
+        request_document_store: PassageFAISSDocumentStore = copy.copy(self)
+        request_document_store.rescore_embedding_lookup = rescore_embedding_lookup
+        return request_document_store
+
+    IVF_INDEX_FOURCC_PREFIXES: tuple = (b"Iw", b"Iv")
+
+    @staticmethod
+    def read_index(index_path: str) -> faiss.Index:
+        # Only IVF inverted lists can be mapped, flat and HNSW indexes are read into a private copy either way.
+        with open(index_path, "rb") as index_file:
+            index_fourcc: bytes = index_file.read(4)
+        if not index_fourcc.startswith(PassageFAISSDocumentStore.IVF_INDEX_FOURCC_PREFIXES):
+            return faiss.read_index(index_path)
+
+        try:
+            # Mapped inverted lists share their codes through the page cache instead of a private copy per load.
+            return faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            return faiss.read_index(index_path)
+
+    def _load_init_params_from_config(self, index_path: Union[str, Path],
+                                      config_path: Optional[Union[str, Path]] = None) -> dict:
+        with open(config_path or Path(index_path).with_suffix(".json"), "r") as config_file:
+            init_params: dict = json.load(config_file)
+
+        faiss_index: faiss.Index = self.read_index(str(index_path))
+        init_params["faiss_index"] = faiss_index
+        init_params["embedding_dim"] = faiss_index.d
+
+        return init_params
+
+    def get_hydrated_documents(self, documents: List[Document]) -> List[Document]:
+        # Window text is not stored in SQL, it is sliced back out of the windowed corpus span.
+        for document in documents:
+            document.meta = self.get_typed_meta(document.meta)
+            if document.content == "" and self.windowed_corpus is not None:
+                document.content = self.windowed_corpus.get_span_text(
+                    index_window=document.meta["index_window"],
+                    window_size=document.meta["window_size"]
+                )
+        return documents
+
+    def get_typed_meta(self, meta: dict) -> dict:
+        # The SQL backend returns every meta value as a string, numeric filters need the original integers back.
+        typed_meta: dict = {}
+        for key, value in meta.items():
+            if isinstance(value, str) and value.lstrip("-").isdigit():
+                typed_meta[key] = int(value)
+            else:
+                typed_meta[key] = value
+        return typed_meta
+
+    def query_by_embedding_from_sql(
+            self,
+            query_emb: np.ndarray,
+            filters: Optional[Dict[str, Union[Dict, List, str, int, float, bool]]] = None,
+            top_k: int = 10,
+            index: Optional[str] = None,
+            return_embedding: Optional[bool] = None,
+            headers: Optional[Dict[str, str]] = None,
+            scale_score: bool = True,
+    ) -> List[Document]:
+        if not filters:
+            with self.query_lock:
+                documents: List[Document] = super().query_by_embedding(
+                    query_emb=query_emb,
+                    top_k=top_k,
+                    index=index,
+                    return_embedding=return_embedding,
+                    headers=headers,
+                    scale_score=scale_score
+                )
+            return self.get_hydrated_documents(documents)
+
+        # FAISS cannot filter while searching, so over-fetch and filter on meta until top_k documents survive.
+        filter_clause: LogicalFilterClause = LogicalFilterClause.parse(filters)
+        vector_count: int = self.faiss_indexes[index or self.index].ntotal
+        fetch_k: int = min(top_k * 4, vector_count)
+        while True:
+            with self.query_lock:
+                documents: List[Document] = super().query_by_embedding(
+                    query_emb=query_emb,
+                    top_k=fetch_k,
+                    index=index,
+                    return_embedding=return_embedding,
+                    headers=headers,
+                    scale_score=scale_score
+                )
+
+            filtered_documents: List[Document] = []
+            for document in documents:
+                document.meta = self.get_typed_meta(document.meta)
+                if filter_clause.evaluate(document.meta):
+                    filtered_documents.append(document)
+
+            if len(filtered_documents) >= top_k or fetch_k >= vector_count:
+                return self.get_hydrated_documents(filtered_documents[:top_k])
+
+            fetch_k = min(fetch_k * 4, vector_count)
+
+    def query_by_embedding(
+            self,
+            query_emb: np.ndarray,
+            filters: Optional[Dict[str, Union[Dict, List, str, int, float, bool]]] = None,
+            top_k: int = 10,
+            index: Optional[str] = None,
+            return_embedding: Optional[bool] = None,
+            headers: Optional[Dict[str, str]] = None,
+            scale_score: bool = True,
+    ) -> List[Document]:
+        faiss_index: faiss.Index = self.faiss_indexes[index or self.index]
+        # Vector ids are window indexes when the store was written from this windowed corpus, hits then need no SQL.
+        if self.windowed_corpus is None or (
+                self.dense_index_delta is None and faiss_index.ntotal != self.windowed_corpus.get_window_count()
+        ):
+            return self.query_by_embedding_from_sql(
+                query_emb=query_emb,
+                filters=filters,
+                top_k=top_k,
+                index=index,
+                return_embedding=return_embedding,
+                headers=headers,
+                scale_score=scale_score
+            )
+
+        query_emb = query_emb.reshape(1, -1).astype(np.float32)
+        if self.similarity == "cosine":
+            self.normalize_embedding(query_emb)
+
+        candidate_k: int = top_k if self.rescore_embedding_lookup is None else top_k * self.RESCORE_CANDIDATE_FACTOR
+        filter_mask: Optional[np.ndarray] = self.windowed_corpus.get_filter_mask(filters) if filters else None
+        vector_count: int = faiss_index.ntotal if self.dense_index_delta is None else \
+            self.dense_index_delta.get_vector_count(faiss_index)
+        fetch_k: int = min(candidate_k if filter_mask is None else candidate_k * 4, vector_count)
+        while True:
+            if self.dense_index_delta is None:
+                scores, window_indexes = faiss_index.search(query_emb, fetch_k)
+                scores, window_indexes = scores[0], window_indexes[0]
+            else:
+                scores, window_indexes = self.dense_index_delta.search(faiss_index, query_emb, fetch_k)
+            kept: np.ndarray = window_indexes != -1
+            if filter_mask is not None:
+                kept &= filter_mask[np.maximum(window_indexes, 0)]
+            scores, window_indexes = scores[kept], window_indexes[kept]
+
+            if len(window_indexes) >= candidate_k or fetch_k >= vector_count:
+                break
+            fetch_k = min(fetch_k * 4, vector_count)
+
+        if self.rescore_embedding_lookup is not None and len(window_indexes) > 0:
+            # Quantized scores only pick the candidates, their order comes from the full precision embeddings.
+            window_indexes = window_indexes[:candidate_k]
+            rescore_embeddings: np.ndarray = self.rescore_embedding_lookup(window_indexes)
+            if self.similarity == "l2":
+                # Higher is better after re-scoring, so l2 candidates are ranked by negative squared distance.
+                scores = -np.sum((rescore_embeddings - query_emb[0]) ** 2, axis=1)
+            else:
+                scores = rescore_embeddings @ query_emb[0]
+            order: np.ndarray = np.argsort(-scores, kind="stable")
+            scores, window_indexes = scores[order], window_indexes[order]
+
+        # Embeddings only travel with results when a caller asks for them explicitly.
+        documents: List[Document] = []
+        for window_index, score in zip(window_indexes[:top_k].tolist(), scores[:top_k].tolist()):
+            embedding: Optional[np.ndarray] = None
+            if return_embedding is True:
+                embedding = faiss_index.reconstruct(window_index) if self.dense_index_delta is None else \
+                    self.dense_index_delta.reconstruct(faiss_index, window_index)
+            documents.append(self.windowed_corpus.get_document(
+                window_index,
+                score=self.scale_to_unit_interval(score, self.similarity) if scale_score else score,
+                embedding=embedding
+            ))
+
+        return documents
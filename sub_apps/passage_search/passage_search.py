@@ -1,115 +1,696 @@
 import hashlib
+import json
 import os
 from datetime import datetime, timedelta
-from typing import List
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
 
+import faiss
+import numpy as np
 from haystack import Pipeline
-from haystack.document_stores import FAISSDocumentStore, InMemoryDocumentStore
 from haystack.nodes import BaseRetriever, JoinDocuments, BaseRanker
 from haystack.schema import Document
 
 from models.passage_search_request import PassageSearchRequest
 from models.passage_search_response import PassageSearchResponse
+from sub_apps.passage_search.dense_index_delta import DenseIndexDelta
+from sub_apps.passage_search.faiss_index_tuner import faiss_index_tuner
+from sub_apps.passage_search.passage_faiss_document_store import PassageFAISSDocumentStore
 from sub_apps.passage_search.ranker_model import ranker_model
 from sub_apps.passage_search.retriever_model import retriever_model
+from sub_apps.passage_search.search_statistics import search_statistics
+from sub_apps.passage_search.sparse_index import SparseIndex, sparse_indexer
 from utilities import locker
+from utilities.background_job import BackgroundJob, background_job_runner
+from utilities.concurrent_pipeline import pipeline_executor
 from utilities.document_processor import document_processor
+from utilities.embedding_cache import embedding_cache
+from utilities.fingerprint import fingerprint
+from utilities.inference_backend import inference_backend
+from utilities.length_bucketer import length_bucketer
+from utilities.lru_cache import LRUCache
+from utilities.result_cache import result_cache
+from utilities.segment_cache import segment_cache
+from utilities.storage_manager import storage_manager
+from utilities.window_differ import window_differ
+from utilities.windowed_corpus import WindowedCorpus
 
 
 class PassageSearch:
+    # Beyond this share of added windows a full rebuild is cheaper to query than base plus delta.
+    DELTA_MAX_WINDOW_FRACTION: float = 0.25
 
-    def get_window_sized_documents(self, passage_search_request: PassageSearchRequest) -> List[Document]:
-        window_sized_documents: List[Document] = document_processor.process(
+    def __init__(self, dense_index_cache_max_bytes: int, index_build_chunk_size: int) -> None:
+        self.dense_index_cache: LRUCache = LRUCache(max_bytes=dense_index_cache_max_bytes)
+        self.index_build_chunk_size: int = index_build_chunk_size
+        storage_manager.add_eviction_listener("dense_index", self.dense_index_cache.pop)
+
+    def get_window_token_budget(self, passage_search_request: PassageSearchRequest) -> Optional[int]:
+        if passage_search_request.token_budget_window_stride is None:
+            return None
+
+        retriever: BaseRetriever = retriever_model.get_dense_retriever(
+            document_store=None,
+            passage_search_request=passage_search_request,
+        )
+        max_seq_len: int = getattr(retriever, "max_seq_len_passage", getattr(retriever, "max_seq_len", 512))
+
+        # Leaves room for the special tokens the passage encoder adds around the text.
+        return max_seq_len - 2
+
+    def get_windowed_corpus(self, passage_search_request: PassageSearchRequest) -> WindowedCorpus:
+        window_strides: Optional[List[int]] = None
+        if passage_search_request.window_strides not in [None, ""]:
+            window_strides = list(map(int, passage_search_request.window_strides.split(" ")))
+
+        windowed_corpus: WindowedCorpus = document_processor.process(
             corpus=passage_search_request.corpus,
             corpus_source_type=passage_search_request.corpus_source_type,
             granularity=passage_search_request.granularity,
-            window_sizes=list(map(int, passage_search_request.window_sizes.split(" ")))
+            window_sizes=list(map(int, passage_search_request.window_sizes.split(" "))),
+            window_strides=window_strides,
+            window_token_budget=self.get_window_token_budget(
+                passage_search_request=passage_search_request
+            ),
+            token_budget_window_stride=passage_search_request.token_budget_window_stride
         )
 
-        return window_sized_documents
+        return windowed_corpus
 
-    def get_document_store_index_hash(self, passage_search_request: PassageSearchRequest) -> str:
-        corpus_hash: str = hashlib.md5(passage_search_request.corpus.encode("utf-8")).hexdigest()
-        window_sizes_hash: str = hashlib.md5(passage_search_request.window_sizes.encode("utf-8")).hexdigest()
-        embedding_model_hash = hashlib.md5(str(passage_search_request.embedding_model).encode("utf-8")).hexdigest()
+    def get_window_config(self, passage_search_request: PassageSearchRequest) -> str:
+        return f"{passage_search_request.granularity}_{passage_search_request.window_sizes}_" \
+               f"{passage_search_request.window_strides}_{passage_search_request.token_budget_window_stride}_" \
+               f"{self.get_window_token_budget(passage_search_request=passage_search_request)}"
 
-        document_store_index_hash: str = f"{embedding_model_hash}_{corpus_hash}_{window_sizes_hash}"
+    def get_dense_index_config(self, passage_search_request: PassageSearchRequest) -> str:
+        # Re-scoring only changes how a query reads the index, so it is left out of the index identity.
+        return f"{passage_search_request.embedding_model}_{passage_search_request.faiss_index_type}_" \
+               f"{passage_search_request.embedding_storage}" \
+               f"{inference_backend.get_precision_suffix(passage_search_request.inference_backend)}"
 
-        return document_store_index_hash
+    def get_corpus_windows_hash(self, passage_search_request: PassageSearchRequest) -> str:
+        corpus_hash: str = hashlib.md5(fingerprint.get_corpus_hash(
+            corpus=passage_search_request.corpus,
+            corpus_source_type=passage_search_request.corpus_source_type
+        ).encode("utf-8")).hexdigest()
+        window_sizes_hash: str = hashlib.md5(
+            self.get_window_config(passage_search_request=passage_search_request).encode("utf-8")
+        ).hexdigest()
 
-    @locker.wait_lock
-    def get_dense_retriever(self, passage_search_request: PassageSearchRequest,
-                            documents: List[Document]) -> BaseRetriever:
-        document_store_index_hash: str = self.get_document_store_index_hash(
+        corpus_windows_hash: str = f"{corpus_hash}_{window_sizes_hash}"
+
+        return corpus_windows_hash
+
+    def get_document_store_index_hash(self, passage_search_request: PassageSearchRequest) -> str:
+        corpus_windows_hash: str = self.get_corpus_windows_hash(
             passage_search_request=passage_search_request
         )
-        faiss_index_path: str = f"document_store/faiss_index_{document_store_index_hash}"
-        faiss_config_path: str = f"document_store/faiss_config_{document_store_index_hash}"
+        embedding_model_hash = hashlib.md5(
+            self.get_dense_index_config(passage_search_request=passage_search_request).encode("utf-8")
+        ).hexdigest()
+
+        document_store_index_hash: str = f"{embedding_model_hash}_{corpus_windows_hash}"
 
-        if all(map(os.path.exists, [faiss_index_path, faiss_config_path])):
-            document_store: FAISSDocumentStore = FAISSDocumentStore.load(
-                index_path=faiss_index_path,
-                config_path=faiss_config_path,
+        return document_store_index_hash
+
+    def get_sparse_lineage_key(self, passage_search_request: PassageSearchRequest) -> str:
+        # Successive versions of one corpus share a lineage, web pages by url, pasted text and uploads by their id.
+        # Without an id a corpus only lineages with itself, unrelated documents are never diffed as versions.
+        if passage_search_request.corpus_source_type == "web":
+            corpus_lineage: str = passage_search_request.corpus
+        elif passage_search_request.corpus_id not in [None, ""]:
+            corpus_lineage: str = f"id:{passage_search_request.corpus_id}"
+        else:
+            corpus_lineage: str = fingerprint.get_corpus_hash(
+                corpus=passage_search_request.corpus,
+                corpus_source_type=passage_search_request.corpus_source_type
             )
-            retriever: BaseRetriever = retriever_model.get_dense_retriever(
-                document_store=document_store,
+        return hashlib.md5(
+            f"{passage_search_request.corpus_source_type}_{corpus_lineage}_"
+            f"{self.get_window_config(passage_search_request=passage_search_request)}".encode("utf-8")
+        ).hexdigest()
+
+    def get_dense_lineage_key(self, passage_search_request: PassageSearchRequest) -> str:
+        return hashlib.md5(
+            f"{self.get_sparse_lineage_key(passage_search_request=passage_search_request)}_"
+            f"{self.get_dense_index_config(passage_search_request=passage_search_request)}".encode("utf-8")
+        ).hexdigest()
+
+    def get_previous_window_layout_path(self, kind: str, lineage_key: str) -> Optional[Path]:
+        previous_artifact: Optional[dict] = storage_manager.find_artifact(kind, {"lineage_key": lineage_key})
+        if previous_artifact is None:
+            return None
+
+        window_layout_path: Path = storage_manager.get_artifact_path(kind, previous_artifact["key"]) / \
+            "window_layout.npz"
+        return window_layout_path if window_layout_path.exists() else None
+
+    def get_request_hash(self, passage_search_request: PassageSearchRequest) -> str:
+        corpus_hash: str = fingerprint.get_corpus_hash(
+            corpus=passage_search_request.corpus,
+            corpus_source_type=passage_search_request.corpus_source_type
+        )
+        passage_search_request_json: str = passage_search_request.copy(
+            update={"corpus": corpus_hash}
+        ).json(exclude={"api_key", "corpus_id"})
+
+        return hashlib.md5(passage_search_request_json.encode("utf-8")).hexdigest()
+
+    def get_filters(self, passage_search_request: PassageSearchRequest) -> Optional[dict]:
+        filters: dict = {}
+        if passage_search_request.start_page is not None:
+            filters["page_start"] = {"$gte": passage_search_request.start_page}
+        if passage_search_request.end_page is not None:
+            filters["page_end"] = {"$lte": passage_search_request.end_page}
+
+        return filters if len(filters) > 0 else None
+
+    def embed_texts(self, retriever: BaseRetriever, texts: List[str]) -> np.ndarray:
+        # Windows of every size are interleaved in corpus order, length buckets keep padding per batch small.
+        batches: List[np.ndarray] = length_bucketer.get_batches(length_bucketer.get_token_lengths(texts))
+        batch_embeddings: List[np.ndarray] = [
+            retriever.embed_documents([Document(content=texts[index]) for index in batch.tolist()])
+            for batch in batches
+        ]
+
+        return length_bucketer.scatter(batches, batch_embeddings)
+
+    def get_window_embedding_batches(self, passage_search_request: PassageSearchRequest, retriever: BaseRetriever,
+                                     windowed_corpus: WindowedCorpus, window_indexes: Optional[np.ndarray] = None,
+                                     normalize: bool = False,
+                                     batch_size: int = 10000) -> Iterator[Tuple[int, np.ndarray]]:
+        embedding_cache_namespace_key: str = embedding_cache.get_namespace_key(
+            model_type=passage_search_request.dense_retriever,
+            model_name=f"{passage_search_request.embedding_model.passage_model}"
+                       f"{inference_backend.get_precision_suffix(passage_search_request.inference_backend)}"
+        )
+        if window_indexes is None:
+            window_indexes = np.arange(windowed_corpus.get_window_count())
+
+        # Window text is only materialized one batch at a time for embedding.
+        for batch_start in range(0, len(window_indexes), batch_size):
+            batch_window_indexes: np.ndarray = window_indexes[batch_start:batch_start + batch_size]
+            embeddings: np.ndarray = embedding_cache.get_embeddings(
+                namespace_key=embedding_cache_namespace_key,
+                texts=windowed_corpus.get_window_texts(batch_window_indexes.tolist()),
+                embedder=lambda texts: self.embed_texts(retriever=retriever, texts=texts)
+            ).astype(np.float32)
+            if normalize:
+                embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+            yield batch_start, embeddings
+
+    def get_window_embedding_lookup(self, passage_search_request: PassageSearchRequest, retriever: BaseRetriever,
+                                    windowed_corpus: WindowedCorpus) -> Callable[[np.ndarray], np.ndarray]:
+        return lambda window_indexes: np.concatenate([
+            embeddings
+            for _, embeddings in self.get_window_embedding_batches(
                 passage_search_request=passage_search_request,
+                retriever=retriever,
+                windowed_corpus=windowed_corpus,
+                window_indexes=window_indexes,
+                normalize=passage_search_request.similarity_function == "cosine"
             )
-        else:
-            document_store: FAISSDocumentStore = FAISSDocumentStore(
-                sql_url="sqlite:///document_store/document_store.db",
-                index=document_store_index_hash,
-                embedding_dim=passage_search_request.embedding_dimension,
-                return_embedding=True,
-                similarity=passage_search_request.similarity_function,
-                duplicate_documents="skip",
+        ])
+
+    def get_rescore_embedding_lookup(self, passage_search_request: PassageSearchRequest,
+                                     windowed_corpus: WindowedCorpus) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+        if passage_search_request.embedding_rescore is not True:
+            return None
+
+        # Candidate embeddings come from the embedding cache, the encoder only runs for evicted windows.
+        retriever: BaseRetriever = retriever_model.get_dense_retriever(
+            document_store=None,
+            passage_search_request=passage_search_request,
+        )
+        return self.get_window_embedding_lookup(
+            passage_search_request=passage_search_request,
+            retriever=retriever,
+            windowed_corpus=windowed_corpus
+        )
+
+    def write_embedded_documents(self, passage_search_request: PassageSearchRequest, retriever: BaseRetriever,
+                                 document_store: PassageFAISSDocumentStore, windowed_corpus: WindowedCorpus) -> None:
+        # Each chunk lands in the embedding cache before the next one starts, a rerun replays finished chunks from it.
+        build_job: Optional[BackgroundJob] = background_job_runner.get_current_job()
+        if build_job is not None:
+            build_job.set_total(windowed_corpus.get_window_count())
+        # SQL receives empty contents, the store hydrates them from the windowed corpus.
+        for batch_start, embeddings in self.get_window_embedding_batches(
+                passage_search_request=passage_search_request,
+                retriever=retriever,
+                windowed_corpus=windowed_corpus,
+                batch_size=self.index_build_chunk_size
+        ):
+            document_store.write_documents([
+                windowed_corpus.get_document(batch_start + index, with_content=False, embedding=embedding)
+                for index, embedding in enumerate(embeddings)
+            ])
+            if build_job is not None:
+                build_job.advance(len(embeddings))
+
+    def train_dense_index(self, passage_search_request: PassageSearchRequest, retriever: BaseRetriever,
+                          document_store: PassageFAISSDocumentStore, windowed_corpus: WindowedCorpus) -> None:
+        # IVF centroids are trained on a sample, the sampled embeddings stay cached for the full write.
+        train_window_indexes: np.ndarray = faiss_index_tuner.get_train_window_indexes(
+            vector_count=windowed_corpus.get_window_count(),
+            index_factory_str=document_store.faiss_index_factory_str
+        )
+        train_embeddings: np.ndarray = np.concatenate([
+            embeddings
+            for _, embeddings in self.get_window_embedding_batches(
+                passage_search_request=passage_search_request,
+                retriever=retriever,
+                windowed_corpus=windowed_corpus,
+                window_indexes=train_window_indexes,
+                normalize=passage_search_request.similarity_function == "cosine"
             )
+        ])
+        document_store.train_index(embeddings=train_embeddings)
 
-            retriever: BaseRetriever = retriever_model.get_dense_retriever(
-                document_store=document_store,
+    def get_dense_index_report(self, passage_search_request: PassageSearchRequest, retriever: BaseRetriever,
+                               document_store: PassageFAISSDocumentStore, windowed_corpus: WindowedCorpus,
+                               faiss_index_path: str, query_count: int = 100) -> dict:
+        float32_bytes: int = windowed_corpus.get_window_count() * passage_search_request.embedding_dimension * 4
+        dense_index_report: dict = {
+            "faiss_index_factory_str": document_store.faiss_index_factory_str,
+            "embedding_storage": passage_search_request.embedding_storage or "float32",
+            "vector_count": windowed_corpus.get_window_count(),
+            "recall_at_k": 1.0,
+            "k": int(passage_search_request.retriever_top_k),
+            "score_drift": 0.0,
+            "index_bytes": os.path.getsize(faiss_index_path),
+            "float32_bytes": float32_bytes,
+            "saved_bytes": float32_bytes - os.path.getsize(faiss_index_path),
+        }
+        if document_store.faiss_index_factory_str == "Flat" or windowed_corpus.get_window_count() == 0:
+            return dense_index_report
+
+        # Window embeddings stand in for queries, they come from the same encoder distribution and are cached.
+        random_state: np.random.RandomState = np.random.RandomState(1)
+        query_window_indexes: np.ndarray = np.sort(random_state.choice(
+            windowed_corpus.get_window_count(),
+            size=min(query_count, windowed_corpus.get_window_count()),
+            replace=False
+        ))
+        normalize: bool = passage_search_request.similarity_function == "cosine"
+        query_embeddings: np.ndarray = np.concatenate([
+            embeddings
+            for _, embeddings in self.get_window_embedding_batches(
+                passage_search_request=passage_search_request,
+                retriever=retriever,
+                windowed_corpus=windowed_corpus,
+                window_indexes=query_window_indexes,
+                normalize=normalize
+            )
+        ])
+        dense_index_report["recall_at_k"] = faiss_index_tuner.get_recall(
+            faiss_index=document_store.faiss_indexes[document_store.index],
+            query_embeddings=query_embeddings,
+            top_k=dense_index_report["k"],
+            embedding_batches=lambda: self.get_window_embedding_batches(
                 passage_search_request=passage_search_request,
+                retriever=retriever,
+                windowed_corpus=windowed_corpus,
+                normalize=normalize
             )
-            document_store.write_documents(documents)
-            document_store.update_embeddings(retriever)
-            document_store.save(faiss_index_path, faiss_config_path)
+        )
+        dense_index_report["score_drift"] = faiss_index_tuner.get_score_drift(
+            faiss_index=document_store.faiss_indexes[document_store.index],
+            query_embeddings=query_embeddings,
+            top_k=dense_index_report["k"],
+            embedding_lookup=self.get_window_embedding_lookup(
+                passage_search_request=passage_search_request,
+                retriever=retriever,
+                windowed_corpus=windowed_corpus
+            )
+        )
 
-        return retriever
+        return dense_index_report
 
-    def get_sparse_retriever(self, passage_search_request: PassageSearchRequest,
-                             documents: List[Document]) -> BaseRetriever:
-        document_store_index_hash: str = self.get_document_store_index_hash(
-            passage_search_request=passage_search_request
+    def load_dense_document_store(self, passage_search_request: PassageSearchRequest, windowed_corpus: WindowedCorpus,
+                                  document_store_index_hash: str) -> Optional[PassageFAISSDocumentStore]:
+        dense_index_path: Path = storage_manager.get_artifact_path("dense_index", document_store_index_hash)
+        dense_index_delta: Optional[DenseIndexDelta] = None
+        if DenseIndexDelta.exists(dense_index_path):
+            dense_index_delta = DenseIndexDelta.load(dense_index_path)
+            base_index_path: Path = storage_manager.get_artifact_path("dense_index", dense_index_delta.base_key)
+        else:
+            base_index_path: Path = dense_index_path
+
+        if not all(map(os.path.exists, [base_index_path / "faiss_index", base_index_path / "faiss_config"])):
+            return None
+
+        document_store: PassageFAISSDocumentStore = PassageFAISSDocumentStore.load(
+            index_path=str(base_index_path / "faiss_index"),
+            config_path=str(base_index_path / "faiss_config"),
         )
+        document_store.windowed_corpus = windowed_corpus
+        document_store.dense_index_delta = dense_index_delta
+        if os.path.exists(dense_index_path / "faiss_report"):
+            with open(dense_index_path / "faiss_report", "r") as faiss_report_file:
+                document_store.dense_index_report = json.load(faiss_report_file)
+        if dense_index_delta is not None:
+            storage_manager.touch("dense_index", dense_index_delta.base_key)
+
+        return document_store
 
-        document_store: InMemoryDocumentStore = InMemoryDocumentStore(
+    def build_dense_document_store(self, passage_search_request: PassageSearchRequest,
+                                   windowed_corpus: WindowedCorpus,
+                                   document_store_index_hash: str) -> PassageFAISSDocumentStore:
+        dense_index_path: Path = storage_manager.get_artifact_path("dense_index", document_store_index_hash)
+        faiss_index_path: str = str(dense_index_path / "faiss_index")
+        document_store: PassageFAISSDocumentStore = PassageFAISSDocumentStore(
+            sql_url=storage_manager.get_sqlite_url("dense_index", document_store_index_hash),
             index=document_store_index_hash,
             embedding_dim=passage_search_request.embedding_dimension,
-            return_embedding=True,
+            faiss_index_factory_str=faiss_index_tuner.get_index_factory_str(
+                faiss_index_type=passage_search_request.faiss_index_type or "flat",
+                vector_count=windowed_corpus.get_window_count(),
+                embedding_dimension=passage_search_request.embedding_dimension,
+                embedding_storage=passage_search_request.embedding_storage or "float32"
+            ),
+            n_links=32,
+            ef_search=128,
+            return_embedding=False,
             similarity=passage_search_request.similarity_function,
             duplicate_documents="skip",
-            use_bm25=True
         )
-        retriever: BaseRetriever = retriever_model.get_sparse_retriever(
+        document_store.windowed_corpus = windowed_corpus
+        faiss_index_tuner.tune(
+            faiss_index=document_store.faiss_indexes[document_store.index],
+            index_factory_str=document_store.faiss_index_factory_str
+        )
+
+        retriever: BaseRetriever = retriever_model.get_dense_retriever(
             document_store=document_store,
             passage_search_request=passage_search_request,
         )
-        document_store.write_documents(documents)
+        # IVF centroids and int8 value ranges are both learned before any vector is added.
+        if not document_store.faiss_indexes[document_store.index].is_trained:
+            self.train_dense_index(
+                passage_search_request=passage_search_request,
+                retriever=retriever,
+                document_store=document_store,
+                windowed_corpus=windowed_corpus
+            )
+        self.write_embedded_documents(
+            passage_search_request=passage_search_request,
+            retriever=retriever,
+            document_store=document_store,
+            windowed_corpus=windowed_corpus
+        )
+        document_store.save(faiss_index_path, str(dense_index_path / "faiss_config"))
+        document_store.dense_index_report = self.get_dense_index_report(
+            passage_search_request=passage_search_request,
+            retriever=retriever,
+            document_store=document_store,
+            windowed_corpus=windowed_corpus,
+            faiss_index_path=faiss_index_path
+        )
+
+        return document_store
+
+    def build_dense_document_store_delta(self, passage_search_request: PassageSearchRequest,
+                                         windowed_corpus: WindowedCorpus,
+                                         document_store_index_hash: str) -> Optional[PassageFAISSDocumentStore]:
+        previous_window_layout_path: Optional[Path] = self.get_previous_window_layout_path(
+            kind="dense_index",
+            lineage_key=self.get_dense_lineage_key(passage_search_request=passage_search_request)
+        )
+        if previous_window_layout_path is None or windowed_corpus.get_window_count() == 0:
+            return None
+
+        previous_window_layout: dict = window_differ.load_layout(previous_window_layout_path)
+        window_mapping: np.ndarray = window_differ.get_window_mapping(
+            old_layout=previous_window_layout,
+            new_layout=window_differ.get_layout(windowed_corpus)
+        )
+        # Chained edits stay relative to the last full index, kept windows resolve through the previous delta.
+        if DenseIndexDelta.exists(previous_window_layout_path.parent):
+            previous_delta: DenseIndexDelta = DenseIndexDelta.load(previous_window_layout_path.parent)
+            base_key: str = previous_delta.base_key
+            previous_window_base_ids: np.ndarray = previous_delta.window_base_ids
+            base_vector_count: int = len(previous_delta.base_window_indexes)
+        else:
+            base_key: str = previous_window_layout_path.parent.name
+            previous_window_base_ids: np.ndarray = np.arange(len(previous_window_layout["window_starts"]))
+            base_vector_count: int = len(previous_window_base_ids)
+        base_index_path: Path = storage_manager.get_artifact_path("dense_index", base_key)
+        if base_vector_count == 0 or not all(map(os.path.exists, [
+            base_index_path / "faiss_index", base_index_path / "faiss_config"
+        ])):
+            return None
+
+        window_base_ids: np.ndarray = np.where(
+            window_mapping != -1, previous_window_base_ids[np.maximum(window_mapping, 0)], -1
+        )
+        added_window_indexes: np.ndarray = np.flatnonzero(window_base_ids == -1)
+        if len(added_window_indexes) > self.DELTA_MAX_WINDOW_FRACTION * windowed_corpus.get_window_count():
+            return None
+
+        base_window_indexes: np.ndarray = np.full(base_vector_count, -1, dtype=np.int64)
+        kept_window_indexes: np.ndarray = np.flatnonzero(window_base_ids != -1)
+        base_window_indexes[window_base_ids[kept_window_indexes]] = kept_window_indexes
+
+        # Only added windows are embedded, the delta is small enough to search exactly.
+        delta_index: faiss.Index = faiss.IndexFlat(
+            passage_search_request.embedding_dimension,
+            faiss.METRIC_L2 if passage_search_request.similarity_function == "l2" else faiss.METRIC_INNER_PRODUCT
+        )
+        retriever: BaseRetriever = retriever_model.get_dense_retriever(
+            document_store=None,
+            passage_search_request=passage_search_request,
+        )
+        build_job: Optional[BackgroundJob] = background_job_runner.get_current_job()
+        if build_job is not None:
+            build_job.set_total(len(added_window_indexes))
+        for _, embeddings in self.get_window_embedding_batches(
+                passage_search_request=passage_search_request,
+                retriever=retriever,
+                windowed_corpus=windowed_corpus,
+                window_indexes=added_window_indexes,
+                normalize=passage_search_request.similarity_function == "cosine",
+                batch_size=self.index_build_chunk_size
+        ):
+            delta_index.add(embeddings)
+            if build_job is not None:
+                build_job.advance(len(embeddings))
+
+        dense_index_delta: DenseIndexDelta = DenseIndexDelta(
+            base_key=base_key,
+            base_window_indexes=base_window_indexes,
+            delta_index=delta_index,
+            delta_window_indexes=added_window_indexes,
+            window_count=windowed_corpus.get_window_count()
+        )
+        dense_index_delta.save(storage_manager.get_artifact_path("dense_index", document_store_index_hash))
+
+        document_store: Optional[PassageFAISSDocumentStore] = self.load_dense_document_store(
+            passage_search_request=passage_search_request,
+            windowed_corpus=windowed_corpus,
+            document_store_index_hash=document_store_index_hash
+        )
+        base_report: dict = {}
+        if (base_index_path / "faiss_report").exists():
+            with open(base_index_path / "faiss_report", "r") as base_report_file:
+                base_report = json.load(base_report_file)
+        document_store.dense_index_report = {
+            **base_report,
+            "vector_count": windowed_corpus.get_window_count(),
+            "base_key": base_key,
+            "delta_vector_count": len(added_window_indexes),
+            "removed_vector_count": dense_index_delta.get_removed_count(),
+        }
+
+        return document_store
+
+    @locker.single_flight(
+        key=lambda self, passage_search_request, windowed_corpus: self.get_document_store_index_hash(
+            passage_search_request=passage_search_request
+        )
+    )
+    def get_dense_document_store(self, passage_search_request: PassageSearchRequest,
+                                 windowed_corpus: WindowedCorpus) -> PassageFAISSDocumentStore:
+        document_store_index_hash: str = self.get_document_store_index_hash(
+            passage_search_request=passage_search_request
+        )
+        dense_index_path: Path = storage_manager.get_artifact_path("dense_index", document_store_index_hash)
+
+        document_store: Optional[PassageFAISSDocumentStore] = self.dense_index_cache.get(document_store_index_hash)
+        if document_store is not None:
+            storage_manager.touch("dense_index", document_store_index_hash)
+            return document_store
+
+        document_store = self.load_dense_document_store(
+            passage_search_request=passage_search_request,
+            windowed_corpus=windowed_corpus,
+            document_store_index_hash=document_store_index_hash
+        )
+        if document_store is not None:
+            storage_manager.touch("dense_index", document_store_index_hash)
+        else:
+            # Leftovers of an interrupted build, or a delta whose base was evicted, are built again.
+            if dense_index_path.exists():
+                storage_manager.delete("dense_index", document_store_index_hash)
+            document_store = self.build_dense_document_store_delta(
+                passage_search_request=passage_search_request,
+                windowed_corpus=windowed_corpus,
+                document_store_index_hash=document_store_index_hash
+            )
+            if document_store is None:
+                document_store = self.build_dense_document_store(
+                    passage_search_request=passage_search_request,
+                    windowed_corpus=windowed_corpus,
+                    document_store_index_hash=document_store_index_hash
+                )
+            with open(dense_index_path / "faiss_report", "w") as faiss_report_file:
+                json.dump(document_store.dense_index_report, faiss_report_file)
+            window_differ.save_layout(
+                window_differ.get_layout(windowed_corpus),
+                dense_index_path / "window_layout.npz"
+            )
+            storage_manager.register(
+                "dense_index",
+                document_store_index_hash,
+                metadata={"lineage_key": self.get_dense_lineage_key(passage_search_request=passage_search_request)}
+            )
+
+        # Sized by the saved indexes, which is what a mapped index keeps in the page cache.
+        if document_store.dense_index_delta is None:
+            index_bytes: int = os.path.getsize(dense_index_path / "faiss_index")
+        else:
+            index_bytes: int = os.path.getsize(dense_index_path / "delta_index") + os.path.getsize(
+                storage_manager.get_artifact_path("dense_index", document_store.dense_index_delta.base_key) /
+                "faiss_index"
+            )
+        self.dense_index_cache.put(document_store_index_hash, document_store, index_bytes)
+
+        return document_store
+
+    def get_dense_retriever(self, passage_search_request: PassageSearchRequest,
+                            windowed_corpus: WindowedCorpus) -> BaseRetriever:
+        # Sessions on the same index share one store, the retriever and its rescoring model stay per request.
+        document_store: PassageFAISSDocumentStore = self.get_dense_document_store(
+            passage_search_request=passage_search_request,
+            windowed_corpus=windowed_corpus
+        )
+        retriever: BaseRetriever = retriever_model.get_dense_retriever(
+            document_store=document_store.get_request_copy(
+                rescore_embedding_lookup=self.get_rescore_embedding_lookup(
+                    passage_search_request=passage_search_request,
+                    windowed_corpus=windowed_corpus
+                )
+            ),
+            passage_search_request=passage_search_request,
+        )
 
         return retriever
 
+    @locker.single_flight(
+        key=lambda self, passage_search_request, windowed_corpus: self.get_corpus_windows_hash(
+            passage_search_request=passage_search_request
+        )
+    )
+    def get_sparse_index(self, passage_search_request: PassageSearchRequest,
+                         windowed_corpus: WindowedCorpus) -> SparseIndex:
+        corpus_windows_hash: str = self.get_corpus_windows_hash(passage_search_request=passage_search_request)
+        sparse_index_path: Path = storage_manager.get_artifact_path("sparse_index", corpus_windows_hash)
+
+        if sparse_index_path.exists():
+            sparse_index: SparseIndex = sparse_indexer.load(sparse_index_path)
+            storage_manager.touch("sparse_index", corpus_windows_hash)
+        else:
+            sparse_lineage_key: str = self.get_sparse_lineage_key(passage_search_request=passage_search_request)
+            window_layout: dict = window_differ.get_layout(windowed_corpus)
+            previous_window_layout_path: Optional[Path] = self.get_previous_window_layout_path(
+                kind="sparse_index",
+                lineage_key=sparse_lineage_key
+            )
+            if previous_window_layout_path is not None:
+                sparse_index: SparseIndex = sparse_indexer.update(
+                    sparse_index=sparse_indexer.load(previous_window_layout_path.parent),
+                    windowed_corpus=windowed_corpus,
+                    window_mapping=window_differ.get_window_mapping(
+                        old_layout=window_differ.load_layout(previous_window_layout_path),
+                        new_layout=window_layout
+                    )
+                )
+            else:
+                sparse_index: SparseIndex = sparse_indexer.build(windowed_corpus)
+            sparse_indexer.save(sparse_index, sparse_index_path)
+            window_differ.save_layout(window_layout, sparse_index_path / "window_layout.npz")
+            storage_manager.register("sparse_index", corpus_windows_hash, metadata={"lineage_key": sparse_lineage_key})
+
+        return sparse_index
+
+    def get_sparse_retriever(self, passage_search_request: PassageSearchRequest,
+                             windowed_corpus: WindowedCorpus) -> BaseRetriever:
+        sparse_index: SparseIndex = self.get_sparse_index(
+            passage_search_request=passage_search_request,
+            windowed_corpus=windowed_corpus
+        )
+        retriever: BaseRetriever = retriever_model.get_sparse_retriever(
+            sparse_index=sparse_index,
+            windowed_corpus=windowed_corpus,
+            passage_search_request=passage_search_request,
+        )
+
+        return retriever
+
+    def build_indexes(self, passage_search_request: PassageSearchRequest) -> None:
+        windowed_corpus: WindowedCorpus = self.get_windowed_corpus(
+            passage_search_request=passage_search_request
+        )
+        self.get_dense_document_store(
+            passage_search_request=passage_search_request,
+            windowed_corpus=windowed_corpus
+        )
+        self.get_sparse_index(
+            passage_search_request=passage_search_request,
+            windowed_corpus=windowed_corpus
+        )
+
+    def is_dense_index_built(self, document_store_index_hash: str) -> bool:
+        # The window layout is written last, only a completed build has it.
+        return document_store_index_hash in self.dense_index_cache or (
+                storage_manager.get_artifact_path("dense_index", document_store_index_hash) / "window_layout.npz"
+        ).exists()
+
+    def start_index_build(self, passage_search_request: PassageSearchRequest,
+                          retry_failed: bool = False) -> BackgroundJob:
+        # Callers poll the job instead of blocking, a finished job stands while its index exists.
+        document_store_index_hash: str = self.get_document_store_index_hash(
+            passage_search_request=passage_search_request
+        )
+        build_job: Optional[BackgroundJob] = background_job_runner.get_job(document_store_index_hash)
+        if build_job is not None and (
+                build_job.is_running()
+                or (build_job.status == "failed" and not retry_failed)
+                or (build_job.status == "done" and self.is_dense_index_built(document_store_index_hash))
+        ):
+            return build_job
+
+        # The GUI keeps mutating its request and nested models in place, the job builds from a deep snapshot.
+        build_request: PassageSearchRequest = passage_search_request.copy(deep=True)
+        return background_job_runner.submit(
+            key=document_store_index_hash,
+            name="index_build",
+            function=lambda: self.build_indexes(passage_search_request=build_request)
+        )
+
     def get_ranker(self, passage_search_request: PassageSearchRequest) -> BaseRanker:
         return ranker_model.get_ranker(
             passage_search_request=passage_search_request
         )
 
-    def get_pipeline(self, passage_search_request: PassageSearchRequest, documents: List[Document]) -> Pipeline:
+    def get_pipeline(self, passage_search_request: PassageSearchRequest, windowed_corpus: WindowedCorpus) -> Pipeline:
         dense_retriever: BaseRetriever = self.get_dense_retriever(
             passage_search_request=passage_search_request,
-            documents=documents
+            windowed_corpus=windowed_corpus
         )
         sparse_retriever: BaseRetriever = self.get_sparse_retriever(
             passage_search_request=passage_search_request,
-            documents=documents
+            windowed_corpus=windowed_corpus
         )
         document_joiner: JoinDocuments = JoinDocuments(
             join_mode="reciprocal_rank_fusion"
@@ -118,7 +699,7 @@ class PassageSearch:
             passage_search_request=passage_search_request
         )
 
-        pipeline = Pipeline()
+        pipeline: Pipeline = pipeline_executor.get_pipeline()
         pipeline.add_node(
             component=dense_retriever,
             name="DenseRetriever",
@@ -142,26 +723,47 @@ class PassageSearch:
 
         return pipeline
 
+    def get_pipeline_params(self, passage_search_request: PassageSearchRequest) -> dict:
+        filters: Optional[dict] = self.get_filters(
+            passage_search_request=passage_search_request
+        )
+
+        pipeline_params: dict = {
+            "DenseRetriever": {"top_k": passage_search_request.retriever_top_k, "filters": filters},
+            "SparseRetriever": {"top_k": passage_search_request.retriever_top_k, "filters": filters},
+            "Ranker": {"top_k": passage_search_request.ranker_top_k}
+        }
+
+        return pipeline_params
+
     def search(self, passage_search_request: PassageSearchRequest) -> PassageSearchResponse:
         time_start: datetime = datetime.now()
 
-        window_sized_documents: List[Document] = self.get_window_sized_documents(
+        # Streamlit reruns the page on every widget change, an unchanged request is answered from the cache.
+        passage_search_request_hash: str = self.get_request_hash(passage_search_request=passage_search_request)
+        cached_response: Optional[PassageSearchResponse] = result_cache.get(
+            "passage_search", passage_search_request_hash
+        )
+        if cached_response is not None:
+            return cached_response.copy(update={
+                "process_duration": (datetime.now() - time_start).total_seconds()
+            })
+
+        windowed_corpus: WindowedCorpus = self.get_windowed_corpus(
             passage_search_request=passage_search_request
         )
 
         pipeline: Pipeline = self.get_pipeline(
             passage_search_request=passage_search_request,
-            documents=window_sized_documents
+            windowed_corpus=windowed_corpus
         )
 
         retrieval_result: dict = pipeline.run(
             query=passage_search_request.query,
-            params={
-                "DenseRetriever": {"top_k": passage_search_request.retriever_top_k},
-                "SparseRetriever": {"top_k": passage_search_request.retriever_top_k},
-                "Ranker": {"top_k": passage_search_request.ranker_top_k}
-            },
-            debug=True
+            params=self.get_pipeline_params(
+                passage_search_request=passage_search_request
+            ),
+            debug=False
         )
 
         time_finish: datetime = datetime.now()
@@ -169,10 +771,57 @@ class PassageSearch:
 
         response: PassageSearchResponse = PassageSearchResponse(
             retrieval_result=retrieval_result,
+            segment_cache_key=document_processor.get_segment_cache_key(
+                corpus=passage_search_request.corpus,
+                corpus_source_type=passage_search_request.corpus_source_type,
+                granularity=passage_search_request.granularity
+            ),
+            dense_index_report=pipeline.get_node("DenseRetriever").document_store.dense_index_report,
+            node_durations=retrieval_result.pop("node_durations", None),
             process_duration=time_delta.total_seconds()
         )
+        result_cache.put("passage_search", passage_search_request_hash, response)
 
         return response
 
+    def get_segments(self, passage_search_request: PassageSearchRequest,
+                     passage_search_response: PassageSearchResponse) -> List[str]:
+        # Responses only point at the corpus segments, an evicted entry is segmented again and cached.
+        segment_cache_entry: Optional[Tuple[List[str], List[int]]] = segment_cache.get(
+            passage_search_response.segment_cache_key
+        )
+        if segment_cache_entry is not None:
+            return segment_cache_entry[0]
+
+        return document_processor.granularize(
+            corpus=passage_search_request.corpus,
+            corpus_source_type=passage_search_request.corpus_source_type,
+            granularity=passage_search_request.granularity
+        )
+
+    def get_stride_recall(self, passage_search_request: PassageSearchRequest,
+                          passage_search_response: PassageSearchResponse) -> Optional[float]:
+        # Strided results are compared to stride 1 results by the source units they cover,
+        # None means there is no stride to measure or the stride 1 index is still building.
+        reference_request: PassageSearchRequest = passage_search_request.copy(update={
+            "window_strides": "1",
+            "token_budget_window_stride": None
+        })
+        if self.get_window_config(reference_request) == self.get_window_config(passage_search_request):
+            return None
+
+        reference_build_job: BackgroundJob = self.start_index_build(passage_search_request=reference_request)
+        if reference_build_job.status != "done":
+            return None
+
+        reference_response: PassageSearchResponse = self.search(passage_search_request=reference_request)
+        return search_statistics.get_source_index_recall(
+            reference_windowed_documents=reference_response.retrieval_result["documents"],
+            candidate_windowed_documents=passage_search_response.retrieval_result["documents"]
+        )
+
 
-passage_search = PassageSearch()
+passage_search = PassageSearch(
+    dense_index_cache_max_bytes=int(os.environ.get("DENSE_INDEX_CACHE_MAX_BYTES", 4 * 1024 ** 3)),
+    index_build_chunk_size=int(os.environ.get("INDEX_BUILD_CHUNK_SIZE", 1000))
+)
@@ -1,12 +1,37 @@
-from haystack.nodes import SentenceTransformersRanker, BaseRanker
+import numpy as np
+import torch
+from haystack.nodes import BaseRanker
 
 from models.passage_search_request import PassageSearchRequest
+from sub_apps.passage_search.micro_batched_ranker import MicroBatchedSentenceTransformersRanker
+from utilities.inference_backend import inference_backend
+from utilities.model_registry import model_registry
 
 
 class RankerModel:
+    def get_probe_outputs(self, ranker: MicroBatchedSentenceTransformersRanker) -> np.ndarray:
+        similarity_scores: torch.Tensor = ranker.get_similarity_scores([
+            (inference_backend.PROBE_TEXTS[0], inference_backend.PROBE_TEXTS[1:])
+        ])[0]
+        return similarity_scores[:, -1].reshape(1, -1).float().cpu().numpy()
+
     def get_sentence_transformers_ranker(self, passage_search_request: PassageSearchRequest) -> BaseRanker:
-        ranker: SentenceTransformersRanker = SentenceTransformersRanker(
-            model_name_or_path=passage_search_request.embedding_model.ranker_model,
+        load_options: dict = {
+            "model_name_or_path": passage_search_request.embedding_model.ranker_model,
+            "inference_backend": passage_search_request.inference_backend,
+        }
+        ranker: MicroBatchedSentenceTransformersRanker = model_registry.get_model(
+            model_type="sentence_transformers_ranker",
+            load_options=load_options,
+            loader=lambda: inference_backend.load(
+                model_key=model_registry.get_key(model_type="sentence_transformers_ranker", load_options=load_options),
+                backend=passage_search_request.inference_backend,
+                loader=lambda use_gpu: MicroBatchedSentenceTransformersRanker(
+                    model_name_or_path=passage_search_request.embedding_model.ranker_model,
+                    use_gpu=use_gpu,
+                ),
+                get_probe_outputs=self.get_probe_outputs
+            )
         )
         return ranker
 
@@ -1,47 +1,142 @@
+import hashlib
+from typing import Callable, List
+
+import numpy as np
 from haystack.document_stores import BaseDocumentStore
-from haystack.nodes import EmbeddingRetriever, BaseRetriever, DensePassageRetriever, MultihopEmbeddingRetriever, \
-    BM25Retriever, TfidfRetriever
+from haystack.nodes import EmbeddingRetriever, BaseRetriever, DensePassageRetriever, MultihopEmbeddingRetriever
+from haystack.schema import Document
 
 from models.passage_search_request import PassageSearchRequest
+from sub_apps.passage_search.sparse_index import SparseIndex
+from sub_apps.passage_search.sparse_index_retriever import SparseIndexRetriever
+from utilities.inference_backend import inference_backend
+from utilities.micro_batcher import micro_batcher
+from utilities.model_registry import model_registry
+from utilities.windowed_corpus import WindowedCorpus
 
 
 class RetrieverModel:
+    def get_probe_outputs(self, retriever: BaseRetriever) -> np.ndarray:
+        return np.concatenate([
+            retriever.embed_queries(inference_backend.PROBE_TEXTS),
+            retriever.embed_documents([Document(content=text) for text in inference_backend.PROBE_TEXTS])
+        ])
+
+    def get_micro_batched_retriever(self, retriever: BaseRetriever, model_key: str) -> BaseRetriever:
+        embed_queries: Callable[[List[str]], np.ndarray] = retriever.embed_queries
+
+        def embed_query_batch(query_batch: List[List[str]]) -> List[np.ndarray]:
+            embeddings: np.ndarray = embed_queries([query for queries in query_batch for query in queries])
+            return np.split(embeddings, np.cumsum([len(queries) for queries in query_batch])[:-1])
+
+        # Only this request's copy is patched, query encodings from concurrent sessions share a forward pass.
+        retriever.embed_queries = lambda queries: micro_batcher.submit(
+            key=f"embed_queries_{model_key}",
+            item=[queries] if isinstance(queries, str) else list(queries),
+            batch_function=embed_query_batch
+        )
+        return retriever
+
     def get_multihop_retriever(self, document_store: BaseDocumentStore,
                                passage_search_request: PassageSearchRequest) -> BaseRetriever:
-        retriever: MultihopEmbeddingRetriever = MultihopEmbeddingRetriever(
-            document_store=document_store,
-            embedding_model=passage_search_request.embedding_model.query_model,
-            num_iterations=passage_search_request.num_iterations,
+        load_options: dict = {
+            "embedding_model": passage_search_request.embedding_model.query_model,
+            "inference_backend": passage_search_request.inference_backend,
+        }
+        model_key: str = model_registry.get_key(model_type="multihop_retriever", load_options=load_options)
+        retriever: MultihopEmbeddingRetriever = model_registry.get_model(
+            model_type="multihop_retriever",
+            load_options=load_options,
+            loader=lambda: inference_backend.load(
+                model_key=model_key,
+                backend=passage_search_request.inference_backend,
+                loader=lambda use_gpu: MultihopEmbeddingRetriever(
+                    document_store=None,
+                    embedding_model=passage_search_request.embedding_model.query_model,
+                    num_iterations=passage_search_request.num_iterations,
+                    use_gpu=use_gpu,
+                ),
+                get_probe_outputs=self.get_probe_outputs
+            )
+        )
+        retriever.document_store = document_store
+        retriever.num_iterations = passage_search_request.num_iterations
+        return self.get_micro_batched_retriever(
+            retriever=retriever,
+            model_key=model_key
         )
-        return retriever
 
     def get_basic_retriever(self, document_store: BaseDocumentStore,
                             passage_search_request: PassageSearchRequest) -> BaseRetriever:
-        retriever: EmbeddingRetriever = EmbeddingRetriever(
-            document_store=document_store,
-            embedding_model=passage_search_request.embedding_model.query_model,
-            api_key=passage_search_request.api_key,
+        load_options: dict = {
+            "embedding_model": passage_search_request.embedding_model.query_model,
+            "api_key_hash": hashlib.md5(str(passage_search_request.api_key).encode("utf-8")).hexdigest(),
+            "inference_backend": passage_search_request.inference_backend,
+        }
+        model_key: str = model_registry.get_key(model_type="basic_retriever", load_options=load_options)
+        retriever: EmbeddingRetriever = model_registry.get_model(
+            model_type="basic_retriever",
+            load_options=load_options,
+            loader=lambda: inference_backend.load(
+                model_key=model_key,
+                backend=passage_search_request.inference_backend,
+                loader=lambda use_gpu: EmbeddingRetriever(
+                    document_store=None,
+                    embedding_model=passage_search_request.embedding_model.query_model,
+                    api_key=passage_search_request.api_key,
+                    use_gpu=use_gpu,
+                ),
+                get_probe_outputs=self.get_probe_outputs
+            )
+        )
+        retriever.document_store = document_store
+        return self.get_micro_batched_retriever(
+            retriever=retriever,
+            model_key=model_key
         )
-        return retriever
 
     def get_dense_passage_retriever(self, document_store: BaseDocumentStore,
                                     passage_search_request: PassageSearchRequest) -> BaseRetriever:
-        retriever: DensePassageRetriever = DensePassageRetriever(
-            document_store=document_store,
-            query_embedding_model=passage_search_request.embedding_model.query_model,
-            passage_embedding_model=passage_search_request.embedding_model.passage_model,
+        load_options: dict = {
+            "query_embedding_model": passage_search_request.embedding_model.query_model,
+            "passage_embedding_model": passage_search_request.embedding_model.passage_model,
+            "inference_backend": passage_search_request.inference_backend,
+        }
+        model_key: str = model_registry.get_key(model_type="dense_passage_retriever", load_options=load_options)
+        retriever: DensePassageRetriever = model_registry.get_model(
+            model_type="dense_passage_retriever",
+            load_options=load_options,
+            loader=lambda: inference_backend.load(
+                model_key=model_key,
+                backend=passage_search_request.inference_backend,
+                loader=lambda use_gpu: DensePassageRetriever(
+                    document_store=None,
+                    query_embedding_model=passage_search_request.embedding_model.query_model,
+                    passage_embedding_model=passage_search_request.embedding_model.passage_model,
+                    use_gpu=use_gpu,
+                ),
+                get_probe_outputs=self.get_probe_outputs
+            )
+        )
+        retriever.document_store = document_store
+        return self.get_micro_batched_retriever(
+            retriever=retriever,
+            model_key=model_key
         )
-        return retriever
 
-    def get_bm25_retriever(self, document_store: BaseDocumentStore) -> BaseRetriever:
-        retriever: BM25Retriever = BM25Retriever(
-            document_store=document_store
+    def get_bm25_retriever(self, sparse_index: SparseIndex, windowed_corpus: WindowedCorpus) -> BaseRetriever:
+        retriever: SparseIndexRetriever = SparseIndexRetriever(
+            sparse_index=sparse_index,
+            windowed_corpus=windowed_corpus,
+            scoring="bm25"
         )
         return retriever
 
-    def get_tfidf_retriever(self, document_store: BaseDocumentStore) -> BaseRetriever:
-        retriever: TfidfRetriever = TfidfRetriever(
-            document_store=document_store
+    def get_tfidf_retriever(self, sparse_index: SparseIndex, windowed_corpus: WindowedCorpus) -> BaseRetriever:
+        retriever: SparseIndexRetriever = SparseIndexRetriever(
+            sparse_index=sparse_index,
+            windowed_corpus=windowed_corpus,
+            scoring="tfidf"
         )
         return retriever
 
@@ -66,15 +161,17 @@ class RetrieverModel:
             raise ValueError(f"Dense retriever {passage_search_request.dense_retriever} is not supported.")
         return retriever
 
-    def get_sparse_retriever(self, document_store: BaseDocumentStore,
+    def get_sparse_retriever(self, sparse_index: SparseIndex, windowed_corpus: WindowedCorpus,
                              passage_search_request: PassageSearchRequest) -> BaseRetriever:
         if passage_search_request.sparse_retriever == "tfidf":
             retriever = self.get_tfidf_retriever(
-                document_store=document_store,
+                sparse_index=sparse_index,
+                windowed_corpus=windowed_corpus,
             )
         elif passage_search_request.sparse_retriever == "bm25":
             retriever = self.get_bm25_retriever(
-                document_store=document_store,
+                sparse_index=sparse_index,
+                windowed_corpus=windowed_corpus,
             )
         else:
             raise ValueError(f"Sparse retriever {passage_search_request.sparse_retriever} is not supported.")
@@ -1,61 +1,92 @@
-from typing import List, Dict
+from typing import List
+
+import numpy as np
+
+
+class OverlappedScores:
+    def __init__(self, source_indexes: np.ndarray, counts: np.ndarray, score_means: np.ndarray) -> None:
+        self.source_indexes: np.ndarray = source_indexes
+        self.counts: np.ndarray = counts
+        self.score_means: np.ndarray = score_means
+
+    def __len__(self) -> int:
+        return len(self.source_indexes)
+
+    def take(self, indexes: np.ndarray) -> "OverlappedScores":
+        return OverlappedScores(
+            source_indexes=self.source_indexes[indexes],
+            counts=self.counts[indexes],
+            score_means=self.score_means[indexes]
+        )
 
 
 class SearchStatistics:
-    def get_document_indexes_with_overlapped_scores(self, result_windowed_documents: List) -> Dict[int, Dict]:
-        result_document_indexes_with_overlapped_scores: dict = {}
-        for windowed_document in result_windowed_documents:
-            windowed_document_source_indexes: List[int] = [
-                windowed_document.meta["index_window"] + i for i in range(windowed_document.meta["window_size"])]
-
-            for windowed_document_source_index in windowed_document_source_indexes:
-                if result_document_indexes_with_overlapped_scores.get(windowed_document_source_index, None) is None:
-                    result_document_indexes_with_overlapped_scores[windowed_document_source_index] = {
-                        "count": 1,
-                        "score_mean": windowed_document.score / 1
-                    }
-                else:
-                    old_count = result_document_indexes_with_overlapped_scores[
-                        windowed_document_source_index]["count"]
-                    new_count = old_count + 1
-                    result_document_indexes_with_overlapped_scores[
-                        windowed_document_source_index]["count"] = new_count
-                    new_value = windowed_document.score / 1
-                    old_score_mean = result_document_indexes_with_overlapped_scores[
-                        windowed_document_source_index]["score_mean"]
-                    new_score_mean = old_score_mean + ((new_value - old_score_mean) / new_count)
-                    result_document_indexes_with_overlapped_scores[
-                        windowed_document_source_index]["score_mean"] = new_score_mean
-
-        return result_document_indexes_with_overlapped_scores
-
-    def get_selected_labels(self, document_indexes_with_overlapped_scores: Dict[int, Dict], top_k: float) -> List:
-        items = document_indexes_with_overlapped_scores.items()
-        selected_labels = []
-        max_selection = top_k
-        count_selection = 0
-        for index, stats in sorted(items, key=lambda item: item[1]["score_mean"], reverse=True):
-            if count_selection >= max_selection:
-                break
-            score = f"{stats['score_mean']: .4f}"
-            selected_labels.append(score)
-            count_selection += 1
-
-        return selected_labels
-
-    def get_selected_documents(self, document_indexes_with_overlapped_scores: Dict[int, Dict], top_k: float,
+    def get_document_indexes_with_overlapped_scores(self, result_windowed_documents: List) -> OverlappedScores:
+        window_starts: np.ndarray = np.fromiter(
+            (windowed_document.meta["index_window"] for windowed_document in result_windowed_documents),
+            dtype=np.int64,
+            count=len(result_windowed_documents)
+        )
+        window_ends: np.ndarray = window_starts + np.fromiter(
+            (windowed_document.meta["window_size"] for windowed_document in result_windowed_documents),
+            dtype=np.int64,
+            count=len(result_windowed_documents)
+        )
+        window_scores: np.ndarray = np.fromiter(
+            (windowed_document.score for windowed_document in result_windowed_documents),
+            dtype=np.float64,
+            count=len(result_windowed_documents)
+        )
+        source_count: int = int(window_ends.max()) if len(window_ends) > 0 else 0
+
+        # Each window adds its score to a unit range, so difference arrays turn the overlap into two scatters.
+        count_differences: np.ndarray = np.zeros(source_count + 1, dtype=np.int64)
+        np.add.at(count_differences, window_starts, 1)
+        np.add.at(count_differences, window_ends, -1)
+        score_differences: np.ndarray = np.zeros(source_count + 1, dtype=np.float64)
+        np.add.at(score_differences, window_starts, window_scores)
+        np.add.at(score_differences, window_ends, -window_scores)
+
+        counts: np.ndarray = np.cumsum(count_differences)[:source_count]
+        score_sums: np.ndarray = np.cumsum(score_differences)[:source_count]
+        source_indexes: np.ndarray = np.flatnonzero(counts > 0)
+
+        return OverlappedScores(
+            source_indexes=source_indexes,
+            counts=counts[source_indexes],
+            score_means=score_sums[source_indexes] / counts[source_indexes]
+        )
+
+    def get_top_overlapped_scores(self, overlapped_scores: OverlappedScores, top_k: float) -> OverlappedScores:
+        top_k: int = min(int(top_k), len(overlapped_scores))
+        if top_k <= 0:
+            return overlapped_scores.take(np.zeros(0, dtype=np.int64))
+
+        top_indexes: np.ndarray = np.argpartition(-overlapped_scores.score_means, top_k - 1)[:top_k]
+        top_indexes = top_indexes[np.argsort(-overlapped_scores.score_means[top_indexes], kind="stable")]
+
+        return overlapped_scores.take(top_indexes)
+
+    def get_selected_labels(self, top_overlapped_scores: OverlappedScores) -> List[str]:
+        return [f"{score_mean: .4f}" for score_mean in top_overlapped_scores.score_means.tolist()]
+
+    def get_selected_documents(self, top_overlapped_scores: OverlappedScores,
                                source_documents: List[str]) -> List[str]:
-        items = document_indexes_with_overlapped_scores.items()
-        selected_documents = []
-        max_selection = top_k
-        count_selection = 0
-        for index, stats in sorted(items, key=lambda item: item[1]["score_mean"], reverse=True):
-            if count_selection >= max_selection:
-                break
-            selected_documents.append(source_documents[index])
-            count_selection += 1
-
-        return selected_documents
+        return [source_documents[source_index] for source_index in top_overlapped_scores.source_indexes.tolist()]
+
+    def get_source_index_recall(self, reference_windowed_documents: List,
+                                candidate_windowed_documents: List) -> float:
+        # Compares windowing setups by the source units their results cover, window ids differ between them.
+        reference_source_indexes: np.ndarray = self.get_document_indexes_with_overlapped_scores(
+            reference_windowed_documents
+        ).source_indexes
+        candidate_source_indexes: np.ndarray = self.get_document_indexes_with_overlapped_scores(
+            candidate_windowed_documents
+        ).source_indexes
+        if len(reference_source_indexes) == 0:
+            return 1.0
+
+        return float(np.isin(reference_source_indexes, candidate_source_indexes).mean())
 
 
 search_statistics = SearchStatistics()
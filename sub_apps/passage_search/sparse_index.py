@@ -0,0 +1,240 @@
+import json
+import os
+import re
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utilities.meta_filter import meta_filter
+from utilities.windowed_corpus import WindowedCorpus
+
+
+class SparseIndex:
+    TOKEN_PATTERN: re.Pattern = re.compile(r"(?u)\b\w\w+\b")
+    META_COLUMNS: Tuple[str, ...] = ("index_window", "window_size", "page_start", "page_end")
+
+    def __init__(self, vocabulary: Dict[str, int], posting_offsets: np.ndarray, posting_documents: np.ndarray,
+                 posting_frequencies: np.ndarray, document_lengths: np.ndarray, bm25_idfs: np.ndarray,
+                 tfidf_idfs: np.ndarray, tfidf_norms: np.ndarray, meta_columns: Dict[str, np.ndarray]) -> None:
+        self.vocabulary: Dict[str, int] = vocabulary
+        self.posting_offsets: np.ndarray = posting_offsets
+        self.posting_documents: np.ndarray = posting_documents
+        self.posting_frequencies: np.ndarray = posting_frequencies
+        self.document_lengths: np.ndarray = document_lengths
+        self.bm25_idfs: np.ndarray = bm25_idfs
+        self.tfidf_idfs: np.ndarray = tfidf_idfs
+        self.tfidf_norms: np.ndarray = tfidf_norms
+        self.meta_columns: Dict[str, np.ndarray] = meta_columns
+        self.average_document_length: float = float(np.mean(document_lengths)) if len(document_lengths) > 0 else 0.0
+
+    def get_document_count(self) -> int:
+        return len(self.document_lengths)
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return SparseIndex.TOKEN_PATTERN.findall(text.lower())
+
+    def get_query_terms(self, query: str) -> Dict[int, int]:
+        return {
+            self.vocabulary[token]: count
+            for token, count in Counter(self.tokenize(query)).items()
+            if token in self.vocabulary
+        }
+
+    def get_postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        posting_start: int = int(self.posting_offsets[term_id])
+        posting_end: int = int(self.posting_offsets[term_id + 1])
+        return self.posting_documents[posting_start:posting_end], self.posting_frequencies[posting_start:posting_end]
+
+    def get_bm25_scores(self, query: str, k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+        scores: np.ndarray = np.zeros(self.get_document_count(), dtype=np.float32)
+        length_norms: np.ndarray = k1 * (1 - b + b * self.document_lengths / max(self.average_document_length, 1.0))
+        # Like rank_bm25, a term repeated in the query counts once per occurrence.
+        for term_id, query_count in self.get_query_terms(query).items():
+            documents, frequencies = self.get_postings(term_id)
+            scores[documents] += query_count * self.bm25_idfs[term_id] * frequencies * (k1 + 1) / (
+                    frequencies + length_norms[documents])
+        return scores
+
+    def get_tfidf_scores(self, query: str) -> np.ndarray:
+        scores: np.ndarray = np.zeros(self.get_document_count(), dtype=np.float32)
+        query_terms: Dict[int, int] = self.get_query_terms(query)
+        query_weights: Dict[int, float] = {
+            term_id: count * float(self.tfidf_idfs[term_id]) for term_id, count in query_terms.items()
+        }
+        query_norm: float = float(np.sqrt(sum(weight ** 2 for weight in query_weights.values())))
+        if query_norm == 0:
+            return scores
+
+        for term_id, query_weight in query_weights.items():
+            documents, frequencies = self.get_postings(term_id)
+            scores[documents] += (query_weight / query_norm) * frequencies * self.tfidf_idfs[term_id]
+        return scores / np.maximum(self.tfidf_norms, np.finfo(np.float32).tiny)
+
+    def get_filter_mask(self, filters: Optional[dict]) -> np.ndarray:
+        return meta_filter.get_mask(self.meta_columns, self.get_document_count(), filters)
+
+    def get_top_k(self, scores: np.ndarray, top_k: int, filters: Optional[dict] = None) -> np.ndarray:
+        candidate_indexes: np.ndarray = np.flatnonzero(self.get_filter_mask(filters) & (scores > 0))
+        if len(candidate_indexes) > top_k:
+            partitioned_indexes: np.ndarray = np.argpartition(-scores[candidate_indexes], top_k - 1)[:top_k]
+            candidate_indexes = candidate_indexes[partitioned_indexes]
+        return candidate_indexes[np.argsort(-scores[candidate_indexes], kind="stable")]
+
+
+class SparseIndexer:
+    ARRAY_NAMES: Tuple[str, ...] = (
+        "posting_offsets", "posting_documents", "posting_frequencies", "document_lengths",
+        "bm25_idfs", "tfidf_idfs", "tfidf_norms"
+    )
+
+    def tokenize_windows(self, windowed_corpus: WindowedCorpus, window_indexes: List[int], vocabulary: Dict[str, int],
+                         document_lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        term_ids: List[int] = []
+        document_ids: List[int] = []
+        frequencies: List[int] = []
+        for document_id in window_indexes:
+            tokens: List[str] = SparseIndex.tokenize(windowed_corpus.get_window_text(document_id))
+            document_lengths[document_id] = len(tokens)
+            for token, frequency in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                document_ids.append(document_id)
+                frequencies.append(frequency)
+
+        return (
+            np.asarray(term_ids, dtype=np.int64),
+            np.asarray(document_ids, dtype=np.int32),
+            np.asarray(frequencies, dtype=np.float32)
+        )
+
+    def get_sparse_index(self, windowed_corpus: WindowedCorpus, vocabulary: Dict[str, int], term_ids: np.ndarray,
+                         document_ids: np.ndarray, frequencies: np.ndarray, document_lengths: np.ndarray,
+                         bm25_epsilon: float) -> SparseIndex:
+        document_count: int = windowed_corpus.get_window_count()
+        # Postings are ordered by term then window, so an updated index matches a fresh build of the same corpus.
+        posting_order: np.ndarray = np.lexsort((document_ids, term_ids))
+        document_frequencies: np.ndarray = np.bincount(term_ids, minlength=len(vocabulary))
+        posting_offsets: np.ndarray = np.concatenate([[0], np.cumsum(document_frequencies)]).astype(np.int64)
+        posting_documents: np.ndarray = document_ids[posting_order]
+        posting_frequencies: np.ndarray = frequencies[posting_order]
+
+        # Same idf flooring as rank_bm25's BM25Okapi, which backs the BM25 InMemoryDocumentStore.
+        bm25_idfs: np.ndarray = np.log(document_count - document_frequencies + 0.5) - np.log(document_frequencies + 0.5)
+        # Terms whose windows were all removed by an update stay in the vocabulary, they do not count here.
+        if np.any(document_frequencies > 0):
+            bm25_idfs[bm25_idfs < 0] = bm25_epsilon * float(np.mean(bm25_idfs[document_frequencies > 0]))
+        tfidf_idfs: np.ndarray = np.log((1 + document_count) / (1 + document_frequencies)) + 1
+
+        posting_weights: np.ndarray = posting_frequencies * tfidf_idfs[term_ids[posting_order]]
+        tfidf_norms: np.ndarray = np.sqrt(np.bincount(
+            posting_documents, weights=posting_weights ** 2, minlength=document_count
+        ))
+
+        meta_columns: Dict[str, np.ndarray] = {
+            column: np.asarray(values, dtype=np.int32) for column, values in windowed_corpus.get_meta_columns().items()
+        }
+
+        return SparseIndex(
+            vocabulary=vocabulary,
+            posting_offsets=posting_offsets,
+            posting_documents=posting_documents,
+            posting_frequencies=posting_frequencies,
+            document_lengths=document_lengths,
+            bm25_idfs=bm25_idfs.astype(np.float32),
+            tfidf_idfs=tfidf_idfs.astype(np.float32),
+            tfidf_norms=tfidf_norms.astype(np.float32),
+            meta_columns=meta_columns
+        )
+
+    def build(self, windowed_corpus: WindowedCorpus, bm25_epsilon: float = 0.25) -> SparseIndex:
+        vocabulary: Dict[str, int] = {}
+        document_lengths: np.ndarray = np.zeros(windowed_corpus.get_window_count(), dtype=np.int32)
+        term_ids, document_ids, frequencies = self.tokenize_windows(
+            windowed_corpus=windowed_corpus,
+            window_indexes=list(range(windowed_corpus.get_window_count())),
+            vocabulary=vocabulary,
+            document_lengths=document_lengths
+        )
+
+        return self.get_sparse_index(
+            windowed_corpus=windowed_corpus,
+            vocabulary=vocabulary,
+            term_ids=term_ids,
+            document_ids=document_ids,
+            frequencies=frequencies,
+            document_lengths=document_lengths,
+            bm25_epsilon=bm25_epsilon
+        )
+
+    def update(self, sparse_index: SparseIndex, windowed_corpus: WindowedCorpus, window_mapping: np.ndarray,
+               bm25_epsilon: float = 0.25) -> SparseIndex:
+        # Kept windows carry their postings over, only the added windows are tokenized again.
+        old_to_new_indexes: np.ndarray = np.full(sparse_index.get_document_count(), -1, dtype=np.int64)
+        kept_window_indexes: np.ndarray = np.flatnonzero(window_mapping != -1)
+        old_to_new_indexes[window_mapping[kept_window_indexes]] = kept_window_indexes
+
+        old_term_ids: np.ndarray = np.repeat(
+            np.arange(len(sparse_index.posting_offsets) - 1, dtype=np.int64),
+            np.diff(sparse_index.posting_offsets)
+        )
+        old_document_ids: np.ndarray = old_to_new_indexes[sparse_index.posting_documents]
+        kept_postings: np.ndarray = old_document_ids != -1
+
+        vocabulary: Dict[str, int] = dict(sparse_index.vocabulary)
+        document_lengths: np.ndarray = np.zeros(windowed_corpus.get_window_count(), dtype=np.int32)
+        document_lengths[kept_window_indexes] = sparse_index.document_lengths[window_mapping[kept_window_indexes]]
+        term_ids, document_ids, frequencies = self.tokenize_windows(
+            windowed_corpus=windowed_corpus,
+            window_indexes=np.flatnonzero(window_mapping == -1).tolist(),
+            vocabulary=vocabulary,
+            document_lengths=document_lengths
+        )
+
+        return self.get_sparse_index(
+            windowed_corpus=windowed_corpus,
+            vocabulary=vocabulary,
+            term_ids=np.concatenate([old_term_ids[kept_postings], term_ids]),
+            document_ids=np.concatenate([old_document_ids[kept_postings].astype(np.int32), document_ids]),
+            frequencies=np.concatenate([np.asarray(sparse_index.posting_frequencies)[kept_postings], frequencies]),
+            document_lengths=document_lengths,
+            bm25_epsilon=bm25_epsilon
+        )
+
+    def save(self, sparse_index: SparseIndex, index_path: Path) -> Path:
+        temporary_index_path: Path = index_path.with_name(f"{index_path.name}.tmp")
+        temporary_index_path.mkdir(parents=True, exist_ok=True)
+
+        for array_name in self.ARRAY_NAMES:
+            np.save(temporary_index_path / f"{array_name}.npy", getattr(sparse_index, array_name))
+        for column, values in sparse_index.meta_columns.items():
+            np.save(temporary_index_path / f"meta_{column}.npy", values)
+        with open(temporary_index_path / "vocabulary.json", "w") as vocabulary_file:
+            json.dump(sparse_index.vocabulary, vocabulary_file)
+
+        # The directory only appears under its final name once complete, a crashed build is never loaded.
+        if index_path.exists():
+            shutil.rmtree(index_path)
+        os.replace(temporary_index_path, index_path)
+
+        return index_path
+
+    def load(self, index_path: Path) -> SparseIndex:
+        with open(index_path / "vocabulary.json", "r") as vocabulary_file:
+            vocabulary: Dict[str, int] = json.load(vocabulary_file)
+
+        arrays: Dict[str, np.ndarray] = {
+            array_name: np.load(index_path / f"{array_name}.npy", mmap_mode="r")
+            for array_name in self.ARRAY_NAMES
+        }
+        meta_columns: Dict[str, np.ndarray] = {
+            column: np.load(index_path / f"meta_{column}.npy", mmap_mode="r")
+            for column in SparseIndex.META_COLUMNS
+        }
+
+        return SparseIndex(vocabulary=vocabulary, meta_columns=meta_columns, **arrays)
+
+
+sparse_indexer = SparseIndexer()
@@ -0,0 +1,73 @@
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from haystack.document_stores import BaseDocumentStore
+from haystack.nodes import BaseRetriever
+from haystack.schema import Document
+
+from sub_apps.passage_search.sparse_index import SparseIndex
+from utilities.windowed_corpus import WindowedCorpus
+
+
+class SparseIndexRetriever(BaseRetriever):
+
+    def __init__(self, sparse_index: SparseIndex, windowed_corpus: WindowedCorpus, scoring: str,
+                 top_k: int = 10) -> None:
+        super().__init__()
+        if scoring not in ["bm25", "tfidf"]:
+            raise ValueError(f"Sparse scoring {scoring} is not supported.")
+        self.sparse_index: SparseIndex = sparse_index
+        self.windowed_corpus: WindowedCorpus = windowed_corpus
+        self.scoring: str = scoring
+        self.top_k: int = top_k
+        self.document_store: Optional[BaseDocumentStore] = None
+
+    def get_scores(self, query: str) -> np.ndarray:
+        if self.scoring == "bm25":
+            scores: np.ndarray = self.sparse_index.get_bm25_scores(query)
+        else:
+            scores: np.ndarray = self.sparse_index.get_tfidf_scores(query)
+        return scores
+
+    def retrieve(
+            self,
+            query: str,
+            filters: Optional[Dict[str, Union[Dict, List, str, int, float, bool]]] = None,
+            top_k: Optional[int] = None,
+            index: Optional[str] = None,
+            headers: Optional[Dict[str, str]] = None,
+            scale_score: Optional[bool] = None,
+            document_store: Optional[BaseDocumentStore] = None,
+    ) -> List[Document]:
+        scores: np.ndarray = self.get_scores(query)
+        top_indexes: np.ndarray = self.sparse_index.get_top_k(
+            scores=scores,
+            top_k=int(top_k or self.top_k),
+            filters=filters
+        )
+
+        retrieved_documents: List[Document] = []
+        for top_index in top_indexes.tolist():
+            score: float = float(scores[top_index])
+            # Same scaling as the BM25 InMemoryDocumentStore, TF-IDF cosine scores are already within [0, 1].
+            if scale_score is not False and self.scoring == "bm25":
+                score = float(1 / (1 + np.exp(-score / 8)))
+            retrieved_documents.append(self.windowed_corpus.get_document(top_index, score=score))
+
+        return retrieved_documents
+
+    def retrieve_batch(
+            self,
+            queries: List[str],
+            filters: Optional[Dict[str, Union[Dict, List, str, int, float, bool]]] = None,
+            top_k: Optional[int] = None,
+            index: Optional[str] = None,
+            headers: Optional[Dict[str, str]] = None,
+            batch_size: Optional[int] = None,
+            scale_score: Optional[bool] = None,
+            document_store: Optional[BaseDocumentStore] = None,
+    ) -> List[List[Document]]:
+        return [
+            self.retrieve(query=query, filters=filters, top_k=top_k, scale_score=scale_score)
+            for query in queries
+        ]
@@ -0,0 +1,132 @@
+from typing import List
+
+import numpy as np
+import pytest
+
+pytest.importorskip("haystack")
+pytest.importorskip("transformers")
+
+from haystack import Document
+
+from sub_apps.long_form_qa.generator_model_converter.context_builder import ContextSpan, context_builder
+from utilities.windowed_corpus import WindowedCorpus
+
+
+class WordTokenizer:
+    def __init__(self, model_max_length: int) -> None:
+        self.model_max_length: int = model_max_length
+        self.words: List[str] = []
+
+    def __call__(self, text: str, add_special_tokens: bool = True) -> dict:
+        input_ids: List[int] = []
+        for word in text.split():
+            if word not in self.words:
+                self.words.append(word)
+            input_ids.append(self.words.index(word))
+        return {"input_ids": input_ids}
+
+    def num_special_tokens_to_add(self) -> int:
+        return 1
+
+    def decode(self, token_ids: List[int], skip_special_tokens: bool = True) -> str:
+        return " ".join(self.words[token_id] for token_id in token_ids)
+
+
+def get_windowed_corpus(segments: List[str], windows: List[tuple]) -> WindowedCorpus:
+    segment_lengths: np.ndarray = np.asarray([len(segment) for segment in segments], dtype=np.int64)
+    segment_starts: np.ndarray = np.concatenate([[0], np.cumsum(segment_lengths + 1)[:-1]]).astype(np.int64)
+    return WindowedCorpus(
+        buffer=" ".join(segments),
+        segment_starts=segment_starts,
+        segment_ends=segment_starts + segment_lengths,
+        segment_pages=np.ones(len(segments), dtype=np.int32),
+        window_starts=np.asarray([window_start for window_start, _ in windows], dtype=np.int32),
+        window_sizes=np.asarray([window_size for _, window_size in windows], dtype=np.int32)
+    )
+
+
+def get_documents(windowed_corpus: WindowedCorpus, scores: List[float]) -> List[Document]:
+    return [
+        windowed_corpus.get_document(window_index, score=score)
+        for window_index, score in enumerate(scores)
+    ]
+
+
+def test_overlapping_windows_merge_by_segment():
+    windowed_corpus: WindowedCorpus = get_windowed_corpus(["Yes.", "Yes.", "Yes.", "No."], [(0, 2), (1, 3)])
+
+    spans: List[ContextSpan] = context_builder.get_spans(get_documents(windowed_corpus, [0.5, 0.9]))
+
+    assert len(spans) == 1
+    assert spans[0].content == "Yes. Yes. Yes. No."
+    assert spans[0].score == 0.9
+    assert (spans[0].index_window, spans[0].window_end) == (0, 4)
+
+
+def test_chained_and_contained_windows_merge_by_segment():
+    segments: List[str] = ["a b.", "a b.", "c.", "a b.", "d."]
+    windowed_corpus: WindowedCorpus = get_windowed_corpus(segments, [(0, 2), (1, 1), (1, 3), (3, 2)])
+
+    spans: List[ContextSpan] = context_builder.get_spans(get_documents(windowed_corpus, [0.1, 0.2, 0.3, 0.4]))
+
+    assert [span.content for span in spans] == [" ".join(segments)]
+    assert spans[0].segment_offsets == windowed_corpus.segment_starts.tolist()
+
+
+def test_disjoint_spans_are_ordered_by_score():
+    windowed_corpus: WindowedCorpus = get_windowed_corpus(["one.", "two.", "three.", "four."], [(0, 1), (2, 2)])
+    documents: List[Document] = get_documents(windowed_corpus, [0.2, 0.8])
+    documents.append(Document(content="plain passage", meta={}, score=0.5))
+
+    spans: List[ContextSpan] = context_builder.get_spans(documents)
+
+    assert [span.content for span in spans] == ["three. four.", "plain passage", "one."]
+
+
+def test_windows_without_segment_offsets_merge_by_text():
+    documents: List[Document] = [
+        Document(content="alpha beta", meta={"index_window": 0, "window_size": 2}, score=0.3),
+        Document(content="beta gamma", meta={"index_window": 1, "window_size": 2}, score=0.1),
+    ]
+
+    spans: List[ContextSpan] = context_builder.get_spans(documents)
+
+    assert [span.content for span in spans] == ["alpha beta gamma"]
+
+
+def test_build_packs_spans_in_score_order_within_the_token_budget():
+    documents: List[Document] = [
+        Document(content="x1 x2 x3 x4 x5 x6", meta={}, score=0.5),
+        Document(content="w1 w2 w3 w4", meta={}, score=0.9),
+        Document(content="y1 y2", meta={}, score=0.1),
+    ]
+
+    # 12 tokens minus one special token and two template tokens leave 9, the separator takes one per span.
+    context: str = context_builder.build(
+        WordTokenizer(model_max_length=12), documents, template="context: {context} end", separator=" | "
+    )
+
+    # The 4 tokens left are too few to truncate the next span into, so packing stops there.
+    assert context == "context: w1 w2 w3 w4 end"
+
+
+def test_build_truncates_a_span_when_enough_budget_is_left():
+    documents: List[Document] = [
+        Document(content="w1 w2 w3 w4", meta={}, score=0.9),
+        Document(content=" ".join(f"z{index}" for index in range(30)), meta={}, score=0.5),
+    ]
+    model_max_length: int = 1 + 4 + context_builder.MIN_TRUNCATED_SPAN_TOKEN_COUNT + 1
+
+    context: str = context_builder.build(WordTokenizer(model_max_length=model_max_length), documents, "{context}")
+
+    assert context == " ".join(
+        ["w1", "w2", "w3", "w4"] + [f"z{index}" for index in range(context_builder.MIN_TRUNCATED_SPAN_TOKEN_COUNT + 1)]
+    )
+
+
+def test_build_truncates_a_single_oversized_span():
+    documents: List[Document] = [Document(content=" ".join(f"t{index}" for index in range(40)), meta={}, score=1.0)]
+
+    context: str = context_builder.build(WordTokenizer(model_max_length=11), documents, template="{context}")
+
+    assert context == " ".join(f"t{index}" for index in range(10))
@@ -0,0 +1,64 @@
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+pytest.importorskip("txtai")
+pytest.importorskip("pdfkit")
+pytest.importorskip("pydantic")
+
+from utilities import document_processor as document_processor_module
+from utilities.document_processor import DocumentProcessor
+
+PAGE_TEXTS: Dict[str, List[str]] = {
+    "page_1.pdf": ["First sentence.", "A sentence broken by the"],
+    "page_2.pdf": ["page break.", "Last sentence."],
+}
+
+
+@pytest.fixture
+def textracted_paths() -> List[str]:
+    return []
+
+
+@pytest.fixture
+def processor(monkeypatch, textracted_paths: List[str]) -> DocumentProcessor:
+    processor: DocumentProcessor = DocumentProcessor()
+
+    def textract(corpus: str, granularity: str) -> List[str]:
+        textracted_paths.append(corpus)
+        return list(PAGE_TEXTS[Path(corpus).name])
+
+    monkeypatch.setattr(processor, "textract", textract)
+    monkeypatch.setattr(document_processor_module.document_conversion, "get_pdf_page_length", lambda corpus: 2)
+    monkeypatch.setattr(
+        document_processor_module.document_conversion,
+        "split_pdf_page",
+        lambda start_page, end_page, input_file_path, output_file_path: output_file_path
+    )
+    return processor
+
+
+def test_pdf_segments_keep_their_page(processor: DocumentProcessor):
+    segments, pages = processor.extract_with_pages("corpus.pdf", "file", "sentence")
+
+    assert segments == ["First sentence.", "A sentence broken by the", "page break.", "Last sentence."]
+    assert pages == [1, 1, 2, 2]
+
+
+def test_pdf_pages_are_extracted_one_by_one(processor: DocumentProcessor, textracted_paths: List[str]):
+    segments, pages = processor.extract_with_pages("corpus.pdf", "file", "sentence")
+
+    # Page numbers come from per-page extraction, so a sentence crossing a page break is split at the break.
+    assert [Path(path).name for path in textracted_paths] == ["page_1.pdf", "page_2.pdf"]
+    assert "A sentence broken by the page break." not in segments
+
+
+def test_text_segments_are_on_the_first_page(monkeypatch):
+    processor: DocumentProcessor = DocumentProcessor()
+    monkeypatch.setattr(processor, "segment", lambda corpus, granularity: corpus.split("\n"))
+
+    segments, pages = processor.extract_with_pages("a  \nb", "text", "paragraph")
+
+    assert segments == ["a", "b"]
+    assert pages == [1, 1]
@@ -0,0 +1,65 @@
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from utilities.embedding_cache import EmbeddingCache, EmbeddingCacheNamespace
+
+
+def get_embedder(vectors: dict):
+    def embedder(texts: List[str]) -> np.ndarray:
+        return np.asarray([vectors[text] for text in texts], dtype=np.float32)
+
+    return embedder
+
+
+def test_embeddings_are_cached_and_reloaded(tmp_path: Path):
+    vectors: dict = {"a": [1, 1], "b": [2, 2], "c": [3, 3]}
+    embedding_cache: EmbeddingCache = EmbeddingCache(cache_path=tmp_path, dtype="float32")
+
+    np.testing.assert_array_equal(
+        embedding_cache.get_embeddings("model", ["a", "b", "a"], get_embedder(vectors)), [[1, 1], [2, 2], [1, 1]]
+    )
+    np.testing.assert_array_equal(
+        embedding_cache.get_embeddings("model", ["b", "c"], get_embedder(vectors)), [[2, 2], [3, 3]]
+    )
+    assert embedding_cache.get_statistics()["miss_count"] == 3
+
+    reloaded_embedding_cache: EmbeddingCache = EmbeddingCache(cache_path=tmp_path, dtype="float32")
+    np.testing.assert_array_equal(
+        reloaded_embedding_cache.get_embeddings("model", ["c", "a"], get_embedder({})), [[3, 3], [1, 1]]
+    )
+
+
+def test_torn_tail_is_truncated_on_load(tmp_path: Path):
+    embedding_cache: EmbeddingCache = EmbeddingCache(cache_path=tmp_path, dtype="float32")
+    embedding_cache.get_embeddings("model", ["a"], get_embedder({"a": [1, 1]}))
+    namespace: EmbeddingCacheNamespace = embedding_cache.get_namespace("model")
+
+    # A crash after the embeddings append but before the keys append leaves an orphaned row and a partial one.
+    with open(namespace.embeddings_path, "ab") as embeddings_file:
+        embeddings_file.write(np.asarray([9, 9], dtype=np.float32).tobytes() + b"\x00\x01")
+
+    reloaded_embedding_cache: EmbeddingCache = EmbeddingCache(cache_path=tmp_path, dtype="float32")
+    np.testing.assert_array_equal(
+        reloaded_embedding_cache.get_embeddings("model", ["b", "a"], get_embedder({"b": [2, 2]})), [[2, 2], [1, 1]]
+    )
+
+    np.testing.assert_array_equal(
+        EmbeddingCache(cache_path=tmp_path, dtype="float32").get_embeddings("model", ["a", "b"], get_embedder({})),
+        [[1, 1], [2, 2]]
+    )
+
+
+def test_orphaned_keys_are_truncated_on_load(tmp_path: Path):
+    embedding_cache: EmbeddingCache = EmbeddingCache(cache_path=tmp_path, dtype="float32")
+    embedding_cache.get_embeddings("model", ["a"], get_embedder({"a": [1, 1]}))
+    namespace: EmbeddingCacheNamespace = embedding_cache.get_namespace("model")
+    with open(namespace.keys_path, "ab") as keys_file:
+        keys_file.write(embedding_cache.get_text_key("x") + b"\x00")
+
+    reloaded_embedding_cache: EmbeddingCache = EmbeddingCache(cache_path=tmp_path, dtype="float32")
+    np.testing.assert_array_equal(
+        reloaded_embedding_cache.get_embeddings("model", ["x", "a"], get_embedder({"x": [5, 5]})), [[5, 5], [1, 1]]
+    )
+    assert namespace.keys_path.stat().st_size == 2 * EmbeddingCacheNamespace.KEY_SIZE
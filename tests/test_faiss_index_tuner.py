@@ -0,0 +1,95 @@
+from typing import Iterator, Tuple
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from sub_apps.passage_search.faiss_index_tuner import faiss_index_tuner
+
+
+@pytest.mark.parametrize("faiss_index_type,vector_count,embedding_storage,expected_index_factory_str", [
+    ("auto", 1_000, "float32", "Flat"),
+    ("auto", 100_000, "float16", "SQfp16"),
+    ("auto", 250_000, "float32", "IVF2000,Flat"),
+    ("auto", 250_000, "int8", "IVF2000,SQ8"),
+    ("auto", 4_000_000, "float32", "IVF8000,PQ64"),
+    ("flat", 4_000_000, "int8", "SQ8"),
+    ("hnsw", 1_000, "float32", "HNSW"),
+    ("hnsw", 1_000, "float16", "HNSW32,SQfp16"),
+    ("ivf_flat", 20, "float32", "Flat"),
+    ("ivf_pq", 100, "float32", "Flat"),
+])
+def test_index_factory_str_by_corpus_size(faiss_index_type: str, vector_count: int, embedding_storage: str,
+                                          expected_index_factory_str: str):
+    assert faiss_index_tuner.get_index_factory_str(
+        faiss_index_type=faiss_index_type,
+        vector_count=vector_count,
+        embedding_dimension=768,
+        embedding_storage=embedding_storage
+    ) == expected_index_factory_str
+
+
+@pytest.mark.parametrize("faiss_index_type,embedding_storage", [("ivf", "float32"), ("flat", "bfloat16")])
+def test_index_factory_str_rejects_unsupported_options(faiss_index_type: str, embedding_storage: str):
+    with pytest.raises(ValueError):
+        faiss_index_tuner.get_index_factory_str(faiss_index_type, 1_000, 768, embedding_storage)
+
+
+def test_train_window_indexes_are_a_sorted_sample():
+    train_window_indexes: np.ndarray = faiss_index_tuner.get_train_window_indexes(50_000, "IVF400,Flat")
+
+    assert len(train_window_indexes) == len(np.unique(train_window_indexes))
+    assert np.all(np.diff(train_window_indexes) > 0)
+    assert 400 * faiss_index_tuner.MIN_TRAIN_POINTS_PER_CENTROID <= len(train_window_indexes) <= 50_000
+
+
+def test_tune_sets_search_parameters():
+    ivf_index = faiss.index_factory(16, "IVF128,Flat")
+    faiss_index_tuner.tune(ivf_index, "IVF128,Flat")
+    assert faiss.extract_index_ivf(ivf_index).nprobe == 16
+
+    hnsw_index = faiss.index_factory(16, "HNSW32,SQfp16")
+    faiss_index_tuner.tune(hnsw_index, "HNSW32,SQfp16")
+    assert faiss.downcast_index(hnsw_index).hnsw.efSearch == faiss_index_tuner.HNSW_EF_SEARCH
+    assert faiss.downcast_index(hnsw_index).hnsw.efConstruction == faiss_index_tuner.HNSW_EF_CONSTRUCTION
+
+
+def get_embeddings(vector_count: int, embedding_dimension: int) -> np.ndarray:
+    return np.random.RandomState(0).standard_normal((vector_count, embedding_dimension)).astype(np.float32)
+
+
+def get_embedding_batches(embeddings: np.ndarray, batch_size: int = 100):
+    def embedding_batches() -> Iterator[Tuple[int, np.ndarray]]:
+        for batch_start in range(0, len(embeddings), batch_size):
+            yield batch_start, embeddings[batch_start:batch_start + batch_size]
+
+    return embedding_batches
+
+
+@pytest.mark.parametrize("metric_type", [faiss.METRIC_INNER_PRODUCT, faiss.METRIC_L2])
+def test_exact_index_has_full_recall_and_no_drift(metric_type: int):
+    embeddings: np.ndarray = get_embeddings(500, 16)
+    faiss_index = faiss.IndexFlat(16, metric_type)
+    faiss_index.add(embeddings)
+
+    assert faiss_index_tuner.get_recall(faiss_index, embeddings[:20], 10, get_embedding_batches(embeddings)) == 1.0
+    assert faiss_index_tuner.get_score_drift(
+        faiss_index, embeddings[:20], 10, lambda window_indexes: embeddings[window_indexes]
+    ) == pytest.approx(0.0, abs=1e-3)
+
+
+def test_quantized_index_reports_its_loss():
+    embeddings: np.ndarray = get_embeddings(2_000, 16)
+    faiss_index = faiss.index_factory(16, "IVF16,SQ4", faiss.METRIC_INNER_PRODUCT)
+    faiss_index.train(embeddings)
+    faiss_index.add(embeddings)
+    faiss_index_tuner.tune(faiss_index, "IVF16,SQ4")
+
+    recall: float = faiss_index_tuner.get_recall(faiss_index, embeddings[:20], 10, get_embedding_batches(embeddings))
+    score_drift: float = faiss_index_tuner.get_score_drift(
+        faiss_index, embeddings[:20], 10, lambda window_indexes: embeddings[window_indexes]
+    )
+
+    assert 0.0 < recall < 1.0
+    assert score_drift > 0.0
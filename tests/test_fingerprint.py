@@ -0,0 +1,54 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from utilities.fingerprint import Fingerprint
+
+
+def test_file_hash_is_memoized_until_the_file_changes(tmp_path: Path):
+    fingerprint: Fingerprint = Fingerprint(web_ttl_seconds=60, hash_cache_max_bytes=1024 ** 2)
+    file_path: Path = tmp_path / "corpus.pdf"
+    file_path.write_bytes(b"first")
+
+    file_hash: str = fingerprint.get_file_hash(str(file_path))
+    assert fingerprint.get_file_hash(str(file_path)) == file_hash
+    assert fingerprint.file_hashes.get_statistics()["hit_count"] == 1
+
+    file_path.write_bytes(b"second")
+    os.utime(file_path, ns=(0, file_path.stat().st_mtime_ns + 1))
+    assert fingerprint.get_file_hash(str(file_path)) != file_hash
+    assert fingerprint.get_file_hash(str(file_path)) == fingerprint.get_bytes_hash(b"second")
+
+
+def test_file_hash_memo_is_bounded(tmp_path: Path):
+    fingerprint: Fingerprint = Fingerprint(web_ttl_seconds=60, hash_cache_max_bytes=1024)
+    for index in range(50):
+        file_path: Path = tmp_path / f"corpus_{index}.pdf"
+        file_path.write_bytes(f"corpus {index}".encode("utf-8"))
+        fingerprint.get_file_hash(str(file_path))
+
+    assert len(fingerprint.file_hashes) < 50
+    assert fingerprint.file_hashes.get_statistics()["resident_bytes"] <= 1024
+
+
+def test_text_hash_ignores_line_whitespace_noise():
+    fingerprint: Fingerprint = Fingerprint(web_ttl_seconds=60, hash_cache_max_bytes=1024 ** 2)
+
+    assert fingerprint.get_text_hash("a \r\nb  \n") == fingerprint.get_text_hash("a\nb")
+    assert fingerprint.get_text_hash("a\nb") != fingerprint.get_text_hash("a b")
+
+
+def test_uploaded_file_is_not_rewritten(tmp_path: Path):
+    pytest.importorskip("pdfkit")
+    pytest.importorskip("pdfrw")
+    pytest.importorskip("pydantic")
+    from utilities.document_conversion import document_conversion
+
+    file_path: Path = document_conversion.file_bytes_to_pdf(b"%PDF-1.4 upload", tmp_path / "upload.pdf")
+    os.utime(file_path, ns=(0, 0))
+
+    document_conversion.file_bytes_to_pdf(b"%PDF-1.4 upload", file_path)
+
+    assert file_path.stat().st_mtime_ns == 0
+    assert file_path.read_bytes() == b"%PDF-1.4 upload"
@@ -0,0 +1,97 @@
+from typing import Any, List
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from utilities.inference_backend import InferenceBackend
+
+
+class Model:
+    def __init__(self, use_gpu: bool, outputs: np.ndarray) -> None:
+        self.use_gpu: bool = use_gpu
+        self.outputs: np.ndarray = outputs
+        self.quantized: bool = False
+
+
+def get_loader(loaded_models: List[Model]):
+    def loader(use_gpu: bool) -> Model:
+        model: Model = Model(use_gpu, np.eye(4, dtype=np.float32) + 1)
+        loaded_models.append(model)
+        return model
+
+    return loader
+
+
+def get_quantize(noise: float, quantized_module_count: int = 2):
+    def quantize(model: Model) -> int:
+        # Stands in for dynamic int8 quantization, which perturbs the model outputs.
+        model.quantized = True
+        model.outputs = model.outputs + noise * np.random.RandomState(0).standard_normal(model.outputs.shape)
+        return quantized_module_count
+
+    return quantize
+
+
+def get_probe_outputs(model: Any) -> np.ndarray:
+    return model.outputs
+
+
+@pytest.mark.parametrize("backend,use_gpu", [("default", True), ("cpu", False)])
+def test_full_precision_backends_load_once(backend: str, use_gpu: bool):
+    inference_backend: InferenceBackend = InferenceBackend(min_cosine_similarity=0.98)
+    loaded_models: List[Model] = []
+
+    model: Model = inference_backend.load("model", backend, get_loader(loaded_models), get_probe_outputs)
+
+    assert loaded_models == [model]
+    assert model.use_gpu is use_gpu
+    assert inference_backend.get_statistics()["accuracy_reports"] == {}
+
+
+def test_unsupported_backend_raises():
+    with pytest.raises(ValueError):
+        InferenceBackend(min_cosine_similarity=0.98).load("model", "gpu_int4", get_loader([]), get_probe_outputs)
+
+
+def test_accurate_int8_model_is_served(monkeypatch):
+    inference_backend: InferenceBackend = InferenceBackend(min_cosine_similarity=0.98)
+    monkeypatch.setattr(inference_backend, "quantize", get_quantize(noise=0.01))
+
+    model: Model = inference_backend.load("model", "cpu_int8", get_loader([]), get_probe_outputs)
+
+    assert model.quantized and model.use_gpu is False
+    accuracy_report: dict = inference_backend.get_statistics()["accuracy_reports"]["model"]
+    assert accuracy_report["accepted"] is True
+    assert accuracy_report["quantized_module_count"] == 2
+    assert accuracy_report["min_cosine_similarity"] >= 0.98
+
+
+def test_inaccurate_int8_model_falls_back_to_full_precision(monkeypatch):
+    inference_backend: InferenceBackend = InferenceBackend(min_cosine_similarity=0.98)
+    monkeypatch.setattr(inference_backend, "quantize", get_quantize(noise=1.0))
+    loaded_models: List[Model] = []
+
+    model: Model = inference_backend.load("model", "cpu_int8", get_loader(loaded_models), get_probe_outputs)
+
+    assert not model.quantized and model is loaded_models[1]
+    assert inference_backend.get_statistics()["accuracy_reports"]["model"]["accepted"] is False
+
+
+def test_model_without_quantizable_modules_is_served_as_is(monkeypatch):
+    inference_backend: InferenceBackend = InferenceBackend(min_cosine_similarity=0.98)
+    monkeypatch.setattr(inference_backend, "quantize", get_quantize(noise=0.0, quantized_module_count=0))
+    loaded_models: List[Model] = []
+
+    model: Model = inference_backend.load("model", "cpu_int8", get_loader(loaded_models), get_probe_outputs)
+
+    assert loaded_models == [model]
+    assert inference_backend.get_statistics()["accuracy_reports"] == {}
+
+
+def test_precision_suffix_only_separates_int8():
+    inference_backend: InferenceBackend = InferenceBackend(min_cosine_similarity=0.98)
+
+    assert [inference_backend.get_precision_suffix(backend) for backend in InferenceBackend.BACKENDS] == \
+        ["", "", "_int8"]
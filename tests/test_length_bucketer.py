@@ -0,0 +1,44 @@
+from typing import List
+
+import numpy as np
+import pytest
+
+from utilities.length_bucketer import LengthBucketer
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_scatter_restores_input_order(seed: int):
+    length_bucketer: LengthBucketer = LengthBucketer(batch_token_budget=64, max_batch_size=8, characters_per_token=4.0)
+    random_state: np.random.RandomState = np.random.RandomState(seed)
+    texts: List[str] = ["x" * int(length) for length in random_state.randint(0, 200, size=50)]
+
+    batches: List[np.ndarray] = length_bucketer.get_batches(length_bucketer.get_token_lengths(texts))
+    # Each output row encodes the text it was computed from, as an encoder would.
+    batch_outputs: List[np.ndarray] = [
+        np.asarray([[len(texts[index]), index] for index in batch.tolist()]) for batch in batches
+    ]
+
+    outputs: np.ndarray = length_bucketer.scatter(batches, batch_outputs)
+
+    np.testing.assert_array_equal(outputs, [[len(text), index] for index, text in enumerate(texts)])
+
+
+def test_batches_cover_every_text_once_within_the_budget():
+    length_bucketer: LengthBucketer = LengthBucketer(batch_token_budget=100, max_batch_size=6, characters_per_token=1.0)
+    token_lengths: np.ndarray = np.asarray([5, 120, 30, 30, 10, 1, 50, 20, 5, 5, 5, 5, 5, 5])
+
+    batches: List[np.ndarray] = length_bucketer.get_batches(token_lengths)
+
+    np.testing.assert_array_equal(np.sort(np.concatenate(batches)), np.arange(len(token_lengths)))
+    batch_max_lengths: List[int] = [int(token_lengths[batch].max()) for batch in batches]
+    assert batch_max_lengths == sorted(batch_max_lengths, reverse=True)
+    for batch in batches:
+        assert len(batch) <= 6
+        # A text longer than the budget still gets a batch of its own.
+        assert len(batch) == 1 or len(batch) * token_lengths[batch].max() <= 100
+
+
+def test_token_lengths_are_at_least_one():
+    length_bucketer: LengthBucketer = LengthBucketer(batch_token_budget=100, max_batch_size=6, characters_per_token=4.0)
+
+    np.testing.assert_array_equal(length_bucketer.get_token_lengths(["", "abc", "abcde"]), [1, 1, 2])
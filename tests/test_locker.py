@@ -0,0 +1,116 @@
+import threading
+import time
+from typing import List
+
+import pytest
+
+from utilities import locker
+
+
+def run_threads(target, count: int) -> List[threading.Thread]:
+    threads: List[threading.Thread] = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_single_flight_shares_one_call():
+    started: threading.Event = threading.Event()
+    released: threading.Event = threading.Event()
+    calls: List[str] = []
+    results: List[str] = []
+
+    @locker.single_flight(key=lambda value: value)
+    def compute(value: str) -> str:
+        calls.append(value)
+        started.set()
+        released.wait(5)
+        return value.upper()
+
+    threads: List[threading.Thread] = run_threads(lambda: results.append(compute("key")), 1)
+    assert started.wait(5)
+    threads += run_threads(lambda: results.append(compute("key")), 4)
+    time.sleep(0.2)
+    released.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["key"]
+    assert results == ["KEY"] * 5
+    assert locker.get_statistics()["functions"][compute.__qualname__]["shared_count"] == 4
+    assert compute("key") == "KEY"
+    assert calls == ["key", "key"]
+
+
+def test_single_flight_shares_errors():
+    started: threading.Event = threading.Event()
+    released: threading.Event = threading.Event()
+    errors: List[BaseException] = []
+
+    @locker.single_flight(key=lambda value: value)
+    def compute(value: str) -> str:
+        started.set()
+        released.wait(5)
+        raise ValueError(value)
+
+    def call() -> None:
+        try:
+            compute("key")
+        except ValueError as error:
+            errors.append(error)
+
+    threads: List[threading.Thread] = run_threads(call, 1)
+    assert started.wait(5)
+    threads += run_threads(call, 2)
+    time.sleep(0.2)
+    released.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 3
+    assert locker.get_statistics()["in_flight_count"] == 0
+
+
+def test_keyed_lock_serializes_same_key():
+    active_counts: List[int] = [0, 0]
+
+    @locker.keyed_lock(key=lambda value: value)
+    def compute(value: str) -> None:
+        active_counts[0] += 1
+        active_counts[1] = max(active_counts[1], active_counts[0])
+        time.sleep(0.01)
+        active_counts[0] -= 1
+
+    for thread in run_threads(lambda: compute("key"), 8):
+        thread.join(5)
+
+    assert active_counts == [0, 1]
+    assert locker.get_statistics()["held_lock_count"] == 0
+
+
+def test_keyed_lock_runs_different_keys_concurrently():
+    barrier: threading.Barrier = threading.Barrier(2, timeout=5)
+
+    @locker.keyed_lock(key=lambda value: value)
+    def compute(value: str) -> None:
+        barrier.wait()
+
+    threads: List[threading.Thread] = [threading.Thread(target=compute, args=(value,)) for value in ["a", "b"]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert not barrier.broken
+
+
+def test_keyed_lock_releases_on_error():
+    @locker.keyed_lock(key=lambda value: value)
+    def compute(value: str) -> None:
+        raise ValueError(value)
+
+    with pytest.raises(ValueError):
+        compute("key")
+    with pytest.raises(ValueError):
+        compute("key")
+    assert locker.get_statistics()["held_lock_count"] == 0
@@ -0,0 +1,46 @@
+from utilities.lru_cache import LRUCache
+
+
+def test_put_evicts_least_recently_used_entries_over_budget():
+    lru_cache: LRUCache = LRUCache(max_bytes=10)
+    lru_cache.put("a", 1, 4)
+    lru_cache.put("b", 2, 4)
+    assert lru_cache.get("a") == 1
+
+    lru_cache.put("c", 3, 4)
+
+    assert "b" not in lru_cache
+    assert lru_cache.get("a") == 1
+    assert lru_cache.get("c") == 3
+    assert lru_cache.get_statistics()["resident_bytes"] == 8
+    assert lru_cache.get_statistics()["eviction_count"] == 1
+
+
+def test_put_keeps_newest_entry_above_budget():
+    lru_cache: LRUCache = LRUCache(max_bytes=10)
+    lru_cache.put("a", 1, 4)
+    lru_cache.put("b", 2, 20)
+
+    assert len(lru_cache) == 1
+    assert lru_cache.get("b") == 2
+    assert lru_cache.get_statistics()["resident_bytes"] == 20
+
+
+def test_put_replaces_existing_entry_size():
+    lru_cache: LRUCache = LRUCache(max_bytes=10)
+    lru_cache.put("a", 1, 4)
+    lru_cache.put("a", 2, 6)
+
+    assert lru_cache.get("a") == 2
+    assert lru_cache.get_statistics()["resident_bytes"] == 6
+
+
+def test_pop_and_miss_counting():
+    lru_cache: LRUCache = LRUCache(max_bytes=10)
+    lru_cache.put("a", 1, 4)
+
+    assert lru_cache.pop("a") == 1
+    assert lru_cache.pop("a") is None
+    assert lru_cache.get("a") is None
+    assert lru_cache.get_statistics()["resident_bytes"] == 0
+    assert lru_cache.get_statistics()["miss_count"] == 1
@@ -0,0 +1,85 @@
+import threading
+from typing import Dict, List
+
+import pytest
+
+from utilities.micro_batcher import MicroBatcher
+
+
+def submit_all(micro_batcher: MicroBatcher, key: str, items: List[int], batch_function) -> Dict[int, object]:
+    results: Dict[int, object] = {}
+
+    def submit(item: int) -> None:
+        try:
+            results[item] = micro_batcher.submit(key, item, batch_function)
+        except Exception as error:
+            results[item] = error
+
+    threads: List[threading.Thread] = [threading.Thread(target=submit, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_submits_share_a_batch():
+    micro_batcher: MicroBatcher = MicroBatcher(max_batch_size=4, max_wait_seconds=2.0)
+    batches: List[List[int]] = []
+
+    def batch_function(items: List[int]) -> List[int]:
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    results: Dict[int, object] = submit_all(micro_batcher, "key", [1, 2, 3, 4], batch_function)
+
+    assert results == {1: 10, 2: 20, 3: 30, 4: 40}
+    assert len(batches) == 1 and sorted(batches[0]) == [1, 2, 3, 4]
+    assert micro_batcher.get_statistics()["key"]["batch_size_histogram"] == {4: 1}
+
+
+def test_batches_are_capped_and_routed():
+    micro_batcher: MicroBatcher = MicroBatcher(max_batch_size=3, max_wait_seconds=0.05)
+    batch_sizes: List[int] = []
+
+    def batch_function(items: List[int]) -> List[int]:
+        batch_sizes.append(len(items))
+        return [-item for item in items]
+
+    results: Dict[int, object] = submit_all(micro_batcher, "key", list(range(10)), batch_function)
+
+    assert results == {item: -item for item in range(10)}
+    assert sum(batch_sizes) == 10 and max(batch_sizes) <= 3
+    assert micro_batcher.get_statistics()["key"]["item_count"] == 10
+
+
+def test_keys_are_batched_separately():
+    micro_batcher: MicroBatcher = MicroBatcher(max_batch_size=8, max_wait_seconds=0.05)
+    batches: List[List[str]] = []
+
+    def batch_function(items: List[str]) -> List[str]:
+        batches.append(list(items))
+        return items
+
+    threads: List[threading.Thread] = [
+        threading.Thread(target=micro_batcher.submit, args=(key, key, batch_function)) for key in ["a", "b", "a"]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert sorted(sorted(batch) for batch in batches) == [["a", "a"], ["b"]]
+
+
+def test_batch_errors_reach_every_caller():
+    micro_batcher: MicroBatcher = MicroBatcher(max_batch_size=3, max_wait_seconds=0.5)
+
+    def batch_function(items: List[int]) -> List[int]:
+        raise ValueError("batch failed")
+
+    results: Dict[int, object] = submit_all(micro_batcher, "key", [1, 2, 3], batch_function)
+
+    assert all(isinstance(result, ValueError) for result in results.values()) and len(results) == 3
+    with pytest.raises(ValueError):
+        micro_batcher.submit("key", 4, batch_function)
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from utilities import result_cache as result_cache_module
+from utilities.result_cache import ResultCache
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now: float = time.time()
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock: Clock = Clock()
+    monkeypatch.setattr(result_cache_module.time, "time", clock.time)
+    return clock
+
+
+def get_result_cache(tmp_path: Path, memory_max_bytes: int = 1024 ** 2, disk_max_bytes: int = 1024 ** 2,
+                     ttl_seconds: float = 60) -> ResultCache:
+    return ResultCache(
+        cache_path=tmp_path,
+        memory_max_bytes=memory_max_bytes,
+        disk_max_bytes=disk_max_bytes,
+        ttl_seconds=ttl_seconds
+    )
+
+
+def test_results_are_served_from_memory_then_disk(tmp_path: Path):
+    result_cache: ResultCache = get_result_cache(tmp_path)
+    result_cache.put("search", "key", {"documents": [1, 2]})
+
+    assert result_cache.get("search", "key") == {"documents": [1, 2]}
+    assert get_result_cache(tmp_path).get("search", "key") == {"documents": [1, 2]}
+    assert result_cache.get("search", "other") is None
+    assert result_cache.get("other", "key") is None
+    assert result_cache.get_statistics()["memory_hit_count"] == 1
+    assert result_cache.get_statistics()["miss_count"] == 2
+
+
+def test_results_expire_after_the_ttl(tmp_path: Path, clock: Clock):
+    result_cache: ResultCache = get_result_cache(tmp_path, ttl_seconds=60)
+    result_cache.put("search", "key", "result")
+    result_file_path: Path = result_cache.get_result_file_path("search", "key")
+    os.utime(result_file_path, (clock.now, clock.now))
+
+    clock.now += 30
+    assert result_cache.get("search", "key") == "result"
+
+    clock.now += 31
+    assert result_cache.get("search", "key") is None
+    assert not result_file_path.exists()
+    assert result_cache.get_statistics()["expired_count"] == 1
+
+
+def test_memory_evicts_least_recently_used_results(tmp_path: Path):
+    result_cache: ResultCache = get_result_cache(tmp_path, memory_max_bytes=150)
+    for key in ["a", "b", "c"]:
+        result_cache.put("search", key, key * 50)
+        result_cache.get("search", "a")
+
+    assert ("search", "a") in result_cache.memory_cache
+    assert ("search", "b") not in result_cache.memory_cache
+    # An evicted result is still read back from disk.
+    assert result_cache.get("search", "b") == "b" * 50
+    assert result_cache.get_statistics()["disk_hit_count"] == 1
+
+
+def test_disk_evicts_least_recently_read_results(tmp_path: Path):
+    result_cache: ResultCache = get_result_cache(tmp_path, disk_max_bytes=250)
+    for index, key in enumerate(["a", "b", "c"]):
+        result_cache.put("search", key, key * 100)
+        result_file_path: Path = result_cache.get_result_file_path("search", key)
+        os.utime(result_file_path, (1_000 + index, result_file_path.stat().st_mtime))
+
+    assert not result_cache.get_result_file_path("search", "a").exists()
+    assert result_cache.get_result_file_path("search", "b").exists()
+    assert result_cache.get_result_file_path("search", "c").exists()
+    assert result_cache.get_statistics()["disk_eviction_count"] == 1
+
+
+def test_unpicklable_results_are_not_cached(tmp_path: Path):
+    result_cache: ResultCache = get_result_cache(tmp_path)
+
+    result_cache.put("search", "key", {"lock": threading.Lock()})
+
+    assert result_cache.get("search", "key") is None
+    assert not result_cache.get_result_file_path("search", "key").exists()
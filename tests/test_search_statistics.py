@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+import pytest
+
+from sub_apps.passage_search.search_statistics import OverlappedScores, search_statistics
+
+
+def get_windowed_document(index_window: int, window_size: int, score: float) -> SimpleNamespace:
+    return SimpleNamespace(meta={"index_window": index_window, "window_size": window_size}, score=score)
+
+
+def get_naive_overlapped_scores(windowed_documents: List[SimpleNamespace]) -> Dict[int, List[float]]:
+    source_scores: Dict[int, List[float]] = {}
+    for windowed_document in windowed_documents:
+        index_window: int = windowed_document.meta["index_window"]
+        for source_index in range(index_window, index_window + windowed_document.meta["window_size"]):
+            source_scores.setdefault(source_index, []).append(windowed_document.score)
+    return source_scores
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_overlapped_scores_match_naive_loop(seed: int):
+    random_state: np.random.RandomState = np.random.RandomState(seed)
+    windowed_documents: List[SimpleNamespace] = [
+        get_windowed_document(
+            index_window=int(random_state.randint(0, 50)),
+            window_size=int(random_state.randint(1, 6)),
+            score=float(random_state.uniform(-1, 1))
+        )
+        for _ in range(40)
+    ]
+
+    overlapped_scores: OverlappedScores = search_statistics.get_document_indexes_with_overlapped_scores(
+        windowed_documents
+    )
+    source_scores: Dict[int, List[float]] = get_naive_overlapped_scores(windowed_documents)
+
+    np.testing.assert_array_equal(overlapped_scores.source_indexes, sorted(source_scores))
+    np.testing.assert_array_equal(
+        overlapped_scores.counts, [len(source_scores[source_index]) for source_index in sorted(source_scores)]
+    )
+    np.testing.assert_allclose(
+        overlapped_scores.score_means,
+        [np.mean(source_scores[source_index]) for source_index in sorted(source_scores)],
+        atol=1e-12
+    )
+
+
+def test_overlapped_scores_of_no_documents():
+    overlapped_scores: OverlappedScores = search_statistics.get_document_indexes_with_overlapped_scores([])
+
+    assert len(overlapped_scores) == 0
+
+
+def test_top_overlapped_scores_are_sorted():
+    overlapped_scores: OverlappedScores = OverlappedScores(
+        source_indexes=np.arange(6),
+        counts=np.ones(6, dtype=np.int64),
+        score_means=np.asarray([0.2, 0.9, 0.1, 0.5, 0.9, 0.3])
+    )
+
+    top_overlapped_scores: OverlappedScores = search_statistics.get_top_overlapped_scores(overlapped_scores, 3)
+
+    np.testing.assert_array_equal(top_overlapped_scores.score_means, [0.9, 0.9, 0.5])
+    assert set(top_overlapped_scores.source_indexes.tolist()) == {1, 3, 4}
+    assert len(search_statistics.get_top_overlapped_scores(overlapped_scores, 10)) == 6
+    assert len(search_statistics.get_top_overlapped_scores(overlapped_scores, 0)) == 0
+
+
+def test_source_index_recall():
+    reference_windowed_documents: List[SimpleNamespace] = [
+        get_windowed_document(0, 2, 1.0),
+        get_windowed_document(5, 2, 1.0),
+    ]
+    candidate_windowed_documents: List[SimpleNamespace] = [
+        get_windowed_document(1, 3, 1.0),
+    ]
+
+    assert search_statistics.get_source_index_recall(
+        reference_windowed_documents, candidate_windowed_documents
+    ) == pytest.approx(0.25)
+    assert search_statistics.get_source_index_recall(
+        reference_windowed_documents, reference_windowed_documents
+    ) == 1.0
+    assert search_statistics.get_source_index_recall([], candidate_windowed_documents) == 1.0
@@ -0,0 +1,122 @@
+from typing import List
+
+import numpy as np
+import pytest
+
+pytest.importorskip("haystack")
+
+from sub_apps.passage_search.sparse_index import SparseIndex, sparse_indexer
+from utilities.windowed_corpus import WindowedCorpus
+
+SEGMENTS: List[str] = [
+    "alpha beta gamma",
+    "gamma gamma delta",
+    "beta epsilon",
+    "zeta eta theta gamma",
+    "alpha alpha alpha",
+    "delta epsilon zeta",
+]
+
+
+def get_windowed_corpus(segments: List[str], window_sizes: List[int]) -> WindowedCorpus:
+    segment_lengths: np.ndarray = np.asarray([len(segment) for segment in segments], dtype=np.int64)
+    segment_starts: np.ndarray = np.concatenate([[0], np.cumsum(segment_lengths + 1)[:-1]]).astype(np.int64)
+    window_starts: List[int] = []
+    window_sizes_list: List[int] = []
+    for window_size in window_sizes:
+        for window_start in range(len(segments) - window_size + 1):
+            window_starts.append(window_start)
+            window_sizes_list.append(window_size)
+
+    return WindowedCorpus(
+        buffer=" ".join(segments),
+        segment_starts=segment_starts,
+        segment_ends=segment_starts + segment_lengths,
+        segment_pages=np.ones(len(segments), dtype=np.int32),
+        window_starts=np.asarray(window_starts, dtype=np.int32),
+        window_sizes=np.asarray(window_sizes_list, dtype=np.int32)
+    )
+
+
+@pytest.mark.parametrize("query", ["gamma gamma", "alpha beta", "gamma delta theta", "unknown"])
+def test_bm25_scores_match_rank_bm25(query: str):
+    rank_bm25 = pytest.importorskip("rank_bm25")
+    windowed_corpus: WindowedCorpus = get_windowed_corpus(SEGMENTS, [1])
+    sparse_index: SparseIndex = sparse_indexer.build(windowed_corpus)
+    bm25_okapi = rank_bm25.BM25Okapi([SparseIndex.tokenize(segment) for segment in SEGMENTS])
+
+    np.testing.assert_allclose(
+        sparse_index.get_bm25_scores(query),
+        bm25_okapi.get_scores(SparseIndex.tokenize(query)),
+        atol=1e-6
+    )
+
+
+def test_tfidf_scores_are_cosine_similarities():
+    windowed_corpus: WindowedCorpus = get_windowed_corpus(SEGMENTS, [1])
+    sparse_index: SparseIndex = sparse_indexer.build(windowed_corpus)
+
+    scores: np.ndarray = sparse_index.get_tfidf_scores("alpha alpha alpha")
+
+    assert scores.argmax() == 4
+    assert scores[4] == pytest.approx(1.0, abs=1e-6)
+    assert np.all(scores <= 1.0 + 1e-6)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    windowed_corpus: WindowedCorpus = get_windowed_corpus(SEGMENTS, [1, 2])
+    sparse_index: SparseIndex = sparse_indexer.build(windowed_corpus)
+
+    loaded_sparse_index: SparseIndex = sparse_indexer.load(sparse_indexer.save(sparse_index, tmp_path / "sparse"))
+
+    assert loaded_sparse_index.vocabulary == sparse_index.vocabulary
+    np.testing.assert_array_equal(loaded_sparse_index.get_bm25_scores("gamma"), sparse_index.get_bm25_scores("gamma"))
+    np.testing.assert_array_equal(
+        loaded_sparse_index.get_top_k(loaded_sparse_index.get_bm25_scores("gamma"), 3, {"window_size": 2}),
+        sparse_index.get_top_k(sparse_index.get_bm25_scores("gamma"), 3, {"window_size": 2})
+    )
+
+
+@pytest.mark.parametrize("new_segments", [
+    SEGMENTS[:2] + ["iota kappa gamma"] + SEGMENTS[2:],
+    SEGMENTS[:1] + SEGMENTS[2:],
+    SEGMENTS[:3] + ["zeta eta theta lambda"] + SEGMENTS[4:],
+    ["mu nu"] + SEGMENTS + ["alpha omega"],
+])
+def test_update_matches_build(new_segments: List[str]):
+    from utilities.window_differ import window_differ
+
+    old_windowed_corpus: WindowedCorpus = get_windowed_corpus(SEGMENTS, [1, 2, 3])
+    new_windowed_corpus: WindowedCorpus = get_windowed_corpus(new_segments, [1, 2, 3])
+    window_mapping: np.ndarray = window_differ.get_window_mapping(
+        old_layout=window_differ.get_layout(old_windowed_corpus),
+        new_layout=window_differ.get_layout(new_windowed_corpus)
+    )
+    assert np.any(window_mapping != -1)
+
+    updated_sparse_index: SparseIndex = sparse_indexer.update(
+        sparse_index=sparse_indexer.build(old_windowed_corpus),
+        windowed_corpus=new_windowed_corpus,
+        window_mapping=window_mapping
+    )
+    built_sparse_index: SparseIndex = sparse_indexer.build(new_windowed_corpus)
+
+    # Term ids differ between the two, so postings are compared through the vocabulary.
+    for term, built_term_id in built_sparse_index.vocabulary.items():
+        updated_term_id: int = updated_sparse_index.vocabulary[term]
+        for updated_postings, built_postings in zip(
+                updated_sparse_index.get_postings(updated_term_id), built_sparse_index.get_postings(built_term_id)
+        ):
+            np.testing.assert_array_equal(updated_postings, built_postings)
+        assert updated_sparse_index.bm25_idfs[updated_term_id] == built_sparse_index.bm25_idfs[built_term_id]
+        assert updated_sparse_index.tfidf_idfs[updated_term_id] == built_sparse_index.tfidf_idfs[built_term_id]
+
+    np.testing.assert_array_equal(updated_sparse_index.document_lengths, built_sparse_index.document_lengths)
+    np.testing.assert_array_equal(updated_sparse_index.tfidf_norms, built_sparse_index.tfidf_norms)
+    for query in ["gamma gamma", "alpha zeta", "iota kappa lambda", "mu omega beta"]:
+        np.testing.assert_array_equal(
+            updated_sparse_index.get_bm25_scores(query), built_sparse_index.get_bm25_scores(query)
+        )
+        np.testing.assert_array_equal(
+            updated_sparse_index.get_tfidf_scores(query), built_sparse_index.get_tfidf_scores(query)
+        )
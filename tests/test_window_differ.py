@@ -0,0 +1,106 @@
+from typing import Dict, List
+
+import numpy as np
+import pytest
+
+pytest.importorskip("haystack")
+
+from utilities.window_differ import window_differ
+
+
+def get_layout(segment_hashes: List[int], window_sizes: List[int]) -> Dict[str, np.ndarray]:
+    window_starts: List[int] = []
+    window_sizes_list: List[int] = []
+    for window_size in window_sizes:
+        for window_start in range(len(segment_hashes) - window_size + 1):
+            window_starts.append(window_start)
+            window_sizes_list.append(window_size)
+
+    return {
+        "segment_hashes": np.asarray(segment_hashes, dtype=np.int64),
+        "window_starts": np.asarray(window_starts, dtype=np.int64),
+        "window_sizes": np.asarray(window_sizes_list, dtype=np.int64),
+    }
+
+
+def get_expected_window_mapping(old_layout: Dict[str, np.ndarray], new_layout: Dict[str, np.ndarray]) -> np.ndarray:
+    # Hashes are unique in these tests, so a window is kept exactly when its segment sequence existed before.
+    old_windows: Dict[tuple, int] = {
+        tuple(old_layout["segment_hashes"][window_start:window_start + window_size]): window_index
+        for window_index, (window_start, window_size) in enumerate(
+            zip(old_layout["window_starts"], old_layout["window_sizes"])
+        )
+    }
+    return np.asarray([
+        old_windows.get(tuple(new_layout["segment_hashes"][window_start:window_start + window_size]), -1)
+        for window_start, window_size in zip(new_layout["window_starts"], new_layout["window_sizes"])
+    ], dtype=np.int64)
+
+
+@pytest.mark.parametrize("old_segment_hashes,new_segment_hashes,expected_segment_mapping", [
+    ([1, 2, 3, 4], [1, 2, 3, 4], [0, 1, 2, 3]),
+    ([1, 2, 3, 4], [1, 2, 9, 3, 4], [0, 1, -1, 2, 3]),
+    ([1, 2, 3, 4], [1, 3, 4], [0, 2, 3]),
+    ([1, 2, 3, 4], [1, 9, 3, 4], [0, -1, 2, 3]),
+    ([1, 2, 3, 4], [8, 1, 2, 3, 4, 9], [-1, 0, 1, 2, 3, -1]),
+    ([1, 2, 3, 4, 5, 6], [1, 5, 6, 9, 2, 3], [0, -1, -1, -1, 1, 2]),
+    ([1, 2, 3], [], []),
+    ([], [1, 2], [-1, -1]),
+])
+def test_segment_mapping(old_segment_hashes: List[int], new_segment_hashes: List[int],
+                         expected_segment_mapping: List[int]):
+    segment_mapping: np.ndarray = window_differ.get_segment_mapping(
+        old_segment_hashes=np.asarray(old_segment_hashes, dtype=np.int64),
+        new_segment_hashes=np.asarray(new_segment_hashes, dtype=np.int64)
+    )
+
+    np.testing.assert_array_equal(segment_mapping, expected_segment_mapping)
+
+
+@pytest.mark.parametrize("new_segment_hashes", [
+    [1, 2, 3, 4, 5, 6, 7, 8],
+    [1, 2, 3, 9, 4, 5, 6, 7, 8],
+    [1, 2, 3, 5, 6, 7, 8],
+    [1, 2, 3, 9, 5, 6, 7, 8],
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
+])
+def test_window_mapping(new_segment_hashes: List[int]):
+    old_layout: Dict[str, np.ndarray] = get_layout([1, 2, 3, 4, 5, 6, 7, 8], [1, 2, 3])
+    new_layout: Dict[str, np.ndarray] = get_layout(new_segment_hashes, [1, 2, 3])
+
+    window_mapping: np.ndarray = window_differ.get_window_mapping(old_layout=old_layout, new_layout=new_layout)
+
+    np.testing.assert_array_equal(window_mapping, get_expected_window_mapping(old_layout, new_layout))
+
+
+def test_window_mapping_only_reuses_identical_windows():
+    old_layout: Dict[str, np.ndarray] = get_layout([1, 2, 3, 4, 5, 6, 7, 8], [1, 2, 3])
+    new_layout: Dict[str, np.ndarray] = get_layout([5, 6, 7, 8, 1, 2, 3, 4], [1, 2, 3])
+
+    window_mapping: np.ndarray = window_differ.get_window_mapping(old_layout=old_layout, new_layout=new_layout)
+
+    # Moved blocks may be embedded again, but a reused window must always hold the same segments.
+    expected_window_mapping: np.ndarray = get_expected_window_mapping(old_layout, new_layout)
+    reused: np.ndarray = window_mapping != -1
+    assert reused.any()
+    np.testing.assert_array_equal(window_mapping[reused], expected_window_mapping[reused])
+
+
+def test_window_mapping_skips_changed_window_sizes():
+    old_layout: Dict[str, np.ndarray] = get_layout([1, 2, 3, 4], [2])
+    new_layout: Dict[str, np.ndarray] = get_layout([1, 2, 3, 4], [1, 2])
+
+    window_mapping: np.ndarray = window_differ.get_window_mapping(old_layout=old_layout, new_layout=new_layout)
+
+    np.testing.assert_array_equal(window_mapping, [-1, -1, -1, -1, 0, 1, 2])
+
+
+def test_layout_round_trip(tmp_path):
+    layout: Dict[str, np.ndarray] = get_layout([1, 2, 3], [1, 2])
+
+    window_differ.save_layout(layout, tmp_path / "layout" / "window_layout.npz")
+    loaded_layout: Dict[str, np.ndarray] = window_differ.load_layout(tmp_path / "layout" / "window_layout.npz")
+
+    assert loaded_layout.keys() == layout.keys()
+    for name in layout:
+        np.testing.assert_array_equal(loaded_layout[name], layout[name])
@@ -0,0 +1,97 @@
+from typing import List, Tuple
+
+import numpy as np
+import pytest
+
+pytest.importorskip("txtai")
+pytest.importorskip("pdfkit")
+pytest.importorskip("pydantic")
+
+from utilities.document_processor import DocumentProcessor, document_processor
+from utilities.windowed_corpus import WindowedCorpus
+
+SEGMENTS: List[str] = [f"Segment {index} has some words." for index in range(10)]
+
+
+@pytest.mark.parametrize("segment_count,window_size,window_stride,expected_window_starts", [
+    (10, 3, 1, [0, 1, 2, 3, 4, 5, 6, 7]),
+    (10, 3, 2, [0, 2, 4, 6, 7]),
+    (10, 3, 3, [0, 3, 6, 7]),
+    (9, 3, 3, [0, 3, 6]),
+    (10, 3, 5, [0, 3, 6, 7]),
+    (4, 10, 2, [0]),
+    (1, 1, 1, [0]),
+    (0, 3, 1, []),
+])
+def test_windowize(segment_count: int, window_size: int, window_stride: int, expected_window_starts: List[int]):
+    window_starts, window_sizes = document_processor.windowize(segment_count, window_size, window_stride)
+
+    np.testing.assert_array_equal(window_starts, expected_window_starts)
+    np.testing.assert_array_equal(window_sizes, [min(window_size, segment_count)] * len(expected_window_starts))
+    # Every segment stays covered by some window.
+    covered: np.ndarray = np.zeros(segment_count, dtype=bool)
+    for window_start, window_size in zip(window_starts, window_sizes):
+        covered[window_start:window_start + window_size] = True
+    assert covered.all()
+
+
+def test_windowize_rejects_non_positive_stride():
+    with pytest.raises(ValueError):
+        document_processor.windowize(10, 3, 0)
+
+
+def test_windowize_by_token_budget():
+    window_starts, window_sizes = document_processor.windowize_by_token_budget(
+        segment_token_counts=np.asarray([4, 4, 4, 20, 4, 4]),
+        window_token_budget=10,
+        window_stride=2
+    )
+
+    np.testing.assert_array_equal(window_starts, [0, 2, 4])
+    np.testing.assert_array_equal(window_sizes, [2, 1, 2])
+
+
+def get_windowed_corpus(monkeypatch, granularity: str, window_sizes: List[int], window_strides: List[int],
+                        window_token_budget: int = None, token_budget_window_stride: int = None) -> WindowedCorpus:
+    processor: DocumentProcessor = DocumentProcessor()
+
+    def granularize_with_pages(corpus: str, corpus_source_type: str, granularity: str) -> Tuple[List[str], List[int]]:
+        return list(SEGMENTS), [1] * 5 + [2] * 5
+
+    monkeypatch.setattr(processor, "granularize_with_pages", granularize_with_pages)
+    return processor.process(
+        corpus="",
+        corpus_source_type="text",
+        granularity=granularity,
+        window_sizes=window_sizes,
+        window_strides=window_strides,
+        window_token_budget=window_token_budget,
+        token_budget_window_stride=token_budget_window_stride
+    )
+
+
+@pytest.mark.parametrize("granularity", ["sentence", "paragraph"])
+def test_process_window_texts_join_segments(monkeypatch, granularity: str):
+    windowed_corpus: WindowedCorpus = get_windowed_corpus(monkeypatch, granularity, [1, 2, 3], [1, 2])
+    separator: str = document_processor.get_separator(granularity)
+
+    assert windowed_corpus.get_segments() == SEGMENTS
+    for window_index in range(windowed_corpus.get_window_count()):
+        window_start: int = int(windowed_corpus.window_starts[window_index])
+        window_size: int = int(windowed_corpus.window_sizes[window_index])
+        assert windowed_corpus.get_window_text(window_index) == \
+            separator.join(SEGMENTS[window_start:window_start + window_size])
+
+
+def test_process_indexes_each_span_once(monkeypatch):
+    windowed_corpus: WindowedCorpus = get_windowed_corpus(
+        monkeypatch, "sentence", [1, 2, 2], [1], window_token_budget=18, token_budget_window_stride=1
+    )
+
+    window_spans: List[Tuple[int, int]] = list(zip(
+        windowed_corpus.window_starts.tolist(), windowed_corpus.window_sizes.tolist()
+    ))
+    expected_window_spans: List[Tuple[int, int]] = \
+        [(window_start, 1) for window_start in range(10)] + [(window_start, 2) for window_start in range(9)]
+    # Each segment counts 8 tokens, so the budget windows match the size 2 ones and add nothing new.
+    assert window_spans == expected_window_spans
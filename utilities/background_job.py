@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class BackgroundJob:
+    def __init__(self, key: str, name: str) -> None:
+        self.key: str = key
+        self.name: str = name
+        self.status: str = "queued"
+        self.done_count: int = 0
+        self.total_count: Optional[int] = None
+        self.created_at: float = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.result: Any = None
+        self.lock: threading.Lock = threading.Lock()
+
+    def is_running(self) -> bool:
+        return self.status in ["queued", "running"]
+
+    def set_total(self, total_count: int) -> None:
+        # Nested steps report their own totals, the job shows the step currently running.
+        with self.lock:
+            self.total_count = total_count
+            self.done_count = 0
+            self.started_at = time.time()
+
+    def advance(self, count: int) -> None:
+        with self.lock:
+            self.done_count += count
+
+    def get_progress(self) -> dict:
+        with self.lock:
+            elapsed_duration: float = (self.finished_at or time.time()) - (self.started_at or time.time())
+            throughput: float = self.done_count / elapsed_duration if elapsed_duration > 0 else 0.0
+            eta_duration: Optional[float] = None
+            if self.total_count is not None and throughput > 0:
+                eta_duration = (self.total_count - self.done_count) / throughput
+            return {
+                "key": self.key,
+                "name": self.name,
+                "status": self.status,
+                "done_count": self.done_count,
+                "total_count": self.total_count,
+                "throughput": throughput,
+                "eta_duration": eta_duration,
+                "error": self.error,
+            }
+
+
+class BackgroundJobRunner:
+    def __init__(self, max_workers: int, max_finished_job_count: int) -> None:
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="background_job"
+        )
+        self.max_finished_job_count: int = max_finished_job_count
+        self.jobs: Dict[str, BackgroundJob] = {}
+        self.current = threading.local()
+        self.lock: threading.Lock = threading.Lock()
+
+    def get_job(self, key: str) -> Optional[BackgroundJob]:
+        with self.lock:
+            return self.jobs.get(key)
+
+    def get_current_job(self) -> Optional[BackgroundJob]:
+        return getattr(self.current, "job", None)
+
+    def run(self, job: BackgroundJob, function: Callable[[], Any]) -> None:
+        self.current.job = job
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = function()
+            job.status = "done"
+        except Exception as job_error:
+            job.error = repr(job_error)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            self.current.job = None
+
+    def submit(self, key: str, name: str, function: Callable[[], Any]) -> BackgroundJob:
+        # Jobs outlive the session that started them, a rerun or another session picks the same job up by key.
+        with self.lock:
+            job: Optional[BackgroundJob] = self.jobs.get(key)
+            if job is not None and job.is_running():
+                return job
+
+            job = BackgroundJob(key=key, name=name)
+            self.jobs.pop(key, None)
+            self.jobs[key] = job
+            finished_jobs: List[BackgroundJob] = [
+                existing_job for existing_job in self.jobs.values() if not existing_job.is_running()
+            ]
+            for finished_job in finished_jobs[:max(0, len(finished_jobs) - self.max_finished_job_count)]:
+                del self.jobs[finished_job.key]
+
+        self.executor.submit(self.run, job, function)
+        return job
+
+    def get_statistics(self) -> List[dict]:
+        with self.lock:
+            return [job.get_progress() for job in self.jobs.values()]
+
+
+background_job_runner = BackgroundJobRunner(
+    max_workers=int(os.environ.get("BACKGROUND_JOB_MAX_WORKERS", os.cpu_count() or 4)),
+    max_finished_job_count=int(os.environ.get("BACKGROUND_JOB_MAX_FINISHED_COUNT", 32))
+)
@@ -0,0 +1,127 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import networkx as nx
+import torch
+from haystack import Pipeline
+from haystack.errors import PipelineError
+from haystack.schema import Document, MultiLabel
+
+
+class ConcurrentPipeline(Pipeline):
+    # Every node whose predecessors are done runs at once, so the dense and sparse retrievers overlap.
+    def __init__(self, executor: ThreadPoolExecutor) -> None:
+        super().__init__()
+        self.executor: ThreadPoolExecutor = executor
+
+    def run_timed_node(self, node_id: str, node_input: Dict[str, Any]) -> Tuple[Dict, str, float]:
+        time_start: float = perf_counter()
+        node_output, stream_id = self._run_node(node_id, node_input)
+        return node_output, stream_id, perf_counter() - time_start
+
+    def get_join_input(self, existing_input: dict, node_output: dict, params: Optional[dict],
+                       root_input: dict) -> dict:
+        if "inputs" in existing_input.keys():
+            existing_input["inputs"].append(node_output)
+            return existing_input
+
+        join_input: dict = {"inputs": [existing_input, node_output], "params": params, **root_input}
+        if "_debug" in existing_input.keys() or "_debug" in node_output.keys():
+            join_input["_debug"] = {**existing_input.get("_debug", {}), **node_output.get("_debug", {})}
+        return join_input
+
+    def run(  # type: ignore
+            self,
+            query: Optional[str] = None,
+            file_paths: Optional[List[str]] = None,
+            labels: Optional[MultiLabel] = None,
+            documents: Optional[List[Document]] = None,
+            meta: Optional[dict] = None,
+            params: Optional[dict] = None,
+            debug: Optional[bool] = None,
+    ) -> dict:
+        root_node: Optional[str] = self.root_node
+        if not root_node:
+            raise PipelineError("Cannot run a pipeline with no nodes.")
+
+        root_input: dict = {
+            key: value
+            for key, value in {
+                "query": query, "file_paths": file_paths, "labels": labels, "documents": documents, "meta": meta
+            }.items()
+            if value
+        }
+        # Insertion-ordered like Pipeline.run, so join nodes receive their inputs in graph order.
+        queue: Dict[str, dict] = {root_node: {"root_node": root_node, "params": params, **root_input}}
+        node_durations: Dict[str, float] = {}
+        node_output: dict = {}
+
+        while queue:
+            ready_node_ids: List[str] = [
+                node_id for node_id in queue.keys()
+                if set(nx.ancestors(self.graph, node_id)).isdisjoint(queue.keys())
+            ]
+
+            futures: Dict[str, Future] = {}
+            for node_id in ready_node_ids:
+                # Sibling branches receive the same output dict, each one gets its own copy to annotate.
+                node_input: dict = {**queue[node_id], "node_id": node_id}
+                if debug is not None:
+                    node_input["params"] = {**(node_input.get("params") or {})}
+                    node_input["params"][node_id] = {**node_input["params"].get(node_id, {}), "debug": debug}
+                futures[node_id] = self.executor.submit(self.run_timed_node, node_id, node_input)
+
+            for node_id in ready_node_ids:
+                node_output, stream_id, node_duration = futures[node_id].result()
+                node_durations[node_id] = node_duration
+                if "_debug" in node_output and node_id in node_output["_debug"]:
+                    node_output["_debug"][node_id]["exec_time_ms"] = round(node_duration * 1000, 2)
+                queue.pop(node_id)
+
+                if stream_id == "split":
+                    for split_stream_id in [key for key in node_output.keys() if key.startswith("output_")]:
+                        for next_node_id in self.get_next_nodes(node_id, split_stream_id):
+                            queue[next_node_id] = node_output[split_stream_id]
+                    continue
+
+                for next_node_id in self.get_next_nodes(node_id, stream_id):
+                    if queue.get(next_node_id):
+                        queue[next_node_id] = self.get_join_input(
+                            existing_input=queue[next_node_id],
+                            node_output=node_output,
+                            params=params,
+                            root_input=root_input
+                        )
+                    else:
+                        queue[next_node_id] = node_output
+
+        node_output["node_durations"] = node_durations
+
+        return node_output
+
+
+class PipelineExecutor:
+    def __init__(self, max_workers: int, torch_thread_count: int) -> None:
+        self.torch_thread_count: int = torch_thread_count
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="pipeline_branch",
+            initializer=self.initialize_worker
+        )
+
+    def initialize_worker(self) -> None:
+        # Concurrent branches share the cores, so torch intra-op threads are capped instead of one per core.
+        # The cap is set by each branch worker as it starts, importing this module leaves torch untouched.
+        torch.set_num_threads(self.torch_thread_count)
+
+    def get_pipeline(self) -> ConcurrentPipeline:
+        return ConcurrentPipeline(executor=self.executor)
+
+
+pipeline_executor = PipelineExecutor(
+    max_workers=int(os.environ.get("PIPELINE_MAX_WORKERS", 8)),
+    # The sparse branch is single threaded numpy, the rest of the cores go to the dense encoder.
+    torch_thread_count=int(os.environ.get("PIPELINE_TORCH_THREAD_COUNT", max(1, (os.cpu_count() or 2) - 1)))
+)
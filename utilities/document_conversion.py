@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 import pdfkit
@@ -38,8 +39,13 @@ class DocumentConversion:
 
         return output_file_path
 
-    @locker.wait_lock
-    def corpus_to_pdf(self, passage_search_request: PassageSearchRequest, output_file_path: Path) -> Path:
+    @locker.keyed_lock(key=lambda self, passage_search_request, output_file_path, overwrite=True: output_file_path)
+    def corpus_to_pdf(self, passage_search_request: PassageSearchRequest, output_file_path: Path,
+                      overwrite: bool = True) -> Path:
+        if os.path.exists(output_file_path):
+            if overwrite is False:
+                return output_file_path
+
         if passage_search_request.corpus_source_type == "text":
             result_output_file_path = self.text_to_pdf(
                 text=passage_search_request.corpus,
@@ -60,7 +66,9 @@ class DocumentConversion:
 
         return result_output_file_path
 
-    @locker.wait_lock
+    @locker.keyed_lock(
+        key=lambda self, start_page, end_page, input_file_path, output_file_path: output_file_path
+    )
     def split_pdf_page(self, start_page: int, end_page: int, input_file_path: Path, output_file_path: Path) -> Path:
         input_pdf_reader = PdfReader(input_file_path)
         output_pdf_writer = PdfWriter(output_file_path)
@@ -69,14 +77,20 @@ class DocumentConversion:
 
         return output_file_path
 
-    @locker.wait_lock
+    @locker.keyed_lock(key=lambda self, file_bytes, output_file_path: output_file_path)
     def file_bytes_to_pdf(self, file_bytes: bytes, output_file_path: Path) -> Path:
-        with open(output_file_path, "wb") as f:
+        # Uploads are named by content hash, so a complete file is kept as is and its hash memo stays valid.
+        if output_file_path.exists() and output_file_path.stat().st_size == len(file_bytes):
+            return output_file_path
+
+        temporary_output_file_path: Path = output_file_path.with_name(f"{output_file_path.name}.tmp")
+        with open(temporary_output_file_path, "wb") as f:
             f.write(file_bytes)
+        os.replace(temporary_output_file_path, output_file_path)
 
         return output_file_path
 
-    @locker.wait_lock
+    @locker.keyed_lock(key=lambda self, input_file_path: input_file_path)
     def get_pdf_page_length(self, input_file_path: Path) -> int:
         input_pdf_reader = PdfReader(input_file_path)
         pdf_page_length = len(input_pdf_reader.pages)
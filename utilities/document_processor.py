@@ -1,21 +1,51 @@
-from typing import List, Tuple
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-import more_itertools
-from haystack import Document
+import numpy as np
 from txtai.pipeline import Segmentation, Textractor
 
 from utilities import locker
+from utilities.document_conversion import document_conversion
+from utilities.fingerprint import fingerprint
+from utilities.segment_cache import segment_cache
+from utilities.windowed_corpus import WindowedCorpus
 
 
 class DocumentProcessor:
+    TOKEN_PATTERN: re.Pattern = re.compile(r"\w+|[^\w\s]")
+
+    def __init__(self) -> None:
+        self.segmentators: Dict[str, Segmentation] = {}
+        self.textractors: Dict[str, Textractor] = {}
+
+    def get_segmentator(self, granularity: str) -> Segmentation:
+        if granularity not in self.segmentators:
+            if granularity == "sentence":
+                self.segmentators[granularity] = Segmentation(sentences=True)
+            elif granularity == "paragraph":
+                self.segmentators[granularity] = Segmentation(paragraphs=True)
+            else:
+                raise ValueError(f"Granularity {granularity} is not supported.")
+        return self.segmentators[granularity]
+
+    def get_textractor(self, granularity: str) -> Textractor:
+        if granularity not in self.textractors:
+            if granularity == "word":
+                self.textractors[granularity] = Textractor()
+            elif granularity == "sentence":
+                self.textractors[granularity] = Textractor(sentences=True)
+            elif granularity == "paragraph":
+                self.textractors[granularity] = Textractor(paragraphs=True)
+            else:
+                raise ValueError(f"Granularity {granularity} is not supported.")
+        return self.textractors[granularity]
 
     def segment(self, corpus: str, granularity: str) -> List[str]:
         granularized_corpus: List[str] = []
-        if (granularity == "sentence"):
-            segmentator = Segmentation(sentences=True)
-            granularized_corpus = segmentator(text=corpus)
-        elif granularity == "paragraph":
-            segmentator = Segmentation(paragraphs=True)
+        if granularity in ["sentence", "paragraph"]:
+            segmentator = self.get_segmentator(granularity)
             granularized_corpus = segmentator(text=corpus)
         elif granularity == "word":
             granularized_corpus = corpus.split(" ")
@@ -24,59 +54,185 @@ class DocumentProcessor:
 
         return granularized_corpus
 
-    @locker.wait_lock
+    @locker.keyed_lock(key=lambda self, corpus, granularity: corpus)
     def textract(self, corpus: str, granularity: str) -> List[str]:
         granularized_corpus: List[str] = []
         if granularity == "word":
-            granularized_corpus = corpus.split(" ")
-        elif granularity == "sentence":
-            textractor = Textractor(sentences=True)
-            granularized_corpus = textractor(text=corpus)
-        elif granularity == "paragraph":
-            textractor = Textractor(paragraphs=True)
+            textractor = self.get_textractor(granularity)
+            granularized_corpus = textractor(text=corpus).split(" ")
+        elif granularity in ["sentence", "paragraph"]:
+            textractor = self.get_textractor(granularity)
             granularized_corpus = textractor(text=corpus)
         else:
             ValueError(f"Granularity {granularity} is not supported.")
 
         return granularized_corpus
 
-    def granularize(self, corpus: str, corpus_source_type: str, granularity: str) -> List[str]:
+    def textract_pages(self, corpus: str, granularity: str) -> Tuple[List[str], List[int]]:
+        granularized_corpus: List[str] = []
+        granularized_corpus_pages: List[int] = []
+
+        # The extracted text carries no page breaks, so each page is extracted on its own to know its segments' page.
+        # Segments therefore never span two pages, a sentence or paragraph broken by a page break becomes one segment
+        # per page. The segment cache keeps the result per content and granularity, so this runs once per corpus.
+        page_length: int = document_conversion.get_pdf_page_length(corpus)
+        with tempfile.TemporaryDirectory() as temporary_directory_path:
+            for page in range(1, page_length + 1):
+                page_file_path: Path = document_conversion.split_pdf_page(
+                    start_page=page,
+                    end_page=page,
+                    input_file_path=Path(corpus),
+                    output_file_path=Path(temporary_directory_path) / f"page_{page}.pdf"
+                )
+                granularized_page: List[str] = self.textract(str(page_file_path), granularity)
+                granularized_corpus.extend(granularized_page)
+                granularized_corpus_pages.extend([page] * len(granularized_page))
+
+        return granularized_corpus, granularized_corpus_pages
+
+    def get_segment_cache_key(self, corpus: str, corpus_source_type: str, granularity: str) -> str:
+        return segment_cache.get_key(
+            corpus_hash=fingerprint.get_corpus_hash(corpus=corpus, corpus_source_type=corpus_source_type),
+            granularity=granularity
+        )
+
+    @locker.single_flight(
+        key=lambda self, corpus, corpus_source_type, granularity: self.get_segment_cache_key(
+            corpus, corpus_source_type, granularity
+        )
+    )
+    def granularize_with_pages(self, corpus: str, corpus_source_type: str,
+                               granularity: str) -> Tuple[List[str], List[int]]:
+        segment_cache_key: str = self.get_segment_cache_key(corpus, corpus_source_type, granularity)
+        cached_granularized_corpus: Optional[Tuple[List[str], List[int]]] = segment_cache.get(segment_cache_key)
+        if cached_granularized_corpus is not None:
+            return cached_granularized_corpus
+
+        granularized_corpus, granularized_corpus_pages = self.extract_with_pages(
+            corpus, corpus_source_type, granularity
+        )
+        segment_cache.put(segment_cache_key, granularized_corpus, granularized_corpus_pages)
+
+        return granularized_corpus, granularized_corpus_pages
+
+    def extract_with_pages(self, corpus: str, corpus_source_type: str,
+                           granularity: str) -> Tuple[List[str], List[int]]:
         if corpus_source_type in ["text"]:
-            granularized_corpus = self.segment(corpus, granularity)
-        elif corpus_source_type in ["file", "web"]:
+            # Segments come from the same normalized text the cache key hashes, so equal keys mean equal segments.
+            granularized_corpus = self.segment(fingerprint.normalize_text(corpus), granularity)
+            granularized_corpus_pages = [1] * len(granularized_corpus)
+        elif corpus_source_type in ["web"]:
             granularized_corpus = self.textract(corpus, granularity)
+            granularized_corpus_pages = [1] * len(granularized_corpus)
+        elif corpus_source_type in ["file"]:
+            granularized_corpus, granularized_corpus_pages = self.textract_pages(corpus, granularity)
         else:
             raise ValueError(f"Source type {corpus_source_type} is not supported.")
-        return granularized_corpus
+        return granularized_corpus, granularized_corpus_pages
 
-    def windowize(self, corpus: List[str], window_size: int) -> List[Tuple[str, ...]]:
-        return list(more_itertools.windowed(corpus, window_size))
+    def granularize(self, corpus: str, corpus_source_type: str, granularity: str) -> List[str]:
+        granularized_corpus, granularized_corpus_pages = self.granularize_with_pages(
+            corpus, corpus_source_type, granularity
+        )
+        return granularized_corpus
 
-    def degranularize(self, windowed_corpus: Tuple[str], granularity_source: str) -> str:
-        degranularized_corpus = None
-        if granularity_source in ["word", "sentence"]:
-            degranularized_corpus = " ".join(windowed_corpus)
-        elif granularity_source in ["paragraph"]:
-            degranularized_corpus = "\n".join(windowed_corpus)
+    def get_separator(self, granularity: str) -> str:
+        if granularity in ["word", "sentence"]:
+            separator = " "
+        elif granularity in ["paragraph"]:
+            separator = "\n"
         else:
-            ValueError(f"Granularity {granularity_source} is not supported.")
-        return degranularized_corpus
-
-    def process(self, corpus: str, corpus_source_type: str, granularity: str,
-                window_sizes: List[int]) -> List[Document]:
-        granularized_corpus: List[str] = self.granularize(corpus, corpus_source_type, granularity)
-
-        processed_documents_with_many_window = []
-        for window_size in window_sizes:
-            windowed_corpus: List[Tuple[str, ...]] = self.windowize(granularized_corpus, window_size)
-            for index_window, content_window in enumerate(windowed_corpus):
-                document: Document = Document(
-                    content=self.degranularize(content_window, granularity),
-                    meta={"index_window": index_window, "window_size": window_size}
-                )
-                processed_documents_with_many_window.append(document)
-
-        return processed_documents_with_many_window
+            raise ValueError(f"Granularity {granularity} is not supported.")
+        return separator
+
+    def windowize(self, segment_count: int, window_size: int, window_stride: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        # Like more_itertools.windowed, a window larger than the corpus collapses to the whole corpus.
+        clipped_window_size: int = min(window_size, segment_count)
+        if segment_count == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        if window_stride < 1:
+            raise ValueError(f"Window stride {window_stride} must be at least 1.")
+        # One stride input applies to every size, a stride past the window size would skip segments.
+        window_stride = min(window_stride, clipped_window_size)
+
+        last_window_start: int = segment_count - clipped_window_size
+        window_starts: np.ndarray = np.arange(0, last_window_start + 1, window_stride)
+        # The tail window is always kept, so every segment stays covered whatever the stride.
+        if window_starts[-1] != last_window_start:
+            window_starts = np.append(window_starts, last_window_start)
+        window_sizes: np.ndarray = np.full(len(window_starts), clipped_window_size)
+        return window_starts, window_sizes
+
+    def windowize_by_token_budget(self, segment_token_counts: np.ndarray, window_token_budget: int,
+                                  window_stride: int) -> Tuple[np.ndarray, np.ndarray]:
+        segment_count: int = len(segment_token_counts)
+        token_count_prefixes: np.ndarray = np.concatenate([[0], np.cumsum(segment_token_counts)])
+        window_starts: np.ndarray = np.arange(0, segment_count, window_stride)
+        window_ends: np.ndarray = np.searchsorted(
+            token_count_prefixes, token_count_prefixes[window_starts] + window_token_budget, side="right"
+        ) - 1
+        # A single segment above the budget still forms a window, the encoder truncates it.
+        window_sizes: np.ndarray = np.maximum(np.minimum(window_ends, segment_count) - window_starts, 1)
+        return window_starts, window_sizes
+
+    def get_token_count(self, text: str) -> int:
+        # Word pieces run about a third longer than words and punctuation for the BERT-like passage encoders.
+        return int(np.ceil(len(self.TOKEN_PATTERN.findall(text)) * 1.3))
+
+    def process(self, corpus: str, corpus_source_type: str, granularity: str, window_sizes: List[int],
+                window_strides: Optional[List[int]] = None, window_token_budget: Optional[int] = None,
+                token_budget_window_stride: Optional[int] = None) -> WindowedCorpus:
+        granularized_corpus, granularized_corpus_pages = self.granularize_with_pages(
+            corpus, corpus_source_type, granularity
+        )
+
+        separator: str = self.get_separator(granularity)
+        segment_lengths: np.ndarray = np.fromiter(
+            (len(segment) for segment in granularized_corpus), dtype=np.int64, count=len(granularized_corpus)
+        )
+        segment_starts: np.ndarray = np.concatenate([[0], np.cumsum(segment_lengths + len(separator))[:-1]]) \
+            .astype(np.int64)[:len(granularized_corpus)]
+        segment_ends: np.ndarray = segment_starts + segment_lengths
+
+        window_strides = window_strides or [1]
+        windows: List[Tuple[np.ndarray, np.ndarray]] = [
+            self.windowize(
+                segment_count=len(granularized_corpus),
+                window_size=window_size,
+                window_stride=window_strides[min(index, len(window_strides) - 1)]
+            )
+            for index, window_size in enumerate(window_sizes)
+        ]
+        if window_token_budget is not None and token_budget_window_stride is not None \
+                and len(granularized_corpus) > 0:
+            segment_token_counts: np.ndarray = np.fromiter(
+                (self.get_token_count(segment) for segment in granularized_corpus),
+                dtype=np.int64,
+                count=len(granularized_corpus)
+            )
+            windows.append(self.windowize_by_token_budget(
+                segment_token_counts=segment_token_counts,
+                window_token_budget=window_token_budget,
+                window_stride=token_budget_window_stride
+            ))
+
+        window_starts: np.ndarray = np.concatenate([window_starts for window_starts, _ in windows])
+        window_sizes_array: np.ndarray = np.concatenate([window_sizes for _, window_sizes in windows])
+        # Token-budget windows may coincide with a fixed-size one, each span is indexed once.
+        window_keys: np.ndarray = window_starts * (len(granularized_corpus) + 1) + window_sizes_array
+        _, unique_window_indexes = np.unique(window_keys, return_index=True)
+        unique_window_indexes = np.sort(unique_window_indexes)
+
+        windowed_corpus: WindowedCorpus = WindowedCorpus(
+            buffer=separator.join(granularized_corpus),
+            segment_starts=segment_starts,
+            segment_ends=segment_ends,
+            segment_pages=np.asarray(granularized_corpus_pages, dtype=np.int32),
+            window_starts=window_starts[unique_window_indexes].astype(np.int32),
+            window_sizes=window_sizes_array[unique_window_indexes].astype(np.int32)
+        )
+
+        return windowed_corpus
 
 
 document_processor = DocumentProcessor()
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class EmbeddingCacheNamespace:
+    KEY_SIZE: int = 16
+
+    def __init__(self, namespace_path: Path, dtype: str) -> None:
+        self.namespace_path: Path = namespace_path
+        self.keys_path: Path = namespace_path / "keys.bin"
+        self.embeddings_path: Path = namespace_path / "embeddings.bin"
+        self.meta_path: Path = namespace_path / "meta.json"
+        self.dtype: np.dtype = np.dtype(dtype)
+        self.embedding_dimension: Optional[int] = None
+        self.key_rows: Dict[bytes, int] = {}
+        self.embeddings: Optional[np.memmap] = None
+        self.lock: threading.Lock = threading.Lock()
+
+        self.namespace_path.mkdir(parents=True, exist_ok=True)
+        if self.meta_path.exists():
+            self.load()
+
+    def load(self) -> None:
+        with open(self.meta_path, "r") as meta_file:
+            meta: dict = json.load(meta_file)
+        self.dtype = np.dtype(meta["dtype"])
+        self.embedding_dimension = meta["embedding_dimension"]
+
+        keys: bytes = self.keys_path.read_bytes() if self.keys_path.exists() else b""
+        row_bytes: int = self.embedding_dimension * self.dtype.itemsize
+        embedding_rows: int = os.path.getsize(self.embeddings_path) // row_bytes \
+            if self.embeddings_path.exists() else 0
+        # A build interrupted between the two appends leaves a torn tail, only rows present in both files count.
+        row_count: int = min(len(keys) // self.KEY_SIZE, embedding_rows)
+        # The tail is cut off both files, so later appends land right after the last whole row.
+        if self.keys_path.exists():
+            os.truncate(self.keys_path, row_count * self.KEY_SIZE)
+        if self.embeddings_path.exists():
+            os.truncate(self.embeddings_path, row_count * row_bytes)
+        self.key_rows = {
+            keys[row * self.KEY_SIZE:(row + 1) * self.KEY_SIZE]: row for row in range(row_count)
+        }
+        self.map_embeddings()
+
+    def map_embeddings(self) -> None:
+        row_count: int = len(self.key_rows)
+        if row_count == 0:
+            self.embeddings = None
+            return
+        self.embeddings = np.memmap(
+            self.embeddings_path,
+            dtype=self.dtype,
+            mode="r",
+            shape=(row_count, self.embedding_dimension)
+        )
+
+    def append(self, keys: List[bytes], embeddings: np.ndarray) -> None:
+        if self.embedding_dimension is None:
+            self.embedding_dimension = embeddings.shape[1]
+            with open(self.meta_path, "w") as meta_file:
+                json.dump({"dtype": self.dtype.name, "embedding_dimension": self.embedding_dimension}, meta_file)
+        elif self.embedding_dimension != embeddings.shape[1]:
+            raise ValueError(
+                f"Embedding dimension {embeddings.shape[1]} does not match cached dimension {self.embedding_dimension}."
+            )
+
+        row_start: int = len(self.key_rows)
+        with open(self.embeddings_path, "ab") as embeddings_file:
+            embeddings_file.write(np.ascontiguousarray(embeddings, dtype=self.dtype).tobytes())
+        with open(self.keys_path, "ab") as keys_file:
+            keys_file.write(b"".join(keys))
+
+        for offset, key in enumerate(keys):
+            self.key_rows[key] = row_start + offset
+        self.map_embeddings()
+
+    def get_embeddings(self, keys: List[bytes],
+                       embedder: Callable[[List[int]], np.ndarray]) -> np.ndarray:
+        with self.lock:
+            missing_keys: Dict[bytes, int] = {}
+            for index, key in enumerate(keys):
+                if key not in self.key_rows and key not in missing_keys:
+                    missing_keys[key] = index
+
+        # The forward pass runs unlocked, concurrent builds on the same model only serialize their appends.
+        if len(missing_keys) > 0:
+            missing_embeddings: np.ndarray = embedder(list(missing_keys.values()))
+            with self.lock:
+                new_offsets: List[int] = [
+                    offset for offset, key in enumerate(missing_keys.keys()) if key not in self.key_rows
+                ]
+                if len(new_offsets) > 0:
+                    missing_key_list: List[bytes] = list(missing_keys.keys())
+                    self.append(
+                        [missing_key_list[offset] for offset in new_offsets],
+                        missing_embeddings[new_offsets]
+                    )
+
+        with self.lock:
+            rows: np.ndarray = np.fromiter((self.key_rows[key] for key in keys), dtype=np.int64, count=len(keys))
+            return np.asarray(self.embeddings[rows], dtype=np.float32)
+
+
+class EmbeddingCache:
+    def __init__(self, cache_path: Path, dtype: str) -> None:
+        self.cache_path: Path = cache_path
+        self.dtype: str = dtype
+        self.namespaces: Dict[str, EmbeddingCacheNamespace] = {}
+        self.hit_count: int = 0
+        self.miss_count: int = 0
+        self.lock: threading.Lock = threading.Lock()
+
+    def get_namespace(self, namespace_key: str) -> EmbeddingCacheNamespace:
+        with self.lock:
+            if namespace_key not in self.namespaces:
+                self.namespaces[namespace_key] = EmbeddingCacheNamespace(
+                    namespace_path=self.cache_path / namespace_key,
+                    dtype=self.dtype
+                )
+            return self.namespaces[namespace_key]
+
+    def get_namespace_key(self, model_type: str, model_name: str) -> str:
+        return hashlib.md5(f"{model_type}_{model_name}".encode("utf-8")).hexdigest()
+
+    def get_text_key(self, text: str) -> bytes:
+        normalized_text: str = " ".join(text.split())
+        return hashlib.md5(normalized_text.encode("utf-8")).digest()
+
+    def get_embeddings(self, namespace_key: str, texts: List[str],
+                       embedder: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        namespace: EmbeddingCacheNamespace = self.get_namespace(namespace_key)
+        keys: List[bytes] = [self.get_text_key(text) for text in texts]
+
+        missing_count: List[int] = [0]
+
+        def embed_missing(indexes: List[int]) -> np.ndarray:
+            missing_count[0] = len(indexes)
+            return embedder([texts[index] for index in indexes])
+
+        embeddings: np.ndarray = namespace.get_embeddings(keys=keys, embedder=embed_missing)
+
+        with self.lock:
+            self.miss_count += missing_count[0]
+            self.hit_count += len(texts) - missing_count[0]
+
+        return embeddings
+
+    def get_statistics(self) -> dict:
+        with self.lock:
+            return {
+                "namespace_count": len(self.namespaces),
+                "cached_embedding_count": sum(len(namespace.key_rows) for namespace in self.namespaces.values()),
+                "hit_count": self.hit_count,
+                "miss_count": self.miss_count,
+            }
+
+
+embedding_cache = EmbeddingCache(
+    cache_path=Path("document_store/embedding_cache"),
+    dtype=os.environ.get("EMBEDDING_CACHE_DTYPE", "float32")
+)
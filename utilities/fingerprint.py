@@ -0,0 +1,82 @@
+import hashlib
+import os
+import sys
+import time
+import urllib.request
+from typing import Optional, Tuple
+
+from utilities.lru_cache import LRUCache
+
+
+class Fingerprint:
+    CHUNK_SIZE: int = 1024 * 1024
+
+    def __init__(self, web_ttl_seconds: float, hash_cache_max_bytes: int) -> None:
+        self.web_ttl_seconds: float = web_ttl_seconds
+        self.file_hashes: LRUCache = LRUCache(max_bytes=hash_cache_max_bytes)
+        self.web_hashes: LRUCache = LRUCache(max_bytes=hash_cache_max_bytes)
+
+    def get_bytes_hash(self, corpus_bytes: bytes) -> str:
+        return hashlib.sha256(corpus_bytes).hexdigest()
+
+    def get_file_hash(self, file_path: str) -> str:
+        file_stat: os.stat_result = os.stat(file_path)
+        file_key: Tuple[str, int, int] = (os.path.abspath(file_path), file_stat.st_size, file_stat.st_mtime_ns)
+        cached_file_hash: Optional[str] = self.file_hashes.get(file_key)
+        if cached_file_hash is not None:
+            return cached_file_hash
+
+        file_hash = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(self.CHUNK_SIZE), b""):
+                file_hash.update(chunk)
+
+        self.file_hashes.put(
+            file_key, file_hash.hexdigest(), sys.getsizeof(file_key[0]) + sys.getsizeof(file_hash.hexdigest())
+        )
+        return file_hash.hexdigest()
+
+    def normalize_text(self, text: str) -> str:
+        # Only line-level whitespace noise is dropped, line breaks still drive paragraph segmentation.
+        return "\n".join(line.rstrip() for line in text.replace("\r\n", "\n").split("\n")).strip()
+
+    def get_text_hash(self, text: str) -> str:
+        return hashlib.sha256(self.normalize_text(text).encode("utf-8")).hexdigest()
+
+    def get_web_hash(self, url: str) -> str:
+        web_hash_entry: Optional[Tuple[str, float]] = self.web_hashes.get(url)
+        if web_hash_entry is not None and time.monotonic() - web_hash_entry[1] < self.web_ttl_seconds:
+            return web_hash_entry[0]
+
+        web_hash = hashlib.sha256()
+        try:
+            request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+            with urllib.request.urlopen(request, timeout=30) as response:
+                for chunk in iter(lambda: response.read(self.CHUNK_SIZE), b""):
+                    web_hash.update(chunk)
+        except (OSError, ValueError):
+            # An unreachable page falls back to its url, the same url then maps to the same artifacts.
+            web_hash = hashlib.sha256(f"url:{url}".encode("utf-8"))
+
+        self.web_hashes.put(
+            url, (web_hash.hexdigest(), time.monotonic()), sys.getsizeof(url) + sys.getsizeof(web_hash.hexdigest())
+        )
+        return web_hash.hexdigest()
+
+    def get_corpus_hash(self, corpus: str, corpus_source_type: str) -> str:
+        if corpus_source_type == "file":
+            corpus_hash: str = self.get_file_hash(corpus)
+        elif corpus_source_type == "text":
+            corpus_hash: str = self.get_text_hash(corpus)
+        elif corpus_source_type == "web":
+            corpus_hash: str = self.get_web_hash(corpus)
+        else:
+            raise ValueError(f"Corpus source type {corpus_source_type} is not supported.")
+
+        return f"{corpus_source_type}_{corpus_hash}"
+
+
+fingerprint = Fingerprint(
+    web_ttl_seconds=float(os.environ.get("FINGERPRINT_WEB_TTL_SECONDS", 300)),
+    hash_cache_max_bytes=int(os.environ.get("FINGERPRINT_HASH_CACHE_MAX_BYTES", 16 * 1024 ** 2))
+)
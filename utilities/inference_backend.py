@@ -0,0 +1,95 @@
+import os
+import threading
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import torch
+
+from utilities.model_registry import model_registry
+
+
+class InferenceBackend:
+    BACKENDS: List[str] = ["default", "cpu", "cpu_int8"]
+    PROBE_TEXTS: List[str] = [
+        "What causes the seasons on Earth?",
+        "The tilt of the Earth's axis changes how directly sunlight reaches each hemisphere during the year.",
+        "Photosynthesis converts light energy into chemical energy stored in glucose.",
+        "How do vaccines train the immune system?",
+        "Interest rates rise when central banks tighten monetary policy to slow inflation.",
+        "A binary search halves the remaining interval at every step.",
+    ]
+
+    def __init__(self, min_cosine_similarity: float) -> None:
+        self.min_cosine_similarity: float = min_cosine_similarity
+        self.accuracy_reports: Dict[str, dict] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def is_gpu_allowed(self, backend: str) -> bool:
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Inference backend {backend} is not supported.")
+        return backend == "default"
+
+    def get_precision_suffix(self, backend: str) -> str:
+        # Only int8 weights change the embeddings, fp32 on any device shares caches and indexes.
+        return "_int8" if backend == "cpu_int8" else ""
+
+    def quantize(self, model: Any) -> int:
+        modules: Dict[int, torch.nn.Module] = {}
+        model_registry.collect_modules(value=model, modules=modules, visited=set(), depth=0)
+        for module in modules.values():
+            torch.quantization.quantize_dynamic(module.to("cpu"), {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+        return len(modules)
+
+    def get_accuracy_report(self, baseline_outputs: np.ndarray, candidate_outputs: np.ndarray) -> dict:
+        # Rows are probe items, columns are embedding dimensions, ranker scores or next token logits.
+        baseline_outputs = baseline_outputs.astype(np.float64).reshape(len(baseline_outputs), -1)
+        candidate_outputs = candidate_outputs.astype(np.float64).reshape(len(candidate_outputs), -1)
+        cosine_similarities: np.ndarray = np.sum(baseline_outputs * candidate_outputs, axis=1) / np.maximum(
+            np.linalg.norm(baseline_outputs, axis=1) * np.linalg.norm(candidate_outputs, axis=1), 1e-12
+        )
+
+        return {
+            "min_cosine_similarity": float(cosine_similarities.min()),
+            "mean_cosine_similarity": float(cosine_similarities.mean()),
+            "argmax_agreement": float(np.mean(
+                np.argmax(baseline_outputs, axis=1) == np.argmax(candidate_outputs, axis=1)
+            )),
+            "max_abs_diff": float(np.abs(baseline_outputs - candidate_outputs).max()),
+        }
+
+    def load(self, model_key: str, backend: str, loader: Callable[[bool], Any],
+             get_probe_outputs: Callable[[Any], np.ndarray]) -> Any:
+        use_gpu: bool = self.is_gpu_allowed(backend)
+        if backend != "cpu_int8":
+            return loader(use_gpu)
+
+        # The int8 model is only served when its probe outputs stay close to a fp32 baseline on the same inputs.
+        candidate: Any = loader(use_gpu)
+        quantized_module_count: int = self.quantize(candidate)
+        if quantized_module_count == 0:
+            return candidate
+
+        baseline: Any = loader(use_gpu)
+        accuracy_report: dict = self.get_accuracy_report(
+            baseline_outputs=get_probe_outputs(baseline),
+            candidate_outputs=get_probe_outputs(candidate)
+        )
+        accuracy_report["quantized_module_count"] = quantized_module_count
+        accuracy_report["accepted"] = accuracy_report["min_cosine_similarity"] >= self.min_cosine_similarity
+        with self.lock:
+            self.accuracy_reports[model_key] = accuracy_report
+
+        return candidate if accuracy_report["accepted"] else baseline
+
+    def get_statistics(self) -> dict:
+        with self.lock:
+            return {
+                "min_cosine_similarity": self.min_cosine_similarity,
+                "accuracy_reports": dict(self.accuracy_reports),
+            }
+
+
+inference_backend = InferenceBackend(
+    min_cosine_similarity=float(os.environ.get("INFERENCE_BACKEND_MIN_COSINE_SIMILARITY", 0.98))
+)
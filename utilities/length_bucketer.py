@@ -0,0 +1,42 @@
+import os
+from typing import List
+
+import numpy as np
+
+
+class LengthBucketer:
+    def __init__(self, batch_token_budget: int, max_batch_size: int, characters_per_token: float) -> None:
+        self.batch_token_budget: int = batch_token_budget
+        self.max_batch_size: int = max_batch_size
+        self.characters_per_token: float = characters_per_token
+
+    def get_token_lengths(self, texts: List[str]) -> np.ndarray:
+        character_lengths: np.ndarray = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        return np.maximum(np.ceil(character_lengths / self.characters_per_token).astype(np.int64), 1)
+
+    def get_batches(self, token_lengths: np.ndarray) -> List[np.ndarray]:
+        # Longest first, so each batch is padded to about its own length and the biggest one runs before memory fills.
+        order: np.ndarray = np.argsort(-token_lengths, kind="stable")
+        batches: List[np.ndarray] = []
+        batch_start: int = 0
+        while batch_start < len(order):
+            batch_size: int = int(np.clip(
+                self.batch_token_budget // token_lengths[order[batch_start]], 1, self.max_batch_size
+            ))
+            batches.append(order[batch_start:batch_start + batch_size])
+            batch_start += batch_size
+
+        return batches
+
+    def scatter(self, batches: List[np.ndarray], batch_outputs: List[np.ndarray]) -> np.ndarray:
+        outputs: np.ndarray = np.concatenate(batch_outputs)
+        scattered_outputs: np.ndarray = np.empty_like(outputs)
+        scattered_outputs[np.concatenate(batches)] = outputs
+        return scattered_outputs
+
+
+length_bucketer = LengthBucketer(
+    batch_token_budget=int(os.environ.get("LENGTH_BUCKET_BATCH_TOKEN_BUDGET", 16384)),
+    max_batch_size=int(os.environ.get("LENGTH_BUCKET_MAX_BATCH_SIZE", 256)),
+    characters_per_token=float(os.environ.get("LENGTH_BUCKET_CHARACTERS_PER_TOKEN", 4.0))
+)
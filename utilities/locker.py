@@ -1,15 +1,124 @@
 import threading
+import time
 from functools import wraps
+from typing import Callable, Dict, Optional, Tuple
 
-locks = {}
+locks_lock = threading.Lock()
+locks: Dict[Tuple[str, str], list] = {}
+flights: Dict[Tuple[str, str], dict] = {}
+statistics: Dict[str, dict] = {}
 
 
-def wait_lock(func):
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        locks[func.__name__] = locks.get(func.__name__, threading.Lock())
-        with locks[func.__name__]:
-            result = func(*args, **kwargs)
-        return result
+def get_statistic(name: str) -> dict:
+    if name not in statistics:
+        statistics[name] = {
+            "acquire_count": 0,
+            "contention_count": 0,
+            "shared_count": 0,
+            "total_wait_duration": 0.0,
+            "max_wait_duration": 0.0,
+        }
+    return statistics[name]
+
+
+def record_wait(name: str, wait_duration: float, contended: bool, shared: bool = False) -> None:
+    with locks_lock:
+        statistic: dict = get_statistic(name)
+        statistic["acquire_count"] += 1
+        statistic["contention_count"] += int(contended)
+        statistic["shared_count"] += int(shared)
+        statistic["total_wait_duration"] += wait_duration
+        statistic["max_wait_duration"] = max(statistic["max_wait_duration"], wait_duration)
+
+
+def acquire(name: str, key: str) -> threading.Lock:
+    # Entries carry a holder count so a key's lock is dropped once nobody holds or waits for it.
+    with locks_lock:
+        entry: Optional[list] = locks.get((name, key))
+        if entry is None:
+            entry = [threading.Lock(), 0]
+            locks[(name, key)] = entry
+        entry[1] += 1
+        lock: threading.Lock = entry[0]
+
+    time_start: float = time.perf_counter()
+    contended: bool = not lock.acquire(blocking=False)
+    if contended:
+        lock.acquire()
+    record_wait(name, time.perf_counter() - time_start, contended)
+
+    return lock
+
+
+def release(name: str, key: str) -> None:
+    with locks_lock:
+        entry: list = locks[(name, key)]
+        entry[0].release()
+        entry[1] -= 1
+        if entry[1] == 0:
+            del locks[(name, key)]
+
+
+def keyed_lock(key: Callable[..., str]):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            lock_key: str = str(key(*args, **kwargs))
+            acquire(func.__qualname__, lock_key)
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                release(func.__qualname__, lock_key)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def single_flight(key: Callable[..., str]):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            flight_key: Tuple[str, str] = (func.__qualname__, str(key(*args, **kwargs)))
+            with locks_lock:
+                flight: Optional[dict] = flights.get(flight_key)
+                is_leader: bool = flight is None
+                if is_leader:
+                    flight = {"event": threading.Event(), "result": None, "error": None}
+                    flights[flight_key] = flight
+
+            if not is_leader:
+                # Identical concurrent calls wait for the one in progress and share its result.
+                time_start: float = time.perf_counter()
+                flight["event"].wait()
+                record_wait(func.__qualname__, time.perf_counter() - time_start, True, shared=True)
+                if flight["error"] is not None:
+                    raise flight["error"]
+                return flight["result"]
+
+            record_wait(func.__qualname__, 0.0, False)
+            try:
+                flight["result"] = func(*args, **kwargs)
+            except BaseException as error:
+                flight["error"] = error
+                raise
+            finally:
+                with locks_lock:
+                    del flights[flight_key]
+                flight["event"].set()
+            return flight["result"]
+
+        return wrapper
+
+    return decorator
+
+
+def get_statistics() -> Dict[str, dict]:
+    with locks_lock:
+        return {
+            "held_lock_count": len(locks),
+            "in_flight_count": len(flights),
+            "functions": {name: dict(statistic) for name, statistic in statistics.items()},
+        }
 
-    return wrapper
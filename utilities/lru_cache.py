@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes: int = max_bytes
+        self.entries: OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+        self.resident_bytes: int = 0
+        self.hit_count: int = 0
+        self.miss_count: int = 0
+        self.eviction_count: int = 0
+        self.lock: threading.RLock = threading.RLock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.lock:
+            entry: Optional[Tuple[Any, int]] = self.entries.get(key, None)
+            if entry is None:
+                self.miss_count += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hit_count += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        with self.lock:
+            self.pop(key)
+            self.entries[key] = (value, size)
+            self.resident_bytes += size
+            # The newest entry is always kept, even if it alone exceeds the budget.
+            while self.resident_bytes > self.max_bytes and len(self.entries) > 1:
+                evicted_key, (evicted_value, evicted_size) = self.entries.popitem(last=False)
+                self.resident_bytes -= evicted_size
+                self.eviction_count += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self.lock:
+            entry: Optional[Tuple[Any, int]] = self.entries.pop(key, None)
+            if entry is None:
+                return None
+            self.resident_bytes -= entry[1]
+            return entry[0]
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self.lock:
+            return key in self.entries
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.entries)
+
+    def get_statistics(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "entry_count": len(self.entries),
+                "resident_bytes": self.resident_bytes,
+                "max_bytes": self.max_bytes,
+                "hit_count": self.hit_count,
+                "miss_count": self.miss_count,
+                "eviction_count": self.eviction_count,
+            }
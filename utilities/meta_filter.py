@@ -0,0 +1,36 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class MetaFilter:
+    FILTER_OPERATORS: dict = {
+        "$eq": np.equal,
+        "$ne": np.not_equal,
+        "$gt": np.greater,
+        "$gte": np.greater_equal,
+        "$lt": np.less,
+        "$lte": np.less_equal,
+    }
+
+    def get_mask(self, meta_columns: Dict[str, np.ndarray], row_count: int, filters: Optional[dict]) -> np.ndarray:
+        mask: np.ndarray = np.ones(row_count, dtype=bool)
+        for field, condition in (filters or {}).items():
+            if field not in meta_columns:
+                raise ValueError(f"Filter field {field} is not supported.")
+            column: np.ndarray = meta_columns[field]
+            if not isinstance(condition, dict):
+                condition = {"$in": condition} if isinstance(condition, list) else {"$eq": condition}
+            for operator, value in condition.items():
+                if operator == "$in":
+                    mask &= np.isin(column, value)
+                elif operator == "$nin":
+                    mask &= ~np.isin(column, value)
+                elif operator in self.FILTER_OPERATORS:
+                    mask &= self.FILTER_OPERATORS[operator](column, value)
+                else:
+                    raise ValueError(f"Filter operator {operator} is not supported.")
+        return mask
+
+
+meta_filter = MetaFilter()
@@ -0,0 +1,89 @@
+import os
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Set
+
+
+class MicroBatcher:
+    def __init__(self, max_batch_size: int, max_wait_seconds: float) -> None:
+        self.max_batch_size: int = max_batch_size
+        self.max_wait_seconds: float = max_wait_seconds
+        self.condition: threading.Condition = threading.Condition()
+        self.queues: Dict[str, List[dict]] = {}
+        self.collecting_keys: Set[str] = set()
+        self.statistics: Dict[str, dict] = {}
+
+    def submit(self, key: str, item: Any, batch_function: Callable[[List[Any]], List[Any]]) -> Any:
+        entry: dict = {"item": item, "done": False, "result": None, "error": None, "enqueue_time": perf_counter()}
+        with self.condition:
+            self.queues.setdefault(key, []).append(entry)
+            self.condition.notify_all()
+
+        # Whoever finds no collector for the key becomes it and runs the batch for everyone queued.
+        while True:
+            with self.condition:
+                while not entry["done"] and key in self.collecting_keys:
+                    self.condition.wait()
+                if entry["done"]:
+                    break
+                self.collecting_keys.add(key)
+            self.collect(key, batch_function)
+
+        if entry["error"] is not None:
+            raise entry["error"]
+        return entry["result"]
+
+    def collect(self, key: str, batch_function: Callable[[List[Any]], List[Any]]) -> None:
+        deadline: float = perf_counter() + self.max_wait_seconds
+        with self.condition:
+            while len(self.queues[key]) < self.max_batch_size and deadline - perf_counter() > 0:
+                self.condition.wait(deadline - perf_counter())
+            batch: List[dict] = self.queues[key][:self.max_batch_size]
+            self.queues[key] = self.queues[key][self.max_batch_size:]
+            if len(self.queues[key]) == 0:
+                del self.queues[key]
+
+        batch_start_time: float = perf_counter()
+        try:
+            results: List[Any] = batch_function([entry["item"] for entry in batch])
+            error = None
+        except Exception as batch_error:
+            results = [None] * len(batch)
+            error = batch_error
+
+        with self.condition:
+            for entry, result in zip(batch, results):
+                entry["result"] = result
+                entry["error"] = error
+                entry["done"] = True
+            self.record_batch(key, batch, batch_start_time)
+            self.collecting_keys.discard(key)
+            self.condition.notify_all()
+
+    def record_batch(self, key: str, batch: List[dict], batch_start_time: float) -> None:
+        statistic: dict = self.statistics.setdefault(key, {
+            "batch_count": 0,
+            "item_count": 0,
+            "batch_size_histogram": {},
+            "total_queue_delay": 0.0,
+            "max_queue_delay": 0.0,
+        })
+        queue_delays: List[float] = [batch_start_time - entry["enqueue_time"] for entry in batch]
+        statistic["batch_count"] += 1
+        statistic["item_count"] += len(batch)
+        statistic["batch_size_histogram"][len(batch)] = statistic["batch_size_histogram"].get(len(batch), 0) + 1
+        statistic["total_queue_delay"] += sum(queue_delays)
+        statistic["max_queue_delay"] = max(statistic["max_queue_delay"], max(queue_delays))
+
+    def get_statistics(self) -> Dict[str, dict]:
+        with self.condition:
+            return {
+                key: {**statistic, "batch_size_histogram": dict(statistic["batch_size_histogram"])}
+                for key, statistic in self.statistics.items()
+            }
+
+
+micro_batcher = MicroBatcher(
+    max_batch_size=int(os.environ.get("MICRO_BATCH_MAX_SIZE", 8)),
+    max_wait_seconds=float(os.environ.get("MICRO_BATCH_MAX_WAIT_SECONDS", 0.01))
+)
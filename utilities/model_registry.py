@@ -0,0 +1,120 @@
+import copy
+import hashlib
+import itertools
+import json
+import os
+import types
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Set
+
+import torch
+
+from utilities import locker
+from utilities.lru_cache import LRUCache
+
+
+class ModelRegistry:
+    def __init__(self, max_bytes: int) -> None:
+        self.cache: LRUCache = LRUCache(max_bytes=max_bytes)
+        self.load_statistics: Dict[str, Dict] = {}
+
+    def get_key(self, model_type: str, load_options: dict) -> str:
+        load_options_hash: str = hashlib.md5(
+            json.dumps(load_options, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+        return f"{model_type}_{load_options_hash}"
+
+    def get_model(self, model_type: str, load_options: dict, loader: Callable[[], Any]) -> Any:
+        key: str = self.get_key(model_type=model_type, load_options=load_options)
+
+        model: Any = self.cache.get(key)
+        if model is None:
+            model = self.load_model(
+                key=key,
+                model_type=model_type,
+                load_options=load_options,
+                loader=loader
+            )
+
+        # Callers get a shallow copy, so per-request attributes (document store, lengths, pipeline name)
+        # never leak between sessions while the weights stay shared.
+        return copy.copy(model)
+
+    @locker.single_flight(key=lambda self, key, model_type, load_options, loader: key)
+    def load_model(self, key: str, model_type: str, load_options: dict, loader: Callable[[], Any]) -> Any:
+        if key in self.cache:
+            return self.cache.get(key)
+
+        time_start: datetime = datetime.now()
+        model: Any = loader()
+        time_finish: datetime = datetime.now()
+        time_delta: timedelta = time_finish - time_start
+
+        resident_bytes: int = self.get_resident_bytes(model)
+        self.cache.put(key, model, resident_bytes)
+
+        load_statistic: dict = self.load_statistics.get(key, {
+            "model_type": model_type,
+            "load_options": load_options,
+            "load_count": 0,
+            "total_load_duration": 0.0,
+        })
+        load_statistic["load_count"] += 1
+        load_statistic["last_load_duration"] = time_delta.total_seconds()
+        load_statistic["total_load_duration"] += time_delta.total_seconds()
+        load_statistic["resident_bytes"] = resident_bytes
+        self.load_statistics[key] = load_statistic
+
+        return model
+
+    def get_resident_bytes(self, model: Any) -> int:
+        modules: Dict[int, torch.nn.Module] = {}
+        self.collect_modules(value=model, modules=modules, visited=set(), depth=0)
+
+        tensor_bytes: Dict[int, int] = {}
+        for module in modules.values():
+            for tensor in itertools.chain(module.parameters(), module.buffers()):
+                tensor_bytes[tensor.data_ptr()] = tensor.numel() * tensor.element_size()
+            # Dynamically quantized layers keep their int8 weights packed outside parameters and buffers.
+            for submodule in module.modules():
+                if isinstance(submodule, torch.nn.quantized.dynamic.Linear):
+                    weight: torch.Tensor = submodule.weight()
+                    tensor_bytes[id(submodule)] = weight.numel() * weight.element_size()
+
+        return sum(tensor_bytes.values())
+
+    def collect_modules(self, value: Any, modules: Dict[int, torch.nn.Module], visited: Set[int], depth: int) -> None:
+        if id(value) in visited or depth > 6 or isinstance(value, (type, types.ModuleType)):
+            return
+        visited.add(id(value))
+
+        if isinstance(value, torch.nn.Module):
+            modules[id(value)] = value
+            return
+
+        if isinstance(value, dict):
+            children = value.values()
+        elif isinstance(value, (list, tuple, set)):
+            children = value
+        elif hasattr(value, "__dict__"):
+            children = vars(value).values()
+        else:
+            return
+
+        for child in children:
+            self.collect_modules(value=child, modules=modules, visited=visited, depth=depth + 1)
+
+    def get_statistics(self) -> dict:
+        return {
+            **self.cache.get_statistics(),
+            "models": {
+                key: {**load_statistic, "resident": key in self.cache}
+                for key, load_statistic in self.load_statistics.items()
+            }
+        }
+
+
+model_registry = ModelRegistry(
+    max_bytes=int(os.environ.get("MODEL_REGISTRY_MAX_BYTES", 8 * 1024 ** 3))
+)
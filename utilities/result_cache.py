@@ -0,0 +1,107 @@
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from utilities.lru_cache import LRUCache
+
+
+class ResultCache:
+    def __init__(self, cache_path: Path, memory_max_bytes: int, disk_max_bytes: int, ttl_seconds: float) -> None:
+        self.cache_path: Path = cache_path
+        self.memory_cache: LRUCache = LRUCache(max_bytes=memory_max_bytes)
+        self.disk_max_bytes: int = disk_max_bytes
+        self.ttl_seconds: float = ttl_seconds
+        self.memory_hit_count: int = 0
+        self.disk_hit_count: int = 0
+        self.miss_count: int = 0
+        self.expired_count: int = 0
+        self.disk_eviction_count: int = 0
+        self.lock: threading.Lock = threading.Lock()
+
+    def get_result_file_path(self, namespace: str, key: str) -> Path:
+        return self.cache_path / namespace / f"{key}.pickle"
+
+    def is_expired(self, created_at: float) -> bool:
+        return time.time() - created_at > self.ttl_seconds
+
+    def record(self, counter_name: str) -> None:
+        with self.lock:
+            setattr(self, counter_name, getattr(self, counter_name) + 1)
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        entry: Optional[Tuple[Any, float]] = self.memory_cache.get((namespace, key))
+        if entry is not None and not self.is_expired(entry[1]):
+            self.record("memory_hit_count")
+            return entry[0]
+        if entry is not None:
+            self.memory_cache.pop((namespace, key))
+
+        result_file_path: Path = self.get_result_file_path(namespace, key)
+        if not result_file_path.exists():
+            self.record("miss_count")
+            return None
+
+        # The file keeps its creation time as mtime, reads only bump atime for the disk eviction order.
+        if self.is_expired(result_file_path.stat().st_mtime):
+            result_file_path.unlink(missing_ok=True)
+            self.record("expired_count")
+            self.record("miss_count")
+            return None
+
+        result_bytes: bytes = result_file_path.read_bytes()
+        os.utime(result_file_path, (time.time(), result_file_path.stat().st_mtime))
+        result: Any = pickle.loads(result_bytes)
+        self.memory_cache.put((namespace, key), (result, result_file_path.stat().st_mtime), len(result_bytes))
+        self.record("disk_hit_count")
+
+        return result
+
+    def put(self, namespace: str, key: str, result: Any) -> None:
+        try:
+            result_bytes: bytes = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # A result holding unpicklable pipeline objects is just not cached.
+            return
+        self.memory_cache.put((namespace, key), (result, time.time()), len(result_bytes))
+
+        result_file_path: Path = self.get_result_file_path(namespace, key)
+        result_file_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_result_file_path: Path = result_file_path.with_name(f"{result_file_path.name}.tmp")
+        temporary_result_file_path.write_bytes(result_bytes)
+        os.replace(temporary_result_file_path, result_file_path)
+        self.evict_disk()
+
+    def evict_disk(self) -> None:
+        result_file_paths: list = sorted(
+            self.cache_path.glob("*/*.pickle"),
+            key=lambda result_file_path: result_file_path.stat().st_atime
+        )
+        total_bytes: int = sum(result_file_path.stat().st_size for result_file_path in result_file_paths)
+        for result_file_path in result_file_paths:
+            if total_bytes <= self.disk_max_bytes:
+                break
+            total_bytes -= result_file_path.stat().st_size
+            result_file_path.unlink(missing_ok=True)
+            self.record("disk_eviction_count")
+
+    def get_statistics(self) -> dict:
+        with self.lock:
+            return {
+                "memory": self.memory_cache.get_statistics(),
+                "memory_hit_count": self.memory_hit_count,
+                "disk_hit_count": self.disk_hit_count,
+                "miss_count": self.miss_count,
+                "expired_count": self.expired_count,
+                "disk_eviction_count": self.disk_eviction_count,
+            }
+
+
+result_cache = ResultCache(
+    cache_path=Path("document_store/result_cache"),
+    memory_max_bytes=int(os.environ.get("RESULT_CACHE_MEMORY_MAX_BYTES", 256 * 1024 ** 2)),
+    disk_max_bytes=int(os.environ.get("RESULT_CACHE_DISK_MAX_BYTES", 2 * 1024 ** 3)),
+    ttl_seconds=float(os.environ.get("RESULT_CACHE_TTL_SECONDS", 24 * 60 * 60))
+)
@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from utilities.lru_cache import LRUCache
+
+
+class SegmentCache:
+    def __init__(self, cache_path: Path, max_bytes: int) -> None:
+        self.cache_path: Path = cache_path
+        self.memory_cache: LRUCache = LRUCache(max_bytes=max_bytes)
+        self.disk_hit_count: int = 0
+        self.disk_miss_count: int = 0
+
+    def get_key(self, corpus_hash: str, granularity: str) -> str:
+        return f"{corpus_hash}_{granularity}"
+
+    def get_size(self, segments: List[str], pages: List[int]) -> int:
+        return sum(sys.getsizeof(segment) for segment in segments) + sys.getsizeof(pages) * 2
+
+    def get(self, key: str) -> Optional[Tuple[List[str], List[int]]]:
+        entry: Optional[Tuple[List[str], List[int]]] = self.memory_cache.get(key)
+        if entry is not None:
+            return entry
+
+        segment_file_path: Path = self.cache_path / f"{key}.json"
+        if not segment_file_path.exists():
+            self.disk_miss_count += 1
+            return None
+
+        with open(segment_file_path, "r") as segment_file:
+            segment_file_content: dict = json.load(segment_file)
+        entry = (segment_file_content["segments"], segment_file_content["pages"])
+        self.memory_cache.put(key, entry, self.get_size(*entry))
+        self.disk_hit_count += 1
+
+        return entry
+
+    def put(self, key: str, segments: List[str], pages: List[int]) -> None:
+        self.memory_cache.put(key, (segments, pages), self.get_size(segments, pages))
+
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        segment_file_path: Path = self.cache_path / f"{key}.json"
+        temporary_segment_file_path: Path = self.cache_path / f"{key}.json.tmp"
+        with open(temporary_segment_file_path, "w") as segment_file:
+            json.dump({"segments": segments, "pages": pages}, segment_file)
+        os.replace(temporary_segment_file_path, segment_file_path)
+
+    def get_statistics(self) -> dict:
+        return {
+            "memory": self.memory_cache.get_statistics(),
+            "disk_hit_count": self.disk_hit_count,
+            "disk_miss_count": self.disk_miss_count,
+        }
+
+
+segment_cache = SegmentCache(
+    cache_path=Path("document_store/segment_cache"),
+    max_bytes=int(os.environ.get("SEGMENT_CACHE_MAX_BYTES", 512 * 1024 ** 2))
+)
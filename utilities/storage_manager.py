@@ -0,0 +1,164 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+class StorageManager:
+    TOUCH_INTERVAL_SECONDS: float = 60.0
+
+    def __init__(self, root_path: Path, max_bytes: int) -> None:
+        self.root_path: Path = root_path
+        self.max_bytes: int = max_bytes
+        self.manifest_path: Path = root_path / "manifest.json"
+        self.manifest: Optional[Dict[str, dict]] = None
+        self.eviction_listeners: Dict[str, List[Callable[[str], None]]] = {}
+        self.lock: threading.RLock = threading.RLock()
+
+    def get_manifest(self) -> Dict[str, dict]:
+        with self.lock:
+            if self.manifest is None:
+                self.manifest = {}
+                if self.manifest_path.exists():
+                    with open(self.manifest_path, "r") as manifest_file:
+                        self.manifest = json.load(manifest_file)
+            return self.manifest
+
+    def save_manifest(self) -> None:
+        with self.lock:
+            self.root_path.mkdir(parents=True, exist_ok=True)
+            temporary_manifest_path: Path = self.root_path / "manifest.json.tmp"
+            with open(temporary_manifest_path, "w") as manifest_file:
+                json.dump(self.get_manifest(), manifest_file, indent=1)
+            os.replace(temporary_manifest_path, self.manifest_path)
+
+    def get_artifact_key(self, kind: str, key: str) -> str:
+        return f"{kind}/{key}"
+
+    def get_artifact_path(self, kind: str, key: str) -> Path:
+        return self.root_path / kind / key
+
+    def get_sqlite_url(self, kind: str, key: str) -> str:
+        # Each index owns its database, in WAL mode so readers never wait on a writer.
+        database_path: Path = self.get_artifact_path(kind, key) / "document_store.db"
+        database_path.parent.mkdir(parents=True, exist_ok=True)
+        connection: sqlite3.Connection = sqlite3.connect(database_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.close()
+        return f"sqlite:///{database_path.as_posix()}"
+
+    def get_size(self, path: Path) -> int:
+        if path.is_file():
+            return path.stat().st_size
+        return sum(file_path.stat().st_size for file_path in path.rglob("*") if file_path.is_file())
+
+    def add_eviction_listener(self, kind: str, listener: Callable[[str], None]) -> None:
+        self.eviction_listeners.setdefault(kind, []).append(listener)
+
+    def vacuum(self, kind: str, key: str) -> None:
+        database_path: Path = self.get_artifact_path(kind, key) / "document_store.db"
+        if database_path.exists():
+            connection: sqlite3.Connection = sqlite3.connect(database_path, isolation_level=None)
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            connection.execute("VACUUM")
+            connection.close()
+
+    def register(self, kind: str, key: str, metadata: Optional[dict] = None) -> None:
+        artifact_path: Path = self.get_artifact_path(kind, key)
+        self.vacuum(kind, key)
+        with self.lock:
+            self.get_manifest()[self.get_artifact_key(kind, key)] = {
+                "kind": kind,
+                "key": key,
+                "size_bytes": self.get_size(artifact_path),
+                "created_at": time.time(),
+                "last_accessed_at": time.time(),
+                "metadata": metadata or {},
+            }
+            self.evict(max_bytes=self.max_bytes, protected_artifact_keys={self.get_artifact_key(kind, key)})
+            self.save_manifest()
+
+    def touch(self, kind: str, key: str) -> None:
+        with self.lock:
+            artifact: Optional[dict] = self.get_manifest().get(self.get_artifact_key(kind, key))
+            if artifact is None:
+                if self.get_artifact_path(kind, key).exists():
+                    self.register(kind, key)
+                return
+            # Access times only steer eviction, so the manifest is not rewritten on every query.
+            if time.time() - artifact["last_accessed_at"] > self.TOUCH_INTERVAL_SECONDS:
+                artifact["last_accessed_at"] = time.time()
+                self.save_manifest()
+
+    def get_artifacts(self) -> List[dict]:
+        with self.lock:
+            return sorted(self.get_manifest().values(), key=lambda artifact: artifact["last_accessed_at"])
+
+    def find_artifact(self, kind: str, metadata: dict) -> Optional[dict]:
+        # The most recently used artifact of the kind whose metadata holds every given item.
+        for artifact in reversed(self.get_artifacts()):
+            if artifact["kind"] == kind and metadata.items() <= artifact.get("metadata", {}).items():
+                return artifact
+        return None
+
+    def get_total_bytes(self) -> int:
+        return sum(artifact["size_bytes"] for artifact in self.get_artifacts())
+
+    def delete(self, kind: str, key: str) -> None:
+        with self.lock:
+            for listener in self.eviction_listeners.get(kind, []):
+                listener(key)
+            shutil.rmtree(self.get_artifact_path(kind, key), ignore_errors=True)
+            self.get_manifest().pop(self.get_artifact_key(kind, key), None)
+
+    def evict(self, max_bytes: int, protected_artifact_keys: Optional[set] = None,
+              dry_run: bool = False) -> List[dict]:
+        evicted_artifacts: List[dict] = []
+        with self.lock:
+            total_bytes: int = self.get_total_bytes()
+            for artifact in self.get_artifacts():
+                if total_bytes <= max_bytes:
+                    break
+                if self.get_artifact_key(artifact["kind"], artifact["key"]) in (protected_artifact_keys or set()):
+                    continue
+                if not dry_run:
+                    self.delete(artifact["kind"], artifact["key"])
+                total_bytes -= artifact["size_bytes"]
+                evicted_artifacts.append(artifact)
+            if not dry_run and len(evicted_artifacts) > 0:
+                self.save_manifest()
+        return evicted_artifacts
+
+    def get_legacy_artifact_paths(self) -> List[Path]:
+        # Artifacts written before per-index storage sit flat in the document store directory.
+        legacy_path: Path = self.root_path.parent
+        return sorted(
+            path for pattern in ["faiss_index_*", "faiss_config_*", "faiss_report_*", "sparse_index_*"]
+            for path in legacy_path.glob(pattern)
+        )
+
+    def prune_legacy(self, dry_run: bool = False) -> List[Path]:
+        # The shared database only backed the legacy indexes, so it goes with them.
+        legacy_artifact_paths: List[Path] = self.get_legacy_artifact_paths() + [
+            path for path in self.root_path.parent.glob("document_store.db*") if path.is_file()
+        ]
+        if dry_run:
+            return legacy_artifact_paths
+
+        for path in legacy_artifact_paths:
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink()
+
+        return legacy_artifact_paths
+
+
+storage_manager = StorageManager(
+    root_path=Path("document_store/indexes"),
+    max_bytes=int(os.environ.get("STORAGE_MANAGER_MAX_BYTES", 20 * 1024 ** 3))
+)
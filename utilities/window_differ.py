@@ -0,0 +1,103 @@
+import difflib
+import hashlib
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from utilities.windowed_corpus import WindowedCorpus
+
+
+class WindowDiffer:
+    def get_segment_hashes(self, windowed_corpus: WindowedCorpus) -> np.ndarray:
+        return np.fromiter(
+            (
+                int.from_bytes(hashlib.md5(segment.encode("utf-8")).digest()[:8], "little", signed=True)
+                for segment in windowed_corpus.get_segments()
+            ),
+            dtype=np.int64,
+            count=windowed_corpus.get_segment_count()
+        )
+
+    def get_layout(self, windowed_corpus: WindowedCorpus) -> Dict[str, np.ndarray]:
+        return {
+            "segment_hashes": self.get_segment_hashes(windowed_corpus),
+            "window_starts": np.asarray(windowed_corpus.window_starts, dtype=np.int64),
+            "window_sizes": np.asarray(windowed_corpus.window_sizes, dtype=np.int64),
+        }
+
+    def save_layout(self, layout: Dict[str, np.ndarray], layout_path: Path) -> None:
+        layout_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(layout_path, "wb") as layout_file:
+            np.savez(layout_file, **layout)
+
+    def load_layout(self, layout_path: Path) -> Dict[str, np.ndarray]:
+        with np.load(layout_path) as layout_file:
+            return {name: layout_file[name] for name in layout_file.files}
+
+    def get_segment_mapping(self, old_segment_hashes: np.ndarray, new_segment_hashes: np.ndarray) -> np.ndarray:
+        segment_mapping: np.ndarray = np.full(len(new_segment_hashes), -1, dtype=np.int64)
+
+        # Edits are usually local, so the unchanged head and tail are matched without the sequence matcher.
+        common_count: int = min(len(old_segment_hashes), len(new_segment_hashes))
+        prefix_equals: np.ndarray = old_segment_hashes[:common_count] == new_segment_hashes[:common_count]
+        prefix_count: int = common_count if prefix_equals.all() else int(np.argmin(prefix_equals))
+        suffix_equals: np.ndarray = (
+                old_segment_hashes[len(old_segment_hashes) - common_count + prefix_count:][::-1]
+                == new_segment_hashes[len(new_segment_hashes) - common_count + prefix_count:][::-1]
+        )
+        suffix_count: int = len(suffix_equals) if suffix_equals.all() else int(np.argmin(suffix_equals))
+
+        segment_mapping[:prefix_count] = np.arange(prefix_count)
+        if suffix_count > 0:
+            segment_mapping[len(new_segment_hashes) - suffix_count:] = np.arange(
+                len(old_segment_hashes) - suffix_count, len(old_segment_hashes)
+            )
+
+        old_middle: list = old_segment_hashes[prefix_count:len(old_segment_hashes) - suffix_count].tolist()
+        new_middle: list = new_segment_hashes[prefix_count:len(new_segment_hashes) - suffix_count].tolist()
+        sequence_matcher: difflib.SequenceMatcher = difflib.SequenceMatcher(
+            None, old_middle, new_middle, autojunk=False
+        )
+        for old_start, new_start, size in sequence_matcher.get_matching_blocks():
+            segment_mapping[prefix_count + new_start:prefix_count + new_start + size] = np.arange(
+                prefix_count + old_start, prefix_count + old_start + size
+            )
+
+        return segment_mapping
+
+    def get_window_mapping(self, old_layout: Dict[str, np.ndarray], new_layout: Dict[str, np.ndarray]) -> np.ndarray:
+        # A new window reuses an old one when its segments map onto one unbroken old run with the same start and size.
+        segment_mapping: np.ndarray = self.get_segment_mapping(
+            old_segment_hashes=old_layout["segment_hashes"],
+            new_segment_hashes=new_layout["segment_hashes"]
+        )
+        segment_offsets: np.ndarray = segment_mapping - np.arange(len(segment_mapping))
+        run_breaks: np.ndarray = (segment_mapping == -1) | np.concatenate([
+            [True], segment_offsets[1:] != segment_offsets[:-1]
+        ])[:len(segment_mapping)]
+        run_ids: np.ndarray = np.cumsum(run_breaks)
+
+        window_starts: np.ndarray = new_layout["window_starts"]
+        window_ends: np.ndarray = window_starts + new_layout["window_sizes"] - 1
+        window_mapping: np.ndarray = np.full(len(window_starts), -1, dtype=np.int64)
+        if len(window_starts) == 0 or len(old_layout["window_starts"]) == 0:
+            return window_mapping
+
+        contiguous: np.ndarray = (segment_mapping[window_starts] != -1) & \
+            (run_ids[window_starts] == run_ids[window_ends])
+        key_base: int = int(max(old_layout["window_sizes"].max(), new_layout["window_sizes"].max())) + 1
+        old_window_keys: np.ndarray = old_layout["window_starts"] * key_base + old_layout["window_sizes"]
+        old_window_order: np.ndarray = np.argsort(old_window_keys, kind="stable")
+        new_window_keys: np.ndarray = segment_mapping[window_starts] * key_base + new_layout["window_sizes"]
+        key_positions: np.ndarray = np.minimum(
+            np.searchsorted(old_window_keys[old_window_order], new_window_keys),
+            len(old_window_keys) - 1
+        )
+        found: np.ndarray = contiguous & (old_window_keys[old_window_order[key_positions]] == new_window_keys)
+        window_mapping[found] = old_window_order[key_positions[found]]
+
+        return window_mapping
+
+
+window_differ = WindowDiffer()
@@ -0,0 +1,80 @@
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from haystack.schema import Document
+
+from utilities.meta_filter import meta_filter
+
+
+class WindowedCorpus:
+    def __init__(self, buffer: str, segment_starts: np.ndarray, segment_ends: np.ndarray, segment_pages: np.ndarray,
+                 window_starts: np.ndarray, window_sizes: np.ndarray) -> None:
+        self.buffer: str = buffer
+        self.segment_starts: np.ndarray = segment_starts
+        self.segment_ends: np.ndarray = segment_ends
+        self.segment_pages: np.ndarray = segment_pages
+        self.window_starts: np.ndarray = window_starts
+        self.window_sizes: np.ndarray = window_sizes
+
+    def get_segment_count(self) -> int:
+        return len(self.segment_starts)
+
+    def get_window_count(self) -> int:
+        return len(self.window_starts)
+
+    def get_segments(self) -> List[str]:
+        return [self.buffer[start:end] for start, end in zip(self.segment_starts.tolist(), self.segment_ends.tolist())]
+
+    def get_span_text(self, index_window: int, window_size: int) -> str:
+        # Segments sit in the buffer joined by the granularity separator, so a window is one contiguous slice.
+        return self.buffer[self.segment_starts[index_window]:self.segment_ends[index_window + window_size - 1]]
+
+    def get_window_text(self, window_index: int) -> str:
+        return self.get_span_text(int(self.window_starts[window_index]), int(self.window_sizes[window_index]))
+
+    def get_window_texts(self, window_indexes: Iterable[int]) -> List[str]:
+        return [self.get_window_text(window_index) for window_index in window_indexes]
+
+    def get_window_id(self, window_index: int) -> str:
+        return f"{self.window_starts[window_index]}_{self.window_sizes[window_index]}"
+
+    def get_window_meta(self, window_index: int) -> dict:
+        index_window: int = int(self.window_starts[window_index])
+        window_size: int = int(self.window_sizes[window_index])
+        return {
+            "index_window": index_window,
+            "window_size": window_size,
+            "page_start": int(self.segment_pages[index_window]),
+            "page_end": int(self.segment_pages[index_window + window_size - 1]),
+        }
+
+    def get_meta_columns(self) -> Dict[str, np.ndarray]:
+        return {
+            "index_window": self.window_starts,
+            "window_size": self.window_sizes,
+            "page_start": self.segment_pages[self.window_starts],
+            "page_end": self.segment_pages[self.window_starts + self.window_sizes - 1],
+        }
+
+    def get_filter_mask(self, filters: Optional[dict]) -> np.ndarray:
+        return meta_filter.get_mask(self.get_meta_columns(), self.get_window_count(), filters)
+
+    def get_segment_offsets(self, window_index: int) -> List[int]:
+        index_window: int = int(self.window_starts[window_index])
+        window_size: int = int(self.window_sizes[window_index])
+        segment_starts: np.ndarray = self.segment_starts[index_window:index_window + window_size]
+        return (segment_starts - segment_starts[0]).tolist()
+
+    def get_document(self, window_index: int, with_content: bool = True, score: Optional[float] = None,
+                     embedding: Optional[np.ndarray] = None) -> Document:
+        meta: dict = self.get_window_meta(window_index)
+        # Segment offsets within the content let overlapping windows be merged by segment, not by text.
+        if with_content:
+            meta["segment_offsets"] = self.get_segment_offsets(window_index)
+        return Document(
+            id=self.get_window_id(window_index),
+            content=self.get_window_text(window_index) if with_content else "",
+            meta=meta,
+            score=score,
+            embedding=embedding
+        )